@@ -0,0 +1,5 @@
+#!/bin/bash
+
+# Benchmark each build stage on a synthetic corpus
+# Pass --output FILE to save results, --baseline FILE to check for regressions
+python3 src/benchmark.py "$@"
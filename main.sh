@@ -1,7 +1,5 @@
 #!/bin/bash
 
-# Generate the static site (with default basepath "/")
-python3 src/main.py
-
-# Start the web server
-cd docs && python3 -m http.server 8888
+# Build the site, serve it at http://localhost:8888 and rebuild with
+# live reload whenever content/, static/ or template.html changes
+python3 src/main.py --watch --port 8888
@@ -0,0 +1,244 @@
+"""
+On-disk cache of parsed markdown, so unchanged sources skip parsing.
+
+Each document's block HTMLNode trees are stored in a compact marshal
+encoding built from plain strings, tuples, lists and dicts:
+
+    "text"                          text leaf (no tag)
+    (tag, value)                    leaf
+    (tag, value, props)             leaf with attributes
+    [tag, [children...]]            parent
+    [tag, [children...], props]     parent with attributes
+
+Trees are parsed without a URL resolver and link/image URLs are stored
+as written, so one entry serves every basepath and relative page URL;
+they are resolved as the tree is loaded. Entries are files named by the
+hash of the source text and the parser version, so a template-only
+change re-renders pages from cached trees without tokenizing them again,
+while any change to the parser's code misses the old entries.
+
+A document that misses (a new or edited page) is rendered block by block
+through the in-memory BlockCache, with the trees of blocks parsed earlier
+in this process remembered, so only the blocks that changed are parsed.
+"""
+import os
+import sys
+import marshal
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+
+from block_cache import BlockCache, block_key
+from block_markdown import block_to_html_node, iter_blocks
+from build_manifest import hash_file, prune_cache_dir
+from htmlnode import LeafNode, ParentNode
+from instrument import traced, register_traced
+
+register_traced(globals(), "block_to_html_node")
+
+
+# Bump when the encoding changes
+AST_FORMAT_VERSION = 1
+
+# The modules whose code decides what a document parses to
+PARSER_MODULES = (
+    "block_markdown.py", "inline_markdown.py", "textnode.py", "htmlnode.py", "highlight.py",
+)
+
+# The URL attribute of each tag that has one, resolved at load time
+URL_PROPS = {"a": "href", "img": "src"}
+
+# Default number of parsed block trees remembered in memory
+DEFAULT_MAX_BLOCK_TREES = 16384
+
+
+@lru_cache(maxsize=None)
+def parser_version():
+    """Return a short digest of the encoding version and the parser's code."""
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256(str(AST_FORMAT_VERSION).encode())
+    for name in PARSER_MODULES:
+        digest.update(hash_file(os.path.join(src_dir, name)).encode())
+    return digest.hexdigest()[:16]
+
+
+def encode_node(node, url_resolver=None):
+    """
+    Encode an HTMLNode tree into marshal-able strings, tuples and lists.
+
+    With a url_resolver, the tree's link and image URLs are resolved in
+    place as they are encoded (the encoding keeps them as written), so a
+    freshly parsed tree can be stored and then rendered in one walk.
+    """
+    props = node.props
+    if props and url_resolver is not None:
+        node.props = _resolve_props(node.tag, props, url_resolver)
+    if isinstance(node, ParentNode):
+        children = [encode_node(child, url_resolver) for child in node.children]
+        if props:
+            return [node.tag, children, props]
+        return [node.tag, children]
+    if props:
+        return (node.tag, node.value, props)
+    if node.tag is None:
+        return node.value
+    return (node.tag, node.value)
+
+
+def _resolve_props(tag, props, url_resolver):
+    attribute = URL_PROPS.get(tag)
+    if url_resolver is None or attribute not in props:
+        return props
+    props = dict(props)
+    props[attribute] = url_resolver.resolve(props[attribute])
+    return props
+
+
+def decode_node(encoded, url_resolver=None):
+    """
+    Rebuild the HTMLNode tree from encode_node's output.
+
+    Args:
+        encoded: The encoded tree
+        url_resolver: Optional URLResolver applied to link and image URLs,
+                      in document order, just as when parsing
+    """
+    if isinstance(encoded, str):
+        return LeafNode(None, encoded)
+    if isinstance(encoded, tuple):
+        props = encoded[2] if len(encoded) > 2 else None
+        if props:
+            props = _resolve_props(encoded[0], props, url_resolver)
+        return LeafNode(encoded[0], encoded[1], props)
+    # The parent's URL is resolved before its children's, as in encode_node
+    props = encoded[2] if len(encoded) > 2 else None
+    if props:
+        props = _resolve_props(encoded[0], props, url_resolver)
+    children = [decode_node(child, url_resolver) for child in encoded[1]]
+    return ParentNode(encoded[0], children, props)
+
+
+def _encoded_renderer(encoded):
+    """Return a BlockCache render_block function for an encoded tree."""
+    def render_block(block, url_resolver):
+        return decode_node(encoded, url_resolver).to_html()
+    return render_block
+
+
+class AstCache:
+    """
+    Directory of encoded block trees, one file per distinct source text.
+
+    Args:
+        cache_dir: Where the entries are stored (created on first write)
+        max_block_trees: How many parsed block trees to remember in
+                         memory for documents that miss
+    """
+
+    def __init__(self, cache_dir, max_block_trees=DEFAULT_MAX_BLOCK_TREES):
+        self.cache_dir = cache_dir
+        self.max_block_trees = max_block_trees
+        self._block_trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Blocks rendered from cached documents, for PageStats (blocks of
+        # documents that miss are counted by the block cache)
+        self.blocks_rendered = 0
+
+    def _path(self, markdown):
+        source_hash = hashlib.sha256(markdown.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{source_hash}-{parser_version()}.ast")
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            # Missing, or a corrupt or truncated entry: parse again
+            return None
+
+    def _store(self, path, blocks):
+        # Per-process temp name: workers may store the same entry at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(blocks, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # The cache is optional: a read-only or full disk only costs
+            # parsing the page again next time
+            print(f"Warning: could not write AST cache entry: {e}", file=sys.stderr)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def prune(self):
+        """
+        Delete entries written by other parser versions.
+
+        Returns:
+            The number of files removed
+        """
+        return prune_cache_dir(self.cache_dir, ".ast", parser_version())
+
+    def _render_block(self, block, url_resolver, block_cache):
+        """Return a block's encoded tree and HTML, parsing it at most once."""
+        key = block_key(block)
+        encoded = self._block_trees.get(key)
+        if encoded is not None:
+            self._block_trees.move_to_end(key)
+            return encoded, block_cache.render(block, url_resolver, _encoded_renderer(encoded))
+        parsed = []
+
+        def parse_block(block, url_resolver):
+            node = block_to_html_node(block)
+            parsed.append(encode_node(node, url_resolver))
+            return node.to_html()
+
+        html = block_cache.render(block, url_resolver, parse_block)
+        if not parsed:
+            # The block cache had the HTML, but the tree was forgotten
+            parsed.append(encode_node(block_to_html_node(block)))
+        self._block_trees[key] = parsed[0]
+        if len(self._block_trees) > self.max_block_trees:
+            self._block_trees.popitem(last=False)
+        return parsed[0], html
+
+    @traced("render_markdown_ast_cache")
+    def render_markdown(self, markdown, url_resolver=None, block_cache=None):
+        """
+        Render a markdown document to a list of HTML chunks.
+
+        Same output as BlockCache.render_markdown: the opening <div>, one
+        chunk per block, and the closing </div>. If the document's trees
+        aren't cached yet, its blocks are rendered through block_cache,
+        parsing only blocks this process hasn't seen.
+
+        Args:
+            markdown: The document as a string
+            url_resolver: Optional URLResolver applied to link and image URLs
+            block_cache: BlockCache for documents that miss (default: none)
+        """
+        path = self._path(markdown)
+        blocks = self._load(path)
+        chunks = ["<div>"]
+        if blocks is None:
+            self.misses += 1
+            if block_cache is None:
+                block_cache = BlockCache(0)
+            blocks = []
+            for block in iter_blocks(markdown.split("\n")):
+                encoded, html = self._render_block(block, url_resolver, block_cache)
+                blocks.append(encoded)
+                chunks.append(html)
+            self._store(path, blocks)
+        else:
+            self.hits += 1
+            self.blocks_rendered += len(blocks)
+            for encoded in blocks:
+                chunks.append(decode_node(encoded, url_resolver).to_html())
+        chunks.append("</div>")
+        return chunks
+
@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _error_message(e):
+    return f"{type(e).__name__}: {e}"
+
+
+async def _run_pipeline(items, read, render, write, io_workers, queue_size):
+    loop = asyncio.get_running_loop()
+    errors = [None] * len(items)
+    pending = asyncio.Queue()
+    for index in range(len(items)):
+        pending.put_nowait(index)
+    # Bounded, so at most queue_size sources and queue_size rendered pages
+    # are held in memory at once
+    render_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+
+    with ThreadPoolExecutor(io_workers) as io_pool, ThreadPoolExecutor(1) as render_pool:
+
+        async def reader():
+            while not pending.empty():
+                index = pending.get_nowait()
+                try:
+                    data = await loop.run_in_executor(io_pool, read, items[index])
+                except Exception as e:
+                    errors[index] = _error_message(e)
+                    continue
+                await render_queue.put((index, data))
+
+        async def renderer():
+            while True:
+                job = await render_queue.get()
+                if job is None:
+                    break
+                index, data = job
+                try:
+                    output = await loop.run_in_executor(
+                        render_pool, render, items[index], data
+                    )
+                except Exception as e:
+                    errors[index] = _error_message(e)
+                    continue
+                await write_queue.put((index, output))
+            for _ in range(io_workers):
+                await write_queue.put(None)
+
+        async def writer():
+            while True:
+                job = await write_queue.get()
+                if job is None:
+                    break
+                index, output = job
+                try:
+                    await loop.run_in_executor(io_pool, write, items[index], output)
+                except Exception as e:
+                    errors[index] = _error_message(e)
+
+        render_task = asyncio.create_task(renderer())
+        writer_tasks = [asyncio.create_task(writer()) for _ in range(io_workers)]
+        await asyncio.gather(*(reader() for _ in range(io_workers)))
+        await render_queue.put(None)
+        await render_task
+        await asyncio.gather(*writer_tasks)
+
+    return errors
+
+
+def run_pipeline(items, read, render, write, io_workers=8, queue_size=16):
+    """
+    Run read -> render -> write for every item on an asyncio pipeline.
+
+    Reads and writes run on a thread pool and overlap with rendering,
+    which runs on its own thread, one item at a time. The stages are
+    connected by bounded queues, so slow storage applies back-pressure
+    instead of letting rendered pages pile up in memory. This pays off
+    when per-file I/O latency (e.g. network-mounted storage) dominates.
+
+    Args:
+        items: The work items (e.g. page tasks)
+        read: read(item) -> data, called on an I/O thread
+        render: render(item, data) -> output, called on the render thread
+        write: write(item, output), called on an I/O thread
+        io_workers: Number of concurrent reads and of concurrent writes
+        queue_size: Capacity of each queue between stages
+
+    Returns:
+        A list with one entry per item: None on success, otherwise the
+        error message of the stage that failed
+    """
+    return asyncio.run(
+        _run_pipeline(items, read, render, write, io_workers, queue_size)
+    )
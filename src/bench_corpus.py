@@ -0,0 +1,153 @@
+"""
+Seeded generator for synthetic markdown sites, used by the benchmarks.
+
+Pages are modeled on content/blog/*: an h1 title, a link back home, an
+image, a quote, then a mix of headings, paragraphs, lists and code
+blocks with bold, italic, code, links and images sprinkled in. The same
+seed and options always produce the same site.
+
+Usage: python3 src/bench_corpus.py DEST_DIR [--pages N] [--blocks N] [--seed N]
+"""
+import os
+import random
+import argparse
+
+
+WORDS = (
+    "middle earth ring hobbit shire elves dwarves wizard gandalf frodo "
+    "mordor rivendell glorfindel legolas bombadil journey fellowship tale "
+    "ancient lore song shadow quest mountain forest river tower council "
+    "power darkness light hope courage friendship narrative legendarium"
+).split()
+
+# Relative weight of each block type in the body of a page
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 10,
+    "heading": 3,
+    "unordered_list": 2,
+    "ordered_list": 2,
+    "quote": 1,
+    "code": 1,
+}
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _inline(rng, inline_density, words=12):
+    """Return a sentence with inline markdown at roughly inline_density."""
+    parts = []
+    for _ in range(max(1, words // 3)):
+        chunk = _words(rng, 3)
+        if rng.random() < inline_density:
+            kind = rng.randrange(5)
+            if kind == 0:
+                chunk = f"**{chunk}**"
+            elif kind == 1:
+                chunk = f"_{chunk}_"
+            elif kind == 2:
+                chunk = f"`{chunk}`"
+            elif kind == 3:
+                chunk = f"[{chunk}](/blog/{rng.choice(WORDS)})"
+            else:
+                chunk = f"![{chunk}](/images/{rng.choice(WORDS)}.png)"
+        parts.append(chunk)
+    return " ".join(parts)
+
+
+def _block(rng, block_type, inline_density):
+    if block_type == "heading":
+        return "#" * rng.randint(2, 3) + " " + _inline(rng, inline_density, 5)
+    if block_type == "unordered_list":
+        return "\n".join(
+            "- " + _inline(rng, inline_density) for _ in range(rng.randint(2, 6))
+        )
+    if block_type == "ordered_list":
+        return "\n".join(
+            f"{i}. " + _inline(rng, inline_density)
+            for i in range(1, rng.randint(2, 9) + 1)
+        )
+    if block_type == "quote":
+        return "\n".join(
+            "> " + _inline(rng, inline_density) for _ in range(rng.randint(1, 3))
+        )
+    if block_type == "code":
+        lines = [f'print("{_words(rng, 2)}")' for _ in range(rng.randint(2, 8))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    sentences = [_inline(rng, inline_density, 15) for _ in range(rng.randint(2, 6))]
+    return ". ".join(sentences) + "."
+
+
+def generate_page_markdown(rng, blocks=40, inline_density=0.3, block_mix=None):
+    """
+    Generate the markdown for one page.
+
+    Args:
+        rng: A random.Random instance
+        blocks: Number of body blocks after the page header
+        inline_density: Probability (0-1) that a phrase gets inline markup
+        block_mix: Dict of block type -> relative weight (default: DEFAULT_BLOCK_MIX)
+
+    Returns:
+        The page markdown as a string
+    """
+    block_mix = block_mix or DEFAULT_BLOCK_MIX
+    block_types = list(block_mix)
+    weights = [block_mix[block_type] for block_type in block_types]
+    parts = [
+        "# " + _words(rng, 5).title(),
+        "[< Back Home](/)",
+        f"![{_words(rng, 2)}](/images/{rng.choice(WORDS)}.png)",
+        "> " + _inline(rng, inline_density),
+    ]
+    for block_type in rng.choices(block_types, weights, k=blocks):
+        parts.append(_block(rng, block_type, inline_density))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(dest_dir, pages=50, blocks=40, seed=0, inline_density=0.3, block_mix=None):
+    """
+    Write a synthetic content tree: an index page plus blog posts.
+
+    Args:
+        dest_dir: Directory to create the content tree in
+        pages: Total number of pages (the first is content/index.md)
+        blocks: Number of body blocks per page
+        seed: Random seed; the same seed always gives the same site
+        inline_density: Probability (0-1) that a phrase gets inline markup
+        block_mix: Dict of block type -> relative weight
+
+    Returns:
+        A list of the markdown file paths written, in generation order
+    """
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        if i == 0:
+            path = os.path.join(dest_dir, "index.md")
+        else:
+            path = os.path.join(dest_dir, "blog", f"post-{i}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(generate_page_markdown(rng, blocks, inline_density, block_mix))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown site.")
+    parser.add_argument("dest_dir", help="directory to write the content tree into")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--inline-density", type=float, default=0.3)
+    args = parser.parse_args()
+    paths = generate_corpus(
+        args.dest_dir, args.pages, args.blocks, args.seed, args.inline_density
+    )
+    print(f"Wrote {len(paths)} pages to {args.dest_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Overhead benchmark for HTML escaping on the render path.
+
+Renders a synthetic corpus (see bench_corpus.py) three ways: with the
+renderer's escaping, with the renderer as it was before escaping was
+added, and with every value and attribute passed through html.escape.
+Each page also gets a code block full of "<", ">" and "&", so the slow
+path is exercised too. Both the to_html stage alone and the whole
+markdown-to-HTML conversion are reported.
+
+Usage: python3 src/bench_escape.py [pages]
+"""
+import gc
+import sys
+import html
+import time
+import random
+from unittest import mock
+
+from bench_corpus import generate_page_markdown
+from block_markdown import markdown_to_html_node
+from htmlnode import HTMLNode, LeafNode
+
+
+CODE_BLOCK = "```\nif (a < b && b > c) {\n    return a & mask;\n}\n```"
+
+
+def unescaped_leaf_to_html(self):
+    """LeafNode.to_html before escaping, kept here for comparison."""
+    if self.value is None:
+        raise ValueError("invalid HTML: no value")
+    if self.tag is None:
+        return self.value
+    if self.tag == "img":
+        return self.start_tag()
+    return f"{self.start_tag()}{self.value}{self.end_tag()}"
+
+
+def unescaped_props_to_html(self):
+    """HTMLNode.props_to_html before escaping, kept here for comparison."""
+    if self.props is None:
+        return ""
+    return "".join(f' {prop}="{value}"' for prop, value in self.props.items())
+
+
+def naive_leaf_to_html(self):
+    """LeafNode.to_html calling html.escape on every value."""
+    if self.value is None:
+        raise ValueError("invalid HTML: no value")
+    if self.tag is None:
+        return html.escape(self.value, False)
+    if self.tag == "img":
+        return self.start_tag()
+    return f"{self.start_tag()}{html.escape(self.value, False)}{self.end_tag()}"
+
+
+def naive_props_to_html(self):
+    """HTMLNode.props_to_html calling html.escape on every value."""
+    if self.props is None:
+        return ""
+    return "".join(f' {prop}="{html.escape(value)}"' for prop, value in self.props.items())
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeat = 25
+    rng = random.Random(0)
+    documents = [
+        generate_page_markdown(rng, blocks=40) + "\n\n" + CODE_BLOCK
+        for _ in range(pages)
+    ]
+
+    modes = {
+        "unescaped": (unescaped_leaf_to_html, unescaped_props_to_html),
+        "escaped": (LeafNode.to_html, HTMLNode.props_to_html),
+        "naive": (naive_leaf_to_html, naive_props_to_html),
+    }
+    render = dict.fromkeys(modes)
+    build = dict.fromkeys(modes)
+    # Interleave the modes so drift in machine load hits them all alike
+    for _ in range(repeat):
+        for mode, (leaf_to_html, props_to_html) in modes.items():
+            with mock.patch.object(LeafNode, "to_html", leaf_to_html), \
+                    mock.patch.object(HTMLNode, "props_to_html", props_to_html):
+                gc.collect()
+                gc.disable()
+                start = time.perf_counter()
+                trees = [markdown_to_html_node(doc) for doc in documents]
+                parsed = time.perf_counter()
+                for tree in trees:
+                    tree.to_html()
+                end = time.perf_counter()
+                gc.enable()
+            render[mode] = min(render[mode] or end, end - parsed)
+            build[mode] = min(build[mode] or end, end - start)
+
+    print(f"pages: {pages}")
+    print(f"{'':<20} {'to_html':>9} {'parse + to_html':>22}")
+    for label, mode in (
+        ("no escaping", "unescaped"),
+        ("escaping", "escaped"),
+        ("html.escape always", "naive"),
+    ):
+        render_overhead = (render[mode] - render["unescaped"]) / render["unescaped"]
+        build_overhead = (build[mode] - build["unescaped"]) / build["unescaped"]
+        print(
+            f"{label:<20} {render[mode] * 1000:6.1f} ms {render_overhead:+6.1%}"
+            f" {build[mode] * 1000:9.1f} ms {build_overhead:+6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
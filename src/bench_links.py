@@ -0,0 +1,102 @@
+"""
+Scaling benchmark for split_nodes_link and split_nodes_image.
+
+Times both splitters on single paragraphs holding more and more links
+and images, next to the original findall + str.split implementation,
+which re-scanned the rest of the text for every match. Time per link
+should stay flat as the paragraph grows; for the original it grows
+with the paragraph.
+
+Usage: python3 src/bench_links.py [max_links]
+"""
+import sys
+import time
+
+from inline_markdown import (
+    extract_markdown_images,
+    extract_markdown_links,
+    split_nodes_image,
+    split_nodes_link,
+)
+from textnode import TextNode, TextType
+
+
+def split_nodes_link_resplit(old_nodes):
+    """split_nodes_link before the single finditer pass, kept here for comparison."""
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        for anchor, url in extract_markdown_links(original_text):
+            sections = original_text.split(f"[{anchor}]({url})", 1)
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            new_nodes.append(TextNode(anchor, TextType.LINK, url))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.TEXT))
+    return new_nodes
+
+
+def split_nodes_image_resplit(old_nodes):
+    """split_nodes_image before the single finditer pass, kept here for comparison."""
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        for alt, url in extract_markdown_images(original_text):
+            sections = original_text.split(f"![{alt}]({url})", 1)
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.TEXT))
+    return new_nodes
+
+
+def link_paragraph(count):
+    """Return a TEXT node of count links and count images, like a link list."""
+    text = " ".join(
+        f"See [page {i}](/blog/post-{i}/) and ![figure {i}](/images/{i}.png)."
+        for i in range(count)
+    )
+    return TextNode(text, TextType.TEXT)
+
+
+def best_time(func, nodes, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(nodes)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    max_links = int(sys.argv[1]) if len(sys.argv) > 1 else 16000
+    splitters = (
+        ("split_nodes_link", split_nodes_link, split_nodes_link_resplit),
+        ("split_nodes_image", split_nodes_image, split_nodes_image_resplit),
+    )
+    print(f"{'':<18} {'links':>6} {'finditer':>10} {'resplit':>10}   (us per link)")
+    count = 1000
+    while count <= max_links:
+        nodes = [link_paragraph(count)]
+        for name, split, resplit in splitters:
+            if split(nodes) != resplit(nodes):
+                raise AssertionError(f"{name} differs from the original")
+            fast = best_time(split, nodes) / count * 1e6
+            slow = best_time(resplit, nodes) / count * 1e6
+            print(f"{name:<18} {count:>6} {fast:>10.2f} {slow:>10.2f}")
+        count *= 2
+
+
+if __name__ == "__main__":
+    main()
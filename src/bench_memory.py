@@ -0,0 +1,71 @@
+"""
+Memory benchmark for the node classes.
+
+Builds the same inline node stream with the slotted TextNode/LeafNode
+classes and with plain __dict__-based equivalents, and reports the
+traced allocation size of each using tracemalloc.
+
+Usage: python3 src/bench_memory.py [node_count]
+"""
+import sys
+import tracemalloc
+
+from htmlnode import LeafNode
+from textnode import TextNode, TextType
+
+
+class DictTextNode:
+    """TextNode layout before __slots__, kept here for comparison."""
+
+    def __init__(self, text, text_type, url=None, children=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+        self.children = children
+
+
+class DictLeafNode:
+    """LeafNode layout before __slots__, kept here for comparison."""
+
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+def build_nodes(text_node_class, leaf_node_class, count):
+    """Build count text/leaf node pairs mimicking a typical paragraph."""
+    tags = (None, "b", "i", "code")
+    nodes = []
+    for i in range(count):
+        text = f"word {i}"
+        nodes.append(text_node_class(text, TextType.TEXT))
+        nodes.append(leaf_node_class(tags[i % len(tags)], text))
+    return nodes
+
+
+def measure(text_node_class, leaf_node_class, count):
+    """Return the bytes traced while building count node pairs."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = build_nodes(text_node_class, leaf_node_class, count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    return after - before
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    dict_bytes = measure(DictTextNode, DictLeafNode, count)
+    slot_bytes = measure(TextNode, LeafNode, count)
+    reduction = 100 * (dict_bytes - slot_bytes) / dict_bytes
+    print(f"node pairs:      {count}")
+    print(f"__dict__ nodes:  {dict_bytes / 1024:.1f} KiB ({dict_bytes / count:.1f} B/pair)")
+    print(f"__slots__ nodes: {slot_bytes / 1024:.1f} KiB ({slot_bytes / count:.1f} B/pair)")
+    print(f"reduction:       {reduction:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Stage-by-stage benchmark of the site generator on a synthetic corpus.
+
+Generates a seeded corpus (see bench_corpus.py), then times each stage
+separately: reading the files, markdown_to_blocks, block_to_block_type,
+text_to_children, to_html and writing the output. Each stage is run
+several times and the fastest run is kept. Results are written as JSON
+and can be compared against a stored baseline.
+
+Usage:
+    python3 src/benchmark.py --output bench.json
+    python3 src/benchmark.py --baseline bench.json --threshold 0.1
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+from bench_corpus import generate_corpus
+from block_markdown import (
+    BlockType,
+    markdown_to_blocks,
+    block_to_block_type,
+    classify_block,
+    markdown_to_html_node,
+    text_to_children,
+)
+
+
+STAGES = (
+    "read",
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_children",
+    "to_html",
+    "write",
+)
+
+
+def _best_time(func, repeat, setup=None):
+    """
+    Return the fastest of repeat calls to func, in seconds.
+
+    If setup is given, it is called untimed before each run and its
+    result is passed to func.
+    """
+    best = None
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _inline_texts(blocks):
+    """Return the inline text of every non-code block, as the converters see it."""
+    texts = []
+    for block in blocks:
+        classified = classify_block(block)
+        if classified.block_type == BlockType.CODE:
+            continue
+        if classified.block_type in (BlockType.PARAGRAPH, BlockType.QUOTE):
+            texts.append(" ".join(classified.lines))
+        else:
+            texts.extend(classified.lines)
+    return texts
+
+
+def run_benchmark(pages=50, blocks=40, seed=0, inline_density=0.3, repeat=5):
+    """
+    Generate a corpus and time each stage of the build on it.
+
+    Returns:
+        A dict with the benchmark configuration under "config" and the
+        best time in seconds of each stage under "stages"
+    """
+    work_dir = tempfile.mkdtemp(prefix="boot_static_bench_")
+    try:
+        content_dir = os.path.join(work_dir, "content")
+        out_dir = os.path.join(work_dir, "docs")
+        paths = generate_corpus(content_dir, pages, blocks, seed, inline_density)
+
+        documents = []
+
+        def read():
+            documents.clear()
+            for path in paths:
+                with open(path, 'r') as f:
+                    documents.append(f.read())
+
+        read_time = _best_time(read, repeat)
+        all_blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+        inline_texts = _inline_texts(all_blocks)
+        html_pages = [markdown_to_html_node(doc).to_html() for doc in documents]
+        out_paths = [
+            os.path.join(out_dir, os.path.relpath(path, content_dir)[:-3] + ".html")
+            for path in paths
+        ]
+        for path in out_paths:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def write():
+            for path, html in zip(out_paths, html_pages):
+                with open(path, 'w') as f:
+                    f.write(html)
+
+        stages = {
+            "read": read_time,
+            "markdown_to_blocks": _best_time(
+                lambda: [markdown_to_blocks(doc) for doc in documents], repeat
+            ),
+            "block_to_block_type": _best_time(
+                lambda: [block_to_block_type(block) for block in all_blocks], repeat
+            ),
+            "text_to_children": _best_time(
+                lambda: [text_to_children(text) for text in inline_texts], repeat
+            ),
+            # Fresh trees every run: rendered nodes cache their HTML
+            "to_html": _best_time(
+                lambda html_nodes: [node.to_html() for node in html_nodes],
+                repeat,
+                setup=lambda: [markdown_to_html_node(doc) for doc in documents],
+            ),
+            "write": _best_time(write, repeat),
+        }
+        config = {
+            "pages": pages,
+            "blocks": blocks,
+            "seed": seed,
+            "inline_density": inline_density,
+            "repeat": repeat,
+            "bytes_in": sum(len(doc.encode()) for doc in documents),
+            "bytes_out": sum(len(html.encode()) for html in html_pages),
+            "python": platform.python_version(),
+        }
+        return {"config": config, "stages": stages}
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Compare stage timings against a baseline run.
+
+    Args:
+        results: Output of run_benchmark
+        baseline: A previous output of run_benchmark
+        threshold: Allowed slowdown as a fraction (0.1 = 10% slower)
+
+    Returns:
+        A list of (stage, baseline_seconds, current_seconds) for every
+        stage that regressed beyond the threshold
+    """
+    regressions = []
+    for stage in STAGES:
+        before = baseline["stages"].get(stage)
+        after = results["stages"].get(stage)
+        if before and after and after > before * (1 + threshold):
+            regressions.append((stage, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site generator.")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--inline-density", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results stored in this JSON file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="allowed slowdown per stage vs the baseline (default: 0.1 = 10%%)",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.pages, args.blocks, args.seed, args.inline_density, args.repeat
+    )
+    for stage in STAGES:
+        print(f"{stage:<20} {results['stages'][stage] * 1000:9.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("seed") != args.seed:
+            print("Warning: baseline was generated with a different seed")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for stage, before, after in regressions:
+            print(
+                f"REGRESSION {stage}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
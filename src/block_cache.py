@@ -0,0 +1,185 @@
+import sys
+import hashlib
+from collections import OrderedDict
+from block_markdown import block_to_html_node, iter_blocks, iter_buffer_blocks
+from instrument import traced, register_traced
+
+register_traced(globals(), "block_to_html_node")
+
+
+# Default memory budget for cached HTML fragments
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Rough per-entry cost on top of the HTML string: the digest key plus
+# the OrderedDict's link and hash table slot
+_ENTRY_OVERHEAD = 160
+
+
+def block_key(block):
+    """Return the cache key of a block: a 128-bit hash of its text."""
+    return hashlib.blake2b(block.encode(), digest_size=16).digest()
+
+
+def _entry_size(html, references):
+    return (
+        sys.getsizeof(html) + _ENTRY_OVERHEAD
+        + sum(sys.getsizeof(url) for url in references)
+    )
+
+
+def _parse_block(block, url_resolver):
+    return block_to_html_node(block, url_resolver).to_html()
+
+
+def _render_block(block, url_resolver, render_block=_parse_block):
+    """
+    Render a block, also returning the URLs it references.
+
+    The URLs are collected whether or not url_resolver is recording, so
+    a cached block can replay them for resolvers that are.
+    """
+    if url_resolver is None:
+        return render_block(block, None), ()
+    outer = url_resolver.references
+    url_resolver.references = references = []
+    try:
+        html = render_block(block, url_resolver)
+    finally:
+        url_resolver.references = outer
+    if outer is not None:
+        outer.extend(references)
+    return html, tuple(references)
+
+
+class BlockCache:
+    """
+    Bounded LRU cache of rendered block HTML, keyed by block content hash.
+
+    Sites repeat identical blocks across pages (disclaimers, nav lists,
+    footers, quotes), and a block's HTML depends only on its text and,
+    if it contains links or images, on how URLs are resolved, so each
+    distinct block only needs to be parsed and rendered once per build.
+    Keys are digests rather than the block text itself, so the memory
+    budget is spent almost entirely on the HTML.
+
+    Args:
+        max_bytes: Approximate memory budget for cached entries; the
+                   least recently used entries are evicted beyond it.
+                   0 disables caching.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, block, url_resolver=None, render_block=_parse_block):
+        """
+        Return the HTML for a single markdown block.
+
+        Equivalent to block_to_html_node(block, url_resolver).to_html().
+
+        Args:
+            block: The block's markdown
+            url_resolver: Optional URLResolver applied to link and image URLs
+            render_block: Called as render_block(block, url_resolver) to
+                          render a miss, e.g. from an already parsed tree
+        """
+        if self.max_bytes <= 0:
+            self.misses += 1
+            return render_block(block, url_resolver)
+        key = block_key(block)
+        if url_resolver is not None and "](" in block:
+            # Links and images render differently per resolver
+            key = (key, url_resolver.cache_key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            html, references = entry
+            if references and url_resolver.references is not None:
+                # Report the block's URLs as if it had been rendered
+                url_resolver.references.extend(references)
+            return html
+        self.misses += 1
+        html, references = _render_block(block, url_resolver, render_block)
+        self._store(key, html, references)
+        return html
+
+    def _store(self, key, html, references):
+        size = _entry_size(html, references)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (html, references)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= _entry_size(*evicted)
+            self.evictions += 1
+
+    @traced("render_markdown")
+    def render_markdown(self, markdown, url_resolver=None):
+        """
+        Render a markdown document to a list of HTML chunks.
+
+        "".join() of the result is identical to
+        markdown_to_html_node(markdown, url_resolver).to_html().
+
+        Args:
+            markdown: A string, or an iterable of lines
+            url_resolver: Optional URLResolver applied to link and image URLs
+
+        Returns:
+            A list of HTML strings: the opening <div>, one per block,
+            and the closing </div>
+        """
+        if isinstance(markdown, str):
+            markdown = markdown.split("\n")
+        chunks = ["<div>"]
+        for block in iter_blocks(markdown):
+            chunks.append(self.render(block, url_resolver))
+        chunks.append("</div>")
+        return chunks
+
+    def iter_render_buffer(self, buffer, url_resolver=None):
+        """
+        Lazily render a UTF-8 markdown buffer (e.g. an mmap) to HTML chunks.
+
+        Like render_markdown, but blocks are decoded and rendered one at a
+        time as the chunks are consumed, so the source is never held in
+        memory as a whole.
+        """
+        yield "<div>"
+        for block in iter_buffer_blocks(buffer):
+            yield self.render(block, url_resolver)
+        yield "</div>"
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        self._entries.clear()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        Return the cache statistics.
+
+        Returns:
+            A dict with "hits", "misses", "evictions", "entries",
+            "bytes", "max_bytes" and "hit_rate" (0-1)
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
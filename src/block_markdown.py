@@ -1,11 +1,11 @@
+import re
 from enum import Enum
+from collections import namedtuple
 from htmlnode import ParentNode, LeafNode
-from textnode import TextNode, TextType, text_node_to_html_node
-from inline_markdown import (
-    split_nodes_delimiter,
-    split_nodes_image,
-    split_nodes_link,
-)
+from textnode import text_node_to_html_node
+from inline_markdown import text_to_textnodes
+from highlight import highlight_to_html_node
+from instrument import traced, register_patterns
 
 
 class BlockType(Enum):
@@ -17,11 +17,20 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+def _node_count(node):
+    """Return the number of nodes in an HTMLNode tree (for instrumentation)."""
+    if not node.children:
+        return 1
+    return 1 + sum(_node_count(child) for child in node.children)
+
+
+@traced("markdown_to_blocks")
 def markdown_to_blocks(markdown):
     """
     Split a markdown document into blocks.
     
-    Blocks are separated by blank lines (double newlines).
+    Blocks are separated by blank lines (double newlines), except inside
+    fenced code blocks, which keep their blank lines.
     Leading/trailing whitespace is stripped from each block.
     Empty blocks are removed.
     
@@ -35,14 +44,211 @@ def markdown_to_blocks(markdown):
         markdown = "# Heading\\n\\nParagraph text\\n\\n- List item"
         returns ["# Heading", "Paragraph text", "- List item"]
     """
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+    return list(iter_blocks(markdown.split("\n")))
+
+
+def iter_blocks(lines):
+    """
+    Lazily yield markdown blocks from an iterable of lines.
+    
+    Only the lines of the current block are held in memory, so any file
+    object can be streamed through without reading it whole.
+    
+    Args:
+        lines: An iterable of lines, with or without trailing newlines
+               (e.g. an open file object)
+        
+    Yields:
+        Block strings, stripped, in document order
+    """
+    block_lines = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\n")
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            if in_fence:
+                in_fence = False
+            elif len(stripped) == 3 or not stripped.endswith("```"):
+                in_fence = True
+        elif stripped == "" and not in_fence:
+            if block_lines:
+                block = "\n".join(block_lines).strip()
+                block_lines = []
+                if block:
+                    yield block
+            continue
+        block_lines.append(line)
+    if block_lines:
+        block = "\n".join(block_lines).strip()
+        if block:
+            yield block
+
+
+def _strip_line(line):
+    """bytes.strip(), also treating non-ASCII whitespace-only lines as blank."""
+    stripped = line.strip()
+    if stripped and (not stripped.isascii() or stripped[0] < 0x20 or stripped[-1] < 0x20):
+        # Rare: let str.strip() decide, as iter_blocks would
+        if not line.decode("utf-8", "replace").strip():
+            return b""
+    return stripped
+
+
+def iter_block_spans(buffer):
+    """
+    Lazily yield the (start, end) byte offsets of each block in a buffer.
+    
+    Finds the same blocks as iter_blocks, but works on UTF-8 bytes (e.g. an
+    mmap of the source file) and copies nothing but one line at a time, so
+    the document is never decoded or held in memory as a whole. Decode a
+    block with bytes(buffer[start:end]).decode().strip().
+    
+    Args:
+        buffer: A bytes-like object supporting find() and slicing
+        
+    Yields:
+        (start, end) tuples in document order
+    """
+    length = len(buffer)
+    start = None
+    end = 0
+    in_fence = False
+    pos = 0
+    while pos <= length:
+        newline = buffer.find(b"\n", pos)
+        if newline == -1:
+            newline = length
+        line = buffer[pos:newline]
+        stripped = _strip_line(line)
+        if stripped.startswith(b"```"):
+            if in_fence:
+                in_fence = False
+            elif len(stripped) == 3 or not stripped.endswith(b"```"):
+                in_fence = True
+        elif not stripped and not in_fence:
+            if start is not None:
+                yield start, end
+                start = None
+            pos = newline + 1
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        if start is None:
+            # Skip leading whitespace so spans are tight
+            start = pos + len(line) - len(line.lstrip())
+        end = pos + len(line.rstrip())
+        pos = newline + 1
+    if start is not None:
+        yield start, end
+
+
+def iter_buffer_blocks(buffer):
+    """
+    Yield the decoded blocks of a UTF-8 buffer, one at a time.
+    
+    Windows line endings are normalized per block, matching what reading
+    the file in text mode would give.
+    """
+    for start, end in iter_block_spans(buffer):
+        block = bytes(buffer[start:end]).decode().replace("\r\n", "\n").strip()
+        if block:
+            yield block
+
+
+class ClassifiedBlock(
+    namedtuple("ClassifiedBlock", ["block_type", "lines", "info"], defaults=[None])
+):
+    """
+    A block's type plus the pieces the converters need.
+    
+    lines: The content lines with block markers removed ("> ", "- ",
+           "1. ", heading hashes). Code blocks hold a single entry with
+           the code between the fences.
+    info: The heading level for headings, the language specifier for
+          code blocks, None otherwise.
+    """
+    __slots__ = ()
+
+
+_ORDERED_ITEM = re.compile(r"([1-9]\d*)\. ")
+register_patterns(globals(), "_ORDERED_ITEM")
+
+
+def _classify_heading(block):
+    level = len(block) - len(block.lstrip("#"))
+    if 1 <= level <= 6 and block[level:level + 1] == " ":
+        return ClassifiedBlock(BlockType.HEADING, [block[level + 1:]], level)
+    return None
+
+
+def _classify_code(block):
+    if "\n" in block and block.startswith("```") and block.endswith("```"):
+        language, _, code = block[3:-3].partition("\n")
+        return ClassifiedBlock(BlockType.CODE, [code], language.strip())
+    return None
+
+
+def _classify_quote(block):
+    quote_lines = []
+    for line in block.split("\n"):
+        if not line.startswith(">"):
+            return None
+        quote_lines.append(line[1:].strip())
+    return ClassifiedBlock(BlockType.QUOTE, quote_lines)
+
+
+def _classify_unordered_list(block):
+    items = []
+    for line in block.split("\n"):
+        if not line.startswith("- "):
+            return None
+        items.append(line[2:])
+    return ClassifiedBlock(BlockType.UNORDERED_LIST, items)
+
+
+def _classify_ordered_list(block):
+    items = []
+    for i, line in enumerate(block.split("\n"), 1):
+        match = _ORDERED_ITEM.match(line)
+        if match is None or int(match.group(1)) != i:
+            return None
+        items.append(line[match.end():])
+    return ClassifiedBlock(BlockType.ORDERED_LIST, items)
+
+
+# Every non-paragraph block type is identified by its first character
+_BLOCK_CLASSIFIERS = {
+    "#": _classify_heading,
+    "`": _classify_code,
+    ">": _classify_quote,
+    "-": _classify_unordered_list,
+    "1": _classify_ordered_list,
+}
+
+
+def classify_block(block):
+    """
+    Determine the type of a markdown block and split out its content.
+    
+    The block is scanned once: the first character picks the only
+    candidate type, and that type's check collects the content lines
+    as it validates them.
+    
+    Args:
+        block: A string containing a single markdown block (already stripped)
+        
+    Returns:
+        A ClassifiedBlock
+        
+    Example:
+        classify_block("- one\\n- two")
+        returns ClassifiedBlock(BlockType.UNORDERED_LIST, ["one", "two"], None)
+    """
+    classifier = _BLOCK_CLASSIFIERS.get(block[:1])
+    if classifier is not None:
+        classified = classifier(block)
+        if classified is not None:
+            return classified
+    return ClassifiedBlock(BlockType.PARAGRAPH, block.split("\n"))
 
 
 def block_to_block_type(block):
@@ -63,61 +269,14 @@ def block_to_block_type(block):
     - Ordered list: Every line starts with number + ". " starting at 1
     - Paragraph: Everything else
     """
-    lines = block.split("\n")
-    
-    # Check for heading (1-6 # characters followed by a space)
-    if block.startswith("#"):
-        # Count the number of # characters at the start
-        hash_count = 0
-        for char in block:
-            if char == "#":
-                hash_count += 1
-            else:
-                break
-        # Valid heading: 1-6 hashes followed by a space
-        if 1 <= hash_count <= 6 and len(block) > hash_count and block[hash_count] == " ":
-            return BlockType.HEADING
-    
-    # Check for code block (starts and ends with ```)
-    if len(lines) > 1 and block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
-    
-    # Check for quote block (every line starts with >)
-    if block.startswith(">"):
-        is_quote = True
-        for line in lines:
-            if not line.startswith(">"):
-                is_quote = False
-                break
-        if is_quote:
-            return BlockType.QUOTE
-    
-    # Check for unordered list (every line starts with "- ")
-    if block.startswith("- "):
-        is_unordered_list = True
-        for line in lines:
-            if not line.startswith("- "):
-                is_unordered_list = False
-                break
-        if is_unordered_list:
-            return BlockType.UNORDERED_LIST
-    
-    # Check for ordered list (lines start with 1. 2. 3. etc.)
-    if block.startswith("1. "):
-        is_ordered_list = True
-        for i, line in enumerate(lines):
-            expected_prefix = f"{i + 1}. "
-            if not line.startswith(expected_prefix):
-                is_ordered_list = False
-                break
-        if is_ordered_list:
-            return BlockType.ORDERED_LIST
-    
-    # Default to paragraph
-    return BlockType.PARAGRAPH
+    return classify_block(block).block_type
 
 
-def text_to_children(text):
+@traced(
+    "text_to_children",
+    result_counts=lambda nodes: {"text_nodes": sum(map(_node_count, nodes))},
+)
+def text_to_children(text, url_resolver=None):
     """
     Convert inline markdown text to a list of HTMLNode children.
     
@@ -126,175 +285,213 @@ def text_to_children(text):
     
     Args:
         text: A string containing inline markdown
+        url_resolver: Optional URLResolver applied to link and image URLs
         
     Returns:
         A list of HTMLNode objects (LeafNodes)
     """
-    # Start with a single text node
-    text_nodes = [TextNode(text, TextType.TEXT)]
-    
-    # Process each type of inline markdown in order
-    text_nodes = split_nodes_delimiter(text_nodes, "**", TextType.BOLD)
-    text_nodes = split_nodes_delimiter(text_nodes, "*", TextType.ITALIC)
-    text_nodes = split_nodes_delimiter(text_nodes, "_", TextType.ITALIC)
-    text_nodes = split_nodes_delimiter(text_nodes, "`", TextType.CODE)
-    text_nodes = split_nodes_image(text_nodes)
-    text_nodes = split_nodes_link(text_nodes)
+    # Tokenize all inline markdown in a single left-to-right pass
+    text_nodes = text_to_textnodes(text)
     
     # Convert TextNodes to HTMLNodes
     html_nodes = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, url_resolver)
         html_nodes.append(html_node)
     
     return html_nodes
 
 
-def paragraph_to_html_node(block):
+def _classified(block, classified, block_type, error):
+    if classified is None:
+        classified = classify_block(block)
+    if classified.block_type != block_type:
+        raise ValueError(error)
+    return classified
+
+
+def paragraph_to_html_node(block, classified=None, url_resolver=None):
     """Convert a paragraph block to an HTMLNode."""
-    lines = block.split("\n")
-    paragraph_text = " ".join(lines)
-    children = text_to_children(paragraph_text)
+    if classified is None:
+        classified = classify_block(block)
+    paragraph_text = " ".join(classified.lines)
+    children = text_to_children(paragraph_text, url_resolver)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, classified=None, url_resolver=None):
     """Convert a heading block to an HTMLNode."""
-    # Count the number of # characters
-    level = 0
-    for char in block:
-        if char == "#":
-            level += 1
-        else:
-            break
-    
-    if level < 1 or level > 6:
-        raise ValueError(f"Invalid heading level: {level}")
-    
-    # Extract the text after the hashes and space
-    text = block[level + 1:]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    classified = _classified(block, classified, BlockType.HEADING, "Invalid heading")
+    children = text_to_children(classified.lines[0], url_resolver)
+    return ParentNode(f"h{classified.info}", children)
 
 
-def code_to_html_node(block):
-    """Convert a code block to an HTMLNode."""
-    # Remove the opening and closing ```
-    if not block.startswith("```") or not block.endswith("```"):
-        raise ValueError("Invalid code block")
-    
-    # Extract the code content (remove ``` from start and end)
-    code_content = block[3:-3]
-    
-    # Remove leading newline if present
-    if code_content.startswith("\n"):
-        code_content = code_content[1:]
-    
-    # If there's a language specifier on the first line, remove it
-    lines = code_content.split("\n", 1)
-    if lines[0] and " " not in lines[0] and len(lines[0]) < 20:
-        # First line looks like a language specifier
-        code_content = lines[1] if len(lines) > 1 else ""
+def code_to_html_node(block, classified=None, url_resolver=None):
+    """
+    Convert a code block to an HTMLNode.
     
+    Code in a language the highlighter knows (see highlight.LANGUAGES)
+    is split into class-annotated spans; anything else is left as is.
+    """
+    classified = _classified(block, classified, BlockType.CODE, "Invalid code block")
     # Don't process inline markdown in code blocks
-    code_node = LeafNode("code", code_content)
+    code_node = highlight_to_html_node(classified.lines[0], classified.info)
+    if code_node is None:
+        code_node = LeafNode("code", classified.lines[0])
     return ParentNode("pre", [code_node])
 
 
-def quote_to_html_node(block):
+def quote_to_html_node(block, classified=None, url_resolver=None):
     """Convert a quote block to an HTMLNode."""
-    lines = block.split("\n")
-    # Remove the > from each line
-    quote_lines = []
-    for line in lines:
-        if not line.startswith(">"):
-            raise ValueError("Invalid quote block")
-        quote_lines.append(line[1:].strip())
-    
-    quote_text = " ".join(quote_lines)
-    children = text_to_children(quote_text)
+    classified = _classified(block, classified, BlockType.QUOTE, "Invalid quote block")
+    quote_text = " ".join(classified.lines)
+    children = text_to_children(quote_text, url_resolver)
     return ParentNode("blockquote", children)
 
 
-def unordered_list_to_html_node(block):
+def unordered_list_to_html_node(block, classified=None, url_resolver=None):
     """Convert an unordered list block to an HTMLNode."""
-    lines = block.split("\n")
-    list_items = []
-    
-    for line in lines:
-        if not line.startswith("- "):
-            raise ValueError("Invalid unordered list")
-        # Remove the "- " prefix
-        text = line[2:]
-        children = text_to_children(text)
-        list_items.append(ParentNode("li", children))
-    
+    classified = _classified(
+        block, classified, BlockType.UNORDERED_LIST, "Invalid unordered list"
+    )
+    list_items = [
+        ParentNode("li", text_to_children(item, url_resolver))
+        for item in classified.lines
+    ]
     return ParentNode("ul", list_items)
 
 
-def ordered_list_to_html_node(block):
+def ordered_list_to_html_node(block, classified=None, url_resolver=None):
     """Convert an ordered list block to an HTMLNode."""
-    lines = block.split("\n")
-    list_items = []
-    
-    for i, line in enumerate(lines):
-        expected_prefix = f"{i + 1}. "
-        if not line.startswith(expected_prefix):
-            raise ValueError("Invalid ordered list")
-        # Remove the number prefix
-        text = line[len(expected_prefix):]
-        children = text_to_children(text)
-        list_items.append(ParentNode("li", children))
-    
+    classified = _classified(
+        block, classified, BlockType.ORDERED_LIST, "Invalid ordered list"
+    )
+    list_items = [
+        ParentNode("li", text_to_children(item, url_resolver))
+        for item in classified.lines
+    ]
     return ParentNode("ol", list_items)
 
 
-def block_to_html_node(block):
+_BLOCK_CONVERTERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+}
+
+
+@traced(
+    "block_to_html_node",
+    result_counts=lambda node: {"html_nodes": _node_count(node)},
+)
+def block_to_html_node(block, url_resolver=None):
     """
     Convert a single markdown block to an HTMLNode.
     
     Args:
         block: A string containing a single markdown block
+        url_resolver: Optional URLResolver applied to link and image URLs
         
     Returns:
         An HTMLNode (ParentNode) representing the block
     """
-    block_type = block_to_block_type(block)
+    classified = classify_block(block)
+    return _BLOCK_CONVERTERS[classified.block_type](block, classified, url_resolver)
+
+
+def iter_html_nodes(lines, url_resolver=None):
+    """
+    Lazily convert a stream of markdown lines to block HTMLNodes.
     
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    elif block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    elif block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    elif block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    elif block_type == BlockType.UNORDERED_LIST:
-        return unordered_list_to_html_node(block)
-    elif block_type == BlockType.ORDERED_LIST:
-        return ordered_list_to_html_node(block)
-    else:
-        raise ValueError(f"Unknown block type: {block_type}")
-
-
-def markdown_to_html_node(markdown):
+    Args:
+        lines: An iterable of markdown lines (e.g. an open file object)
+        url_resolver: Optional URLResolver applied to link and image URLs
+        
+    Yields:
+        One HTMLNode (ParentNode) per block, in document order
+    """
+    for block in iter_blocks(lines):
+        yield block_to_html_node(block, url_resolver)
+
+
+@traced("markdown_to_html_node")
+def markdown_to_html_node(markdown, url_resolver=None):
     """
     Convert a full markdown document to an HTMLNode.
     
     Args:
-        markdown: A string containing the full markdown document
+        markdown: A string containing the full markdown document, or an
+                  iterable of lines (e.g. an open file object)
+        url_resolver: Optional URLResolver applied to link and image URLs
         
     Returns:
         A ParentNode with tag "div" containing all the block HTMLNodes
     """
-    blocks = markdown_to_blocks(markdown)
-    children = []
+    if isinstance(markdown, str):
+        markdown = markdown.split("\n")
+    children = list(iter_html_nodes(markdown, url_resolver))
+    return ParentNode("div", children)
+
+
+def markdown_stream_to_html(lines, out):
+    """
+    Convert a stream of markdown lines to HTML, writing block by block.
     
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    Produces the same output as markdown_to_html_node(...).to_html(), but
+    memory stays flat no matter how large the input is.
     
-    return ParentNode("div", children)
+    Args:
+        lines: An iterable of markdown lines (e.g. sys.stdin)
+        out: A writable text file object (e.g. sys.stdout)
+    """
+    out.write("<div>")
+    for html_node in iter_html_nodes(lines):
+        html_node.write_to(out)
+    out.write("</div>")
+
+
+def markdown_buffer_to_html(buffer, out, url_resolver=None):
+    """
+    Convert a UTF-8 markdown buffer (e.g. an mmap) to HTML, block by block.
+    
+    Produces the same output as markdown_to_html_node(...).to_html().
+    Only the block being converted is ever decoded, so peak memory stays
+    around the size of the largest block, however big the input is.
+    
+    Args:
+        buffer: A bytes-like object of UTF-8 markdown
+        out: A writable text file object
+        url_resolver: Optional URLResolver applied to link and image URLs
+    """
+    out.write("<div>")
+    for block in iter_buffer_blocks(buffer):
+        block_to_html_node(block, url_resolver).write_to(out)
+    out.write("</div>")
+
+
+def extract_title_from_buffer(buffer):
+    """
+    Extract the h1 header from a UTF-8 markdown buffer.
+    
+    Like extract_title, but only decodes the heading line.
+    
+    Raises:
+        Exception: If no h1 header is found
+    """
+    pos = 0
+    length = len(buffer)
+    while pos < length:
+        newline = buffer.find(b"\n", pos)
+        if newline == -1:
+            newline = length
+        line = buffer[pos:newline].strip()
+        if line.startswith(b"# "):
+            return line[2:].decode().strip()
+        pos = newline + 1
+    raise Exception("No h1 header found in markdown")
 
 
 def extract_title(markdown):
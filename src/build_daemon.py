@@ -0,0 +1,139 @@
+"""
+Unix socket protocol for the warm build daemon (main.py --daemon SOCKET).
+
+A client connects, sends one request line and reads one JSON response
+line, then the connection is closed:
+
+    rebuild           rebuild everything that changed since last time
+    rebuild PATH...   rebuild only what the given files affect
+    stats             report the last build and the daemon's caches
+    stop              shut the daemon down
+
+Requests are handled one at a time, so builds never overlap. This module
+imports nothing from the generator itself, so the client below starts
+in a few milliseconds:
+
+Usage: python3 src/build_daemon.py SOCKET rebuild [PATH...]
+"""
+import os
+import sys
+import json
+import shlex
+import socket
+import socketserver
+
+
+# Seconds a client has to send its request line (requests are handled
+# one at a time, so a silent client would otherwise block the daemon)
+REQUEST_TIMEOUT = 10
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Reads one request line, dispatches it and writes the JSON reply."""
+
+    timeout = REQUEST_TIMEOUT
+
+    def handle(self):
+        try:
+            line = self.rfile.readline()
+        except OSError:
+            # Timed out (socket.timeout) or reset before sending a request
+            return
+        if not line:
+            # Closed without a request, e.g. another daemon's liveness check
+            return
+        try:
+            words = shlex.split(line.decode().strip())
+            if not words:
+                response = {"ok": False, "error": "empty request"}
+            elif words[0] == "stop":
+                response = {"ok": True}
+                self.server.stopping = True
+            else:
+                response = self.server.handle_command(words[0], words[1:])
+        except Exception as e:
+            # Bad quoting (shlex's ValueError) or a failed command
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        try:
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting; the request was still handled
+            pass
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """
+    Single-threaded Unix socket server around a handle_command function.
+
+    Args:
+        socket_path: Where to create the socket; a stale socket left by
+                     a daemon that died is replaced, a live one is not
+        handle_command: Called as handle_command(command, args) and
+                        returns a JSON-serializable dict with an "ok" key
+    """
+
+    def __init__(self, socket_path, handle_command):
+        _remove_stale_socket(socket_path)
+        self.handle_command = handle_command
+        self.stopping = False
+        super().__init__(socket_path, DaemonRequestHandler)
+
+    def serve_until_stopped(self):
+        """Handle requests until a "stop" request, then remove the socket."""
+        try:
+            while not self.stopping:
+                self.handle_request()
+        finally:
+            self.server_close()
+            os.remove(self.server_address)
+
+
+def _remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    raise OSError(f"a daemon is already listening on {socket_path}")
+
+
+def send_command(socket_path, command, *args, timeout=None):
+    """
+    Send one request to a running daemon and return its response.
+
+    Example:
+        send_command("/tmp/site.sock", "rebuild", "content/index.md")
+        returns {"ok": True, "output": "Generated page ...", ...}
+    """
+    request = shlex.join((command,) + args)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(request.encode() + b"\n")
+        with sock.makefile('rb') as f:
+            return json.loads(f.readline())
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python3 src/build_daemon.py SOCKET COMMAND [ARGS...]", file=sys.stderr)
+        sys.exit(2)
+    args = sys.argv[3:]
+    if sys.argv[2] == "rebuild":
+        # The daemon runs in its own working directory
+        args = [os.path.abspath(path) for path in args]
+    response = send_command(sys.argv[1], sys.argv[2], *args)
+    if "output" in response:
+        sys.stdout.write(response["output"])
+    if "error" in response:
+        print(response["error"], file=sys.stderr)
+    if sys.argv[2] == "stats":
+        print(json.dumps(response, indent=2))
+    sys.exit(0 if response.get("ok") else 1)
+
+
+if __name__ == "__main__":
+    main()
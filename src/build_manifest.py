@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import hashlib
+from functools import lru_cache
+
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path):
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def generator_version():
+    """
+    Return a digest of the generator's own source code.
+
+    Any edit to a module in src/ changes the version, so pages built by
+    older code are never mistaken for fresh ones. Tests and benchmark
+    scripts (test_*, bench*) can't affect the output and are skipped.
+    Computed once per process: a long-running watcher or daemon keeps
+    running the code it started with, whatever happens on disk.
+    """
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(src_dir)):
+        if name.endswith('.py') and not name.startswith(('test_', 'bench')):
+            digest.update(name.encode())
+            digest.update(hash_file(os.path.join(src_dir, name)).encode())
+    return digest.hexdigest()
+
+
+def prune_cache_dir(cache_dir, suffix, version):
+    """
+    Delete cache entries written by other versions of the code.
+
+    Entries of the AST and highlight caches are named "...-VERSION" plus
+    suffix, so files with the suffix but another version can never be
+    read again. Temp files an interrupted write left behind (over an
+    hour old, so concurrent writers are safe) are removed too.
+
+    Args:
+        cache_dir: The cache directory (need not exist)
+        suffix: The entries' file extension (e.g. ".ast")
+        version: The current version
+
+    Returns:
+        The number of files removed
+    """
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return 0
+    current = f"-{version}{suffix}"
+    stale_before = time.time() - 3600
+    removed = 0
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            if name.endswith(".tmp"):
+                if os.stat(path).st_mtime >= stale_before:
+                    continue
+            elif not name.endswith(suffix) or name.endswith(current):
+                continue
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class BuildManifest:
+    """
+    Persistent record of what each generated page was built from.
+
+    For every source markdown file the manifest stores the hash of the
+    source and of the template, plus the output path. Together with the
+    generator version and basepath (stored once for the whole build) that
+    is enough to tell whether a page needs rebuilding. The URLs a page
+    references can be stored too, so a page skipped as fresh still
+    contributes to the site's link graph.
+
+    File hashes are also remembered by (size, mtime), so an unchanged
+    file is only stat()ed, not re-read, on the next build.
+    """
+
+    def __init__(self, path, generator, basepath):
+        self.path = path
+        self.generator = generator
+        self.basepath = basepath
+        self.pages = {}
+        self._hashes = {}
+        self._previous_pages = {}
+        self._load()
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt manifest just means a full rebuild
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self._hashes = data.get("hashes", {})
+        if data.get("generator") == self.generator and data.get("basepath") == self.basepath:
+            self._previous_pages = data.get("pages", {})
+        else:
+            # Only remember outputs, so deleted sources can still be cleaned up
+            self._previous_pages = {
+                src: {"dest": entry["dest"]}
+                for src, entry in data.get("pages", {}).items()
+            }
+
+    def file_hash(self, path):
+        """Hash a file, reusing the stored digest if size and mtime match."""
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == signature:
+            return cached[2]
+        digest = hash_file(path)
+        self._hashes[path] = signature + [digest]
+        return digest
+
+    def is_fresh(self, src_path, dest_path, source_hash, template_hash):
+        """Return True if the page was already built from these exact inputs."""
+        entry = self._previous_pages.get(src_path)
+        return (
+            entry is not None
+            and entry.get("source") == source_hash
+            and entry.get("template") == template_hash
+            and entry.get("dest") == dest_path
+            and os.path.exists(dest_path)
+        )
+
+    def record(self, src_path, dest_path, source_hash, template_hash, references=None):
+        """Remember that src_path was built into dest_path from these inputs."""
+        self.pages[src_path] = {
+            "source": source_hash,
+            "template": template_hash,
+            "dest": dest_path,
+        }
+        if references is not None:
+            self.pages[src_path]["references"] = list(references)
+
+    def previous_references(self, src_path):
+        """Return the URLs stored for src_path by the last build, or None."""
+        entry = self._previous_pages.get(src_path)
+        return None if entry is None else entry.get("references")
+
+    def stale_outputs(self):
+        """
+        Return output paths whose source files no longer exist.
+
+        Only valid once every current page has been recorded.
+        """
+        return sorted(
+            entry["dest"]
+            for src_path, entry in self._previous_pages.items()
+            if src_path not in self.pages and not os.path.exists(src_path)
+        )
+
+    def save(self):
+        """Write the manifest to disk (atomically, via a temp file)."""
+        if self.path is None:
+            return
+        data = {
+            "version": MANIFEST_VERSION,
+            "generator": self.generator,
+            "basepath": self.basepath,
+            "pages": self.pages,
+            "hashes": {
+                path: value for path, value in self._hashes.items()
+                if os.path.exists(path)
+            },
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,162 @@
+import json
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+class PageStats(
+    namedtuple(
+        "PageStats",
+        [
+            "seconds", "blocks", "block_cache_hits", "bytes_in", "bytes_out",
+            "ast_cache_hit", "highlighted", "highlight_cache_hits",
+        ],
+        defaults=[None, 0, 0],
+    )
+):
+    """
+    What rendering one page cost.
+
+    seconds: Wall time of reading, rendering and writing the page
+    blocks: Number of markdown blocks in the page
+    block_cache_hits: How many of those came from the block cache
+    bytes_in: Size of the markdown source
+    bytes_out: Size of the written HTML
+    ast_cache_hit: Whether the page's parsed trees came from the AST
+                   cache, or None if it wasn't used
+    highlighted: Number of code blocks syntax highlighted
+    highlight_cache_hits: How many of those came from the highlight cache
+    """
+    __slots__ = ()
+
+
+def _hit_rate(hits, lookups):
+    return hits / lookups if lookups else 0.0
+
+
+class BuildStats:
+    """
+    Timings and throughput of one build, for the --stats report.
+
+    Stages are timed with stage() around each step of the build, pages
+    are added as they are rendered (in any process, since PageStats
+    travel back with the task results), and caches report their own
+    hit/miss counts with add_cache().
+
+    Example:
+        stats = BuildStats()
+        with stats.stage("pages"):
+            generate_pages_recursive(..., build_stats=stats)
+        print(stats.format_report())
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.pages = {}
+        self.pages_skipped = 0
+        self.caches = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Add the wall time of the with block to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add_page(self, src_path, page_stats):
+        """Record a rendered page's PageStats under its source path."""
+        self.pages[src_path] = page_stats
+
+    def add_cache(self, name, hits, lookups):
+        """Record a cache's hits out of lookups (added to earlier counts)."""
+        before_hits, before_lookups = self.caches.get(name, (0, 0))
+        self.caches[name] = (before_hits + hits, before_lookups + lookups)
+
+    def slowest_pages(self, count=10):
+        """Return the count slowest pages as (source path, PageStats), slowest first."""
+        ranked = sorted(self.pages.items(), key=lambda item: item[1].seconds, reverse=True)
+        return ranked[:count]
+
+    def summary(self, top=10):
+        """
+        Return the statistics as a JSON-serializable dict.
+
+        Args:
+            top: How many of the slowest pages to include
+        """
+        total = time.perf_counter() - self.start
+        pages = self.pages.values()
+        pages_time = self.stages.get("pages", 0.0)
+        caches = {
+            "block_cache": (
+                sum(page.block_cache_hits for page in pages),
+                # Pages loaded from the AST cache don't use the block cache
+                sum(page.blocks for page in pages if not page.ast_cache_hit),
+            ),
+            "manifest": (self.pages_skipped, self.pages_skipped + len(self.pages)),
+            "ast_cache": (
+                sum(1 for page in pages if page.ast_cache_hit),
+                sum(1 for page in pages if page.ast_cache_hit is not None),
+            ),
+            "highlight": (
+                sum(page.highlight_cache_hits for page in pages),
+                sum(page.highlighted for page in pages),
+            ),
+        }
+        caches.update(self.caches)
+        return {
+            "total_seconds": total,
+            "stages": dict(self.stages),
+            "pages": {
+                "rendered": len(self.pages),
+                "skipped": self.pages_skipped,
+                "per_second": len(self.pages) / pages_time if pages_time else 0.0,
+                "bytes_in": sum(page.bytes_in for page in pages),
+                "bytes_out": sum(page.bytes_out for page in pages),
+            },
+            "caches": {
+                name: {"hits": hits, "lookups": lookups, "hit_rate": _hit_rate(hits, lookups)}
+                for name, (hits, lookups) in caches.items()
+            },
+            "slowest_pages": [
+                dict(path=src_path, **page._asdict())
+                for src_path, page in self.slowest_pages(top)
+            ],
+        }
+
+    def format_report(self, top=10):
+        """Return the statistics as human-readable lines of text."""
+        summary = self.summary(top)
+        pages = summary["pages"]
+        lines = ["Build stats:"]
+        lines.append(f"  {'total':<20} {summary['total_seconds'] * 1000:10.1f} ms")
+        for name, seconds in summary["stages"].items():
+            lines.append(f"  {name:<20} {seconds * 1000:10.1f} ms")
+        lines.append(
+            f"  {pages['rendered']} page(s) rendered ({pages['per_second']:.1f} pages/s), "
+            f"{pages['skipped']} unchanged"
+        )
+        lines.append(
+            f"  {pages['bytes_in'] / 2**20:.2f} MB in, {pages['bytes_out'] / 2**20:.2f} MB out"
+        )
+        for name, cache in summary["caches"].items():
+            if cache["lookups"]:
+                lines.append(
+                    f"  {name:<20} {cache['hit_rate']:6.1%} hit rate "
+                    f"({cache['hits']}/{cache['lookups']})"
+                )
+        if summary["slowest_pages"]:
+            lines.append(f"Slowest {len(summary['slowest_pages'])} page(s):")
+            for page in summary["slowest_pages"]:
+                lines.append(
+                    f"  {page['seconds'] * 1000:10.1f} ms {page['blocks']:6} blocks  {page['path']}"
+                )
+        return "\n".join(lines)
+
+    def write_json(self, path, top=10):
+        """Write summary(top) to path as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.summary(top), f, indent=2)
@@ -0,0 +1,336 @@
+"""
+Syntax highlighting for fenced code blocks.
+
+A small regex tokenizer per language splits code into (kind, text)
+tokens, where kind is a token class ("keyword", "string", "comment", ...)
+or None for plain text. The tokens become the children of the block's
+<code> element, each classified token wrapped in <span class="hl-KIND">:
+
+    ```python
+    return None
+    ```
+
+renders as
+
+    <pre><code class="language-python"><span class="hl-keyword">return</span>
+    <span class="hl-keyword">None</span></code></pre>
+
+(without the line break). Code in any other language, or with no
+language, renders as plain <pre><code> as before.
+
+Tokenizing is the expensive part, so tokens are cached by (language,
+code hash): in memory for the life of the process, and optionally on
+disk, so a snippet repeated across posts is highlighted once, ever.
+"""
+import os
+import re
+import sys
+import marshal
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+
+from build_manifest import hash_file, prune_cache_dir
+from htmlnode import LeafNode, ParentNode
+from instrument import register_patterns
+
+
+# Bump when the token format changes
+HIGHLIGHT_FORMAT_VERSION = 1
+
+# Default number of snippets kept in memory
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def _rules(*rules):
+    """Combine (kind, regex) rules into one pattern with a group per kind."""
+    kinds = []
+    alternatives = []
+    for kind, regex in rules:
+        kinds.append(kind)
+        alternatives.append(f"({regex})")
+    return re.compile("|".join(alternatives)), kinds
+
+
+def _words(*words):
+    return r"\b(?:" + "|".join(words) + r")\b"
+
+
+_PYTHON, _PYTHON_KINDS = _rules(
+    ("comment", r"#[^\n]*"),
+    ("string", r"""(?:\b(?i:[rbuf]{1,2}))?(?:'''[\s\S]*?'''|\"\"\"[\s\S]*?\"\"\"|'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")"""),
+    ("decorator", r"(?m:^)[ \t]*@[\w.]+"),
+    ("function", r"(?<=\bdef )\w+|(?<=\bclass )\w+"),
+    ("keyword", _words(
+        "False", "None", "True", "and", "as", "assert", "async", "await",
+        "break", "class", "continue", "def", "del", "elif", "else", "except",
+        "finally", "for", "from", "global", "if", "import", "in", "is",
+        "lambda", "nonlocal", "not", "or", "pass", "raise", "return", "try",
+        "while", "with", "yield",
+    )),
+    ("builtin", _words(
+        "self", "print", "len", "range", "enumerate", "zip", "open", "isinstance",
+        "str", "int", "float", "bool", "list", "dict", "set", "tuple", "super",
+    )),
+    ("number", r"\b(?:0[xob][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b"),
+)
+
+_SHELL, _SHELL_KINDS = _rules(
+    ("comment", r"(?<!\S)#[^\n]*"),
+    ("string", r"""'[^']*'|"(?:[^"\\]|\\.)*\""""),
+    ("variable", r"\$(?:\{[^}\n]*\}|\w+|[@*#?$!-])"),
+    ("keyword", _words(
+        "if", "then", "else", "elif", "fi", "for", "while", "until", "do",
+        "done", "case", "esac", "in", "function", "return", "export", "local",
+    )),
+    ("option", r"(?<![^\s|;&])--?[A-Za-z][\w-]*"),
+)
+
+_JSON, _JSON_KINDS = _rules(
+    ("attr", r'"(?:[^"\\\n]|\\.)*"(?=\s*:)'),
+    ("string", r'"(?:[^"\\\n]|\\.)*"'),
+    ("literal", _words("true", "false", "null")),
+    ("number", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+)
+
+# HTML is tokenized in two passes: markup first, then inside each tag
+_HTML, _HTML_KINDS = _rules(
+    ("comment", r"<!--[\s\S]*?(?:-->|$)"),
+    ("tag", r"<[!?][^>]*>?"),
+    ("markup", r"</?[A-Za-z][^>]*>?"),
+    ("entity", r"&#?\w+;"),
+)
+
+_HTML_TAG, _HTML_TAG_KINDS = _rules(
+    ("tag", r"^</?[\w:-]+|/?>$"),
+    ("string", r"""(?<==)\s*(?:"[^"]*"|'[^']*'|[^\s>]+)"""),
+    ("attr", r"[^\s=/>]+"),
+)
+
+register_patterns(globals(), "_PYTHON", "_SHELL", "_JSON", "_HTML", "_HTML_TAG")
+
+
+def _tokenize(pattern, kinds, code):
+    """Split code into (kind, text) tokens, with None for unmatched text."""
+    tokens = []
+    pos = 0
+    for match in pattern.finditer(code):
+        start = match.start()
+        if start > pos:
+            tokens.append((None, code[pos:start]))
+        tokens.append((kinds[match.lastindex - 1], match.group()))
+        pos = match.end()
+    if pos < len(code):
+        tokens.append((None, code[pos:]))
+    return tokens
+
+
+def tokenize_python(code):
+    return _tokenize(_PYTHON, _PYTHON_KINDS, code)
+
+
+def tokenize_shell(code):
+    return _tokenize(_SHELL, _SHELL_KINDS, code)
+
+
+def tokenize_json(code):
+    return _tokenize(_JSON, _JSON_KINDS, code)
+
+
+def tokenize_html(code):
+    tokens = []
+    for kind, text in _tokenize(_HTML, _HTML_KINDS, code):
+        if kind == "markup":
+            tokens.extend(_tokenize(_HTML_TAG, _HTML_TAG_KINDS, text))
+        else:
+            tokens.append((kind, text))
+    return tokens
+
+
+# Language names as written after the opening fence -> (name, tokenizer)
+LANGUAGES = {
+    "python": ("python", tokenize_python),
+    "py": ("python", tokenize_python),
+    "shell": ("shell", tokenize_shell),
+    "sh": ("shell", tokenize_shell),
+    "bash": ("shell", tokenize_shell),
+    "console": ("shell", tokenize_shell),
+    "json": ("json", tokenize_json),
+    "html": ("html", tokenize_html),
+    "xml": ("html", tokenize_html),
+}
+
+
+def find_language(info):
+    """
+    Return the canonical name of a fence's language, or None if unsupported.
+
+    Example:
+        find_language("py") returns "python"
+        find_language("rust") returns None
+    """
+    if not info:
+        return None
+    entry = LANGUAGES.get(info.split()[0].lower())
+    return entry[0] if entry is not None else None
+
+
+@lru_cache(maxsize=None)
+def highlighter_version():
+    """Return a short digest of the token format and this module's code."""
+    digest = hashlib.sha256(str(HIGHLIGHT_FORMAT_VERSION).encode())
+    digest.update(hash_file(os.path.abspath(__file__)).encode())
+    return digest.hexdigest()[:16]
+
+
+class HighlightCache:
+    """
+    Tokens of highlighted snippets, keyed by language and code hash.
+
+    Args:
+        cache_dir: Optional directory to also keep tokens in across
+                   builds (created on first write)
+        max_entries: How many snippets to keep in memory; the least
+                     recently used are evicted beyond it
+    """
+
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        language, code_hash = key
+        return os.path.join(
+            self.cache_dir, f"{code_hash}-{language}-{highlighter_version()}.hl"
+        )
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            # Missing, or a corrupt or truncated entry: tokenize again
+            return None
+
+    def _store(self, path, tokens):
+        # Per-process temp name: workers may store the same entry at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(tokens, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # The cache is optional: the snippet is tokenized again next time
+            print(f"Warning: could not write highlight cache entry: {e}", file=sys.stderr)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def prune(self):
+        """
+        Delete on-disk entries written by other highlighter versions.
+
+        Returns:
+            The number of files removed
+        """
+        if self.cache_dir is None:
+            return 0
+        return prune_cache_dir(self.cache_dir, ".hl", highlighter_version())
+
+    def tokens(self, code, language):
+        """
+        Return the (kind, text) tokens of code in a supported language.
+
+        Args:
+            code: The code between the fences
+            language: A canonical name, as returned by find_language
+        """
+        key = (language, hashlib.sha256(code.encode()).hexdigest())
+        tokens = self._entries.get(key)
+        if tokens is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return tokens
+        if self.cache_dir is not None:
+            path = self._path(key)
+            tokens = self._load(path)
+        if tokens is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            tokens = LANGUAGES[language][1](code)
+            if self.cache_dir is not None:
+                self._store(path, tokens)
+        self._entries[key] = tokens
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return tokens
+
+    def stats(self):
+        """Return a dict of "hits", "disk_hits", "misses" and "entries"."""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+# The cache code_to_html_node highlights through, see configure_highlight_cache
+_highlight_cache = HighlightCache()
+
+
+def configure_highlight_cache(cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    Replace this process's highlight cache with an empty one.
+
+    Args:
+        cache_dir: Directory to keep tokens in across builds, or None
+                   for an in-memory cache only
+        max_entries: How many snippets to keep in memory
+    """
+    global _highlight_cache
+    _highlight_cache = HighlightCache(cache_dir, max_entries)
+
+
+def highlight_cache():
+    """Return this process's highlight cache."""
+    return _highlight_cache
+
+
+# Shared by every span of a kind; nodes never mutate their props
+_SPAN_PROPS = {}
+
+
+def highlight_to_html_node(code, info):
+    """
+    Return the highlighted <code> node for a fenced code block.
+
+    Args:
+        code: The code between the fences
+        info: The language specifier after the opening fence
+
+    Returns:
+        A ParentNode("code", ...) of text and <span class="hl-KIND">
+        leaves, or None if the language isn't supported (or the code is
+        empty) and the block should render as plain code
+    """
+    language = find_language(info)
+    if language is None or not code:
+        return None
+    children = []
+    for kind, text in _highlight_cache.tokens(code, language):
+        if kind is None:
+            children.append(LeafNode(None, text))
+            continue
+        props = _SPAN_PROPS.get(kind)
+        if props is None:
+            props = _SPAN_PROPS[kind] = {"class": f"hl-{kind}"}
+        children.append(LeafNode("span", text, props))
+    return ParentNode("code", children, {"class": f"language-{language}"})
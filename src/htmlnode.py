@@ -1,56 +1,167 @@
+import sys
+from instrument import traced
+
+
+# Shared "<tag>" / "</tag>" strings, built once per distinct tag name
+_TAG_STRINGS = {}
+
+
+def _tag_strings(tag):
+    strings = _TAG_STRINGS.get(tag)
+    if strings is None:
+        strings = _TAG_STRINGS[tag] = (f"<{tag}>", f"</{tag}>")
+    return strings
+
+
+def escape_html(text):
+    """
+    Escape &, < and > for use as HTML text content.
+
+    Most text has nothing to escape, so it is checked for the three
+    characters first and returned as-is without copying.
+
+    Example:
+        escape_html("a < b & c") returns "a &lt; b &amp; c"
+    """
+    if "&" in text or "<" in text or ">" in text:
+        # Chained replace beats str.translate here: translate with
+        # multi-character replacements goes through a slow per-char path
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value):
+    """Escape a value for a double-quoted HTML attribute (&, <, > and ")."""
+    if '"' in value:
+        return escape_html(value).replace('"', "&quot;")
+    return escape_html(value)
+
+
 class HTMLNode:
+    # Slots instead of a per-instance __dict__: sites build tens of
+    # thousands of nodes per build
+    __slots__ = ("tag", "value", "children", "props", "_start_tag")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
+        self._start_tag = None
+
+    def start_tag(self):
+        """
+        Return the opening tag string, e.g. '<a href="https://boot.dev">'.
+
+        Attributes are serialized once per node and cached, so props
+        should not be mutated after the node has been rendered.
+        """
+        if self._start_tag is None:
+            if self.props:
+                self._start_tag = f"<{self.tag}{self.props_to_html()}>"
+            else:
+                self._start_tag = _tag_strings(self.tag)[0]
+        return self._start_tag
+
+    def end_tag(self):
+        """Return the closing tag string, e.g. '</a>'."""
+        return _tag_strings(self.tag)[1]
 
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def iter_html(self):
+        """
+        Yield the HTML for this node and its subtree in chunks.
+
+        Walks the tree with an explicit stack instead of recursion, so
+        deep trees can't hit the recursion limit and no intermediate
+        strings are built per level. "".join(node.iter_html()) is always
+        identical to node.to_html().
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                # Closing tag pushed below the children of a ParentNode
+                yield node
+            elif isinstance(node, ParentNode):
+                if node.tag is None:
+                    raise ValueError("invalid HTML: no tag")
+                if node.children is None:
+                    raise ValueError("invalid HTML: no children")
+                yield node.start_tag()
+                stack.append(node.end_tag())
+                stack.extend(reversed(node.children))
+            else:
+                yield node.to_html()
+
+    def write_to(self, fp):
+        """Stream the HTML for this node into a writable file object."""
+        fp.writelines(self.iter_html())
+
     def props_to_html(self):
         if self.props is None:
             return ""
-        props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
-        return props_html
+        parts = []
+        for prop, value in self.props.items():
+            # escape_attribute's check inlined: most URLs have nothing to escape
+            if "&" in value or "<" in value or ">" in value or '"' in value:
+                value = escape_attribute(value)
+            parts.append(f' {prop}="{value}"')
+        return "".join(parts)
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    # The rendered HTML, so the value is escaped at most once per node
+    __slots__ = ("_html",)
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
+        self._html = None
+
+    def iter_html(self):
+        yield self.to_html()
 
     def to_html(self):
-        if self.value is None:
-            raise ValueError("invalid HTML: no value")
-        if self.tag is None:
-            return self.value
-        # Self-closing tags (like img) should not have a closing tag
-        if self.tag == "img":
-            return f"<{self.tag}{self.props_to_html()}>"
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        """
+        Return the node's HTML, with the value escaped as text content.
+
+        The result is cached, so value and props should not be mutated
+        after the node has been rendered.
+        """
+        if self._html is None:
+            value = self.value
+            if value is None:
+                raise ValueError("invalid HTML: no value")
+            # escape_html's check inlined: most leaves have nothing to escape
+            if "&" in value or "<" in value or ">" in value:
+                value = escape_html(value)
+            if self.tag is None:
+                self._html = value
+            elif self.tag == "img":
+                # Self-closing tags (like img) should not have a closing tag
+                self._html = self.start_tag()
+            else:
+                self._html = f"{self.start_tag()}{value}{self.end_tag()}"
+        return self._html
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
+    @traced("ParentNode.to_html")
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("invalid HTML: no tag")
-        if self.children is None:
-            raise ValueError("invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return "".join(self.iter_html())
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
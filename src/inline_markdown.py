@@ -1,28 +1,216 @@
 import re
+from functools import lru_cache
 from textnode import TextNode, TextType
+import instrument
 
 
-def split_nodes_delimiter(old_nodes, delimiter, text_type):
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+instrument.register_patterns(globals(), "IMAGE_PATTERN", "LINK_PATTERN")
+
+# Longest delimiters first so "**" is never read as two "*"
+DEFAULT_DELIMITERS = (
+    ("**", TextType.BOLD),
+    ("*", TextType.ITALIC),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+
+class _InlineFrame:
+    """One open delimited section on the scanner's delimiter stack."""
+
+    def __init__(self, delimiter=None, text_type=None, start=0):
+        self.delimiter = delimiter
+        self.text_type = text_type
+        self.start = start
+        self.nodes = []
+        self._text = []
+
+    def add_text(self, text):
+        self._text.append(text)
+
+    def add_node(self, node):
+        self.flush()
+        self.nodes.append(node)
+
+    def flush(self):
+        if self._text:
+            self.nodes.append(TextNode("".join(self._text), TextType.TEXT))
+            self._text = []
+
+    def close(self, raw_text):
+        self.flush()
+        if not self.nodes:
+            return None
+        if all(node.text_type == TextType.TEXT for node in self.nodes):
+            return TextNode(raw_text, self.text_type)
+        return TextNode(raw_text, self.text_type, children=self.nodes)
+
+
+class InlineScanner:
+    """
+    Single-pass inline markdown tokenizer built on a delimiter stack.
+
+    The scanner jumps between special characters with one compiled regex,
+    pushing a frame for every opening delimiter and popping it on the
+    matching closer. Code spans are verbatim, and link text is scanned
+    again for emphasis so nesting like [**bold**](url) works.
+
+    Example:
+        InlineScanner().scan("A **bold** [link](url)")
+        returns [
+            TextNode("A ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode(" ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "url")
+        ]
+    """
+
+    def __init__(self, delimiters=DEFAULT_DELIMITERS, images=True, links=True):
+        self.delimiters = tuple(
+            sorted(delimiters, key=lambda item: len(item[0]), reverse=True)
+        )
+        self.images = images
+        self.links = links
+        self._label_scanner = None
+
+        special_chars = {delimiter[0] for delimiter, _ in self.delimiters}
+        if images:
+            special_chars.add("!")
+        if links:
+            special_chars.add("[")
+        self._special = None
+        if special_chars:
+            escaped = "".join(re.escape(char) for char in sorted(special_chars))
+            self._special = instrument.pattern(re.compile(f"[{escaped}]"))
+
+    def scan(self, text):
+        """
+        Tokenize a string of inline markdown into a list of TextNodes.
+
+        Raises:
+            ValueError: If a delimited section is not closed, or two
+                sections overlap instead of nesting
+        """
+        frames = [_InlineFrame()]
+        pos = 0
+        while pos < len(text):
+            match = self._special.search(text, pos) if self._special else None
+            if match is None:
+                frames[-1].add_text(text[pos:])
+                break
+            start = match.start()
+            if start > pos:
+                frames[-1].add_text(text[pos:start])
+            pos = self._scan_special(text, start, frames)
+
+        if len(frames) > 1:
+            raise ValueError("invalid markdown, formatted section not closed")
+        root = frames[0]
+        root.flush()
+        return root.nodes
+
+    def _scan_special(self, text, pos, frames):
+        char = text[pos]
+        if char == "!" and self.images:
+            match = IMAGE_PATTERN.match(text, pos)
+            if match:
+                frames[-1].add_node(
+                    TextNode(match.group(1), TextType.IMAGE, match.group(2))
+                )
+                return match.end()
+        if char == "[" and self.links:
+            match = LINK_PATTERN.match(text, pos)
+            if match:
+                frames[-1].add_node(self._link_node(match.group(1), match.group(2)))
+                return match.end()
+        for delimiter, text_type in self.delimiters:
+            if text.startswith(delimiter, pos):
+                return self._scan_delimiter(text, pos, delimiter, text_type, frames)
+        frames[-1].add_text(char)
+        return pos + 1
+
+    def _scan_delimiter(self, text, pos, delimiter, text_type, frames):
+        content_start = pos + len(delimiter)
+        if text_type == TextType.CODE:
+            # Code spans are verbatim: jump straight to the closing delimiter
+            end = text.find(delimiter, content_start)
+            if end == -1:
+                raise ValueError("invalid markdown, formatted section not closed")
+            if end > content_start:
+                frames[-1].add_node(TextNode(text[content_start:end], text_type))
+            return end + len(delimiter)
+
+        top = frames[-1]
+        if top.delimiter == delimiter:
+            frames.pop()
+            node = top.close(text[top.start:pos])
+            if node is not None:
+                frames[-1].add_node(node)
+        elif any(frame.delimiter == delimiter for frame in frames):
+            raise ValueError("invalid markdown, formatted sections overlap")
+        else:
+            frames[-1].flush()
+            frames.append(_InlineFrame(delimiter, text_type, content_start))
+        return content_start
+
+    def _link_node(self, anchor, url):
+        if self._label_scanner is None:
+            self._label_scanner = _get_scanner(self.delimiters, False, False)
+        children = self._label_scanner.scan(anchor)
+        if all(child.text_type == TextType.TEXT for child in children):
+            return TextNode(anchor, TextType.LINK, url)
+        return TextNode(anchor, TextType.LINK, url, children=children)
+
+
+@lru_cache(maxsize=None)
+def _get_scanner(delimiters, images, links):
+    return InlineScanner(delimiters, images, links)
+
+
+# Cached scanners hold their own compiled regex, so rebuild them when
+# regex counting is switched on or off
+instrument.on_toggle(_get_scanner.cache_clear)
+
+
+def text_to_textnodes(text):
+    """
+    Convert a string of inline markdown to a list of TextNodes in one pass.
+
+    Example:
+        text = "This is **text** with an _italic_ word"
+        returns [
+            TextNode("This is ", TextType.TEXT),
+            TextNode("text", TextType.BOLD),
+            TextNode(" with an ", TextType.TEXT),
+            TextNode("italic", TextType.ITALIC),
+            TextNode(" word", TextType.TEXT)
+        ]
+    """
+    return _get_scanner(DEFAULT_DELIMITERS, True, True).scan(text)
+
+
+def _split_text_nodes(old_nodes, scanner):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        split_nodes = []
-        sections = old_node.text.split(delimiter)
-        if len(sections) % 2 == 0:
-            raise ValueError("invalid markdown, formatted section not closed")
-        for i in range(len(sections)):
-            if sections[i] == "":
-                continue
-            if i % 2 == 0:
-                split_nodes.append(TextNode(sections[i], TextType.TEXT))
-            else:
-                split_nodes.append(TextNode(sections[i], text_type))
-        new_nodes.extend(split_nodes)
+        new_nodes.extend(scanner.scan(old_node.text))
     return new_nodes
 
 
+def split_nodes_delimiter(old_nodes, delimiter, text_type):
+    """
+    Split TextNodes on a single inline delimiter such as "**" or "`".
+
+    Thin wrapper around InlineScanner with only that delimiter enabled.
+    """
+    scanner = _get_scanner(((delimiter, text_type),), False, False)
+    return _split_text_nodes(old_nodes, scanner)
+
+
 def extract_markdown_images(text):
     """
     Extract markdown images from text.
@@ -32,9 +220,7 @@ def extract_markdown_images(text):
         text = "This is text with a ![rick roll](https://i.imgur.com/aKaOqIh.gif)"
         returns [("rick roll", "https://i.imgur.com/aKaOqIh.gif")]
     """
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
@@ -46,9 +232,37 @@ def extract_markdown_links(text):
         text = "This is text with a link [to boot dev](https://www.boot.dev)"
         returns [("to boot dev", "https://www.boot.dev")]
     """
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return LINK_PATTERN.findall(text)
+
+
+def _split_nodes_pattern(old_nodes, pattern, text_type):
+    """
+    Split TEXT nodes around every match of an image or link pattern.
+
+    One finditer pass per node: text between matches is sliced by match
+    offset, so the cost is linear in the text however many matches it has.
+    """
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+
+        text = old_node.text
+        pos = 0
+        for match in pattern.finditer(text):
+            start = match.start()
+            if start > pos:
+                new_nodes.append(TextNode(text[pos:start], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
+
+        if pos == 0:
+            new_nodes.append(old_node)
+        elif pos < len(text):
+            new_nodes.append(TextNode(text[pos:], TextType.TEXT))
+
+    return new_nodes
 
 
 def split_nodes_image(old_nodes):
@@ -62,34 +276,7 @@ def split_nodes_image(old_nodes):
             TextNode("alt", TextType.IMAGE, "url")
         ]
     """
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        
-        for image_alt, image_url in images:
-            sections = original_text.split(f"![{image_alt}]({image_url})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, image section not closed")
-            
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            
-            new_nodes.append(TextNode(image_alt, TextType.IMAGE, image_url))
-            original_text = sections[1]
-        
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
 
 def split_nodes_link(old_nodes):
@@ -103,31 +290,4 @@ def split_nodes_link(old_nodes):
             TextNode("anchor", TextType.LINK, "url")
         ]
     """
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        
-        original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        
-        if len(links) == 0:
-            new_nodes.append(old_node)
-            continue
-        
-        for link_anchor, link_url in links:
-            sections = original_text.split(f"[{link_anchor}]({link_url})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, link section not closed")
-            
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            
-            new_nodes.append(TextNode(link_anchor, TextType.LINK, link_url))
-            original_text = sections[1]
-        
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
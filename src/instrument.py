@@ -0,0 +1,274 @@
+"""
+Lightweight build instrumentation: span timings and counters.
+
+Hot-path functions are marked with @traced. The decorator returns the
+function unchanged, so a build without instrumentation runs the original
+code; enable() swaps a timing wrapper in where the function is defined
+(its module global, or its class attribute for a method) and disable()
+puts the original back. Modules that import a traced function by name
+list it with register_traced() to have their global swapped too;
+references held elsewhere (dicts of converters, partials) stay untraced.
+
+Regular expressions can be counted too: module-level patterns are listed
+with register_patterns(), and only those module globals are swapped for
+counting proxies while enabled. Patterns compiled at runtime go through
+pattern().
+
+Recorded spans and counters are exported as Chrome trace-event JSON,
+viewable in chrome://tracing or https://ui.perfetto.dev.
+"""
+import os
+import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+
+_enabled = False
+_start_ns = 0
+_events = []
+_counters = Counter()
+# Counters are also updated from the --async-io reader and writer threads
+_counters_lock = threading.Lock()
+
+# (module globals, name) of compiled patterns to count
+_pattern_slots = []
+# Traced function -> its timing wrapper, installed while enabled
+_wrappers = {}
+# (module globals, name) of traced functions imported into other modules
+_traced_slots = []
+# Called after enable() and disable(), e.g. to drop cached regex users
+_toggle_hooks = []
+
+
+def is_enabled():
+    return _enabled
+
+
+def count(name, amount=1):
+    """Add amount to a named counter (no-op while disabled)."""
+    if _enabled:
+        _add(name, amount)
+
+
+def _add(name, amount):
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def _now_us():
+    return (time.perf_counter_ns() - _start_ns) / 1000
+
+
+def _record_span(name, start_us, args):
+    event = {
+        "name": name,
+        "cat": "build",
+        "ph": "X",
+        "ts": start_us,
+        "dur": _now_us() - start_us,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    _events.append(event)
+
+
+def _record_counters():
+    with _counters_lock:
+        snapshot = dict(_counters)
+    _events.append({
+        "name": "counters",
+        "ph": "C",
+        "ts": _now_us(),
+        "pid": os.getpid(),
+        "args": snapshot,
+    })
+
+
+@contextmanager
+def span(name, **args):
+    """Time a block of code as a named span (no-op while disabled)."""
+    if not _enabled:
+        yield
+        return
+    start_us = _now_us()
+    try:
+        yield
+    finally:
+        _record_span(name, start_us, args)
+
+
+def traced(name, span_args=None, result_counter=None, result_counts=None, page=False):
+    """
+    Mark a function to be recorded as a span while instrumentation is on.
+
+    Args:
+        name: Span name in the trace
+        span_args: Optional function called with the function's arguments,
+                   returning a dict of span args (e.g. the page path)
+        result_counter: Optional counter name; the function's (numeric)
+                        return value is added to it
+        result_counts: Optional function called with the return value,
+                       returning a dict of amounts to add to counters
+        page: Also emit a counter snapshot when the span ends, so the
+              trace shows counters per page
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start_us = _now_us()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _record_span(
+                    name, start_us, span_args(*args, **kwargs) if span_args else None
+                )
+            if result_counter is not None:
+                _add(result_counter, result)
+            if result_counts is not None:
+                for counter_name, amount in result_counts(result).items():
+                    _add(counter_name, amount)
+            if page:
+                _record_counters()
+            return result
+
+        _wrappers[func] = wrapper
+        return func
+
+    return decorator
+
+
+def register_traced(module_globals, *names):
+    """List traced functions imported by name, to swap along with their module."""
+    for name in names:
+        _traced_slots.append((module_globals, name))
+
+
+def _install(func, replacement):
+    """Bind replacement where func is defined: a module global or class attribute."""
+    owner, _, attr = func.__qualname__.rpartition(".")
+    if owner:
+        setattr(func.__globals__[owner], attr, replacement)
+    else:
+        func.__globals__[attr] = replacement
+
+
+class CountingPattern:
+    """Proxy for a compiled regex that counts every matching call."""
+
+    __slots__ = ("_pattern",)
+
+    def __init__(self, pattern):
+        self._pattern = pattern
+
+    def _count(self):
+        _add("regex_calls", 1)
+
+    def search(self, *args):
+        self._count()
+        return self._pattern.search(*args)
+
+    def match(self, *args):
+        self._count()
+        return self._pattern.match(*args)
+
+    def finditer(self, *args):
+        self._count()
+        return self._pattern.finditer(*args)
+
+    def findall(self, *args):
+        self._count()
+        return self._pattern.findall(*args)
+
+    def __getattr__(self, attr):
+        return getattr(self._pattern, attr)
+
+
+def pattern(compiled):
+    """Return compiled, wrapped to count calls if instrumentation is on."""
+    return CountingPattern(compiled) if _enabled else compiled
+
+
+def register_patterns(module_globals, *names):
+    """List module-level compiled patterns whose calls should be counted."""
+    for name in names:
+        _pattern_slots.append((module_globals, name))
+
+
+def on_toggle(hook):
+    """Register a function to call whenever instrumentation is toggled."""
+    _toggle_hooks.append(hook)
+    return hook
+
+
+def enable():
+    """Start recording spans, counters and registered pattern calls."""
+    global _enabled, _start_ns
+    if _enabled:
+        return
+    _enabled = True
+    _start_ns = time.perf_counter_ns()
+    for module_globals, name in _pattern_slots:
+        module_globals[name] = CountingPattern(module_globals[name])
+    for func, wrapper in _wrappers.items():
+        _install(func, wrapper)
+    for module_globals, name in _traced_slots:
+        module_globals[name] = _wrappers[module_globals[name]]
+    for hook in _toggle_hooks:
+        hook()
+
+
+def disable():
+    """Stop recording and restore the registered patterns and functions."""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    for module_globals, name in _pattern_slots:
+        value = module_globals[name]
+        if isinstance(value, CountingPattern):
+            module_globals[name] = value._pattern
+    for func in _wrappers:
+        _install(func, func)
+    for module_globals, name in _traced_slots:
+        module_globals[name] = module_globals[name].__wrapped__
+    for hook in _toggle_hooks:
+        hook()
+
+
+def reset():
+    """Forget all recorded spans and counters."""
+    _events.clear()
+    with _counters_lock:
+        _counters.clear()
+
+
+def counters():
+    """Return a copy of the current counter values."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def events():
+    """Return a copy of the recorded trace events."""
+    return list(_events)
+
+
+def export_chrome_trace(path):
+    """Write recorded spans and counters as Chrome trace-event JSON."""
+    data = {
+        "traceEvents": _events + [{
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "args": {"name": "boot_static build"},
+        }],
+        "displayTimeUnit": "ms",
+        "otherData": {"counters": counters()},
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f)
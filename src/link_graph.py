@@ -0,0 +1,151 @@
+import os
+import posixpath
+from xml.sax.saxutils import escape
+
+from url_resolver import split_url_suffix
+
+
+SITEMAP_FILENAME = "sitemap.xml"
+
+IMAGE_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif", ".ico",
+})
+
+
+def page_url(page_path):
+    """
+    Return the site-absolute URL of a generated page.
+
+    Example:
+        page_url("blog/tom/index.html") returns "/blog/tom/"
+        page_url("index.html") returns "/"
+    """
+    if page_path == "index.html" or page_path.endswith("/index.html"):
+        return "/" + page_path[:-len("index.html")]
+    return "/" + page_path
+
+
+def _is_internal(url):
+    if not url or url.startswith(("#", "//")):
+        return False
+    # "https:...", "mailto:..." etc.; a ":" after the first "/" is just a path
+    scheme, colon, _ = url.partition(":")
+    return not colon or "/" in scheme
+
+
+class LinkGraph:
+    """
+    Site-wide graph of the links and asset references between pages.
+
+    Filled in during the build from the URLs the URL resolver sees while
+    rendering each page, so checking links and writing the sitemap need
+    no second pass over the content.
+    """
+
+    def __init__(self):
+        # page path (relative to the output root) -> (source path, urls)
+        self.pages = {}
+
+    def add_page(self, page_path, src_path, references):
+        """
+        Record a page and the URLs it references.
+
+        Args:
+            page_path: The output path relative to the site root, with
+                       "/" separators (e.g. "blog/tom/index.html")
+            src_path: The markdown source, for reporting
+            references: Every URL in the page (links, images, template
+                        attributes), as written in the source
+        """
+        self.pages[page_path] = (src_path, list(references))
+
+    def _targets(self, page_path):
+        """Return the internal paths (without leading "/") a page links to."""
+        base = posixpath.dirname(page_path)
+        targets = []
+        for url in self.pages[page_path][1]:
+            if not _is_internal(url):
+                continue
+            path = split_url_suffix(url)[0]
+            if not path:
+                continue
+            if path.startswith("/"):
+                target = path.lstrip("/")
+            else:
+                target = posixpath.join(base, path)
+            target = posixpath.normpath(target) if target else "."
+            targets.append((url, "" if target == "." else target))
+        return targets
+
+    def _existing_paths(self, static_files):
+        paths = set(static_files)
+        for page_path in self.pages:
+            paths.add(page_path)
+            url_path = page_url(page_path).strip("/")
+            paths.add(url_path)
+            if url_path.endswith(".html"):
+                # Pretty URLs: /about for about.html
+                paths.add(url_path[:-len(".html")])
+        return paths
+
+    def broken_links(self, static_files=()):
+        """
+        Find internal URLs that match neither a page nor a static file.
+
+        Args:
+            static_files: Paths of the static files, relative to the site
+                          root, with "/" separators
+
+        Returns:
+            A sorted list of (source path, url) tuples
+        """
+        existing = self._existing_paths(static_files)
+        broken = set()
+        for page_path, (src_path, _) in self.pages.items():
+            for url, target in self._targets(page_path):
+                if target not in existing:
+                    broken.add((src_path, url))
+        return sorted(broken)
+
+    def unreferenced_assets(self, static_files, extensions=IMAGE_EXTENSIONS):
+        """
+        Find static files of the given types that no page references.
+
+        Returns:
+            A sorted list of paths relative to the site root
+        """
+        referenced = set()
+        for page_path in self.pages:
+            referenced.update(target for _, target in self._targets(page_path))
+        return sorted(
+            path for path in static_files
+            if os.path.splitext(path)[1].lower() in extensions and path not in referenced
+        )
+
+    def write_sitemap(self, path, basepath="/", site_url=""):
+        """
+        Write a sitemap.xml listing every page.
+
+        Args:
+            path: Where to write the sitemap
+            basepath: The base URL path of the site
+            site_url: The scheme and host (e.g. "https://example.com")
+
+        Raises:
+            ValueError: If site_url is empty; the sitemap protocol only
+                        allows absolute URLs
+        """
+        if not site_url:
+            raise ValueError("a sitemap needs the site URL for absolute <loc> URLs")
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+        ]
+        for page_path in sorted(self.pages, key=page_url):
+            loc = site_url.rstrip("/") + basepath + page_url(page_path)[1:]
+            lines.append(f"  <url><loc>{escape(loc)}</loc></url>")
+        lines.append("</urlset>")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
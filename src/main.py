@@ -1,9 +1,116 @@
+import io
 import os
 import sys
+import mmap
+import time
 import shutil
-from block_markdown import markdown_to_html_node, extract_title
+import argparse
+from functools import partial
+from contextlib import redirect_stderr, redirect_stdout, suppress
+from concurrent.futures import ProcessPoolExecutor
+from build_manifest import BuildManifest, generator_version
+from static_sync import sync_static, scan_files
+from precompress import precompress_outputs, GZIP_SUFFIX
+from png_optimize import optimize_images
+from template import load_template, TemplateResolver
+from url_resolver import URLResolver
+from link_graph import LinkGraph, SITEMAP_FILENAME
+from dev_server import ReloadNotifier, start_server, watch
+from build_daemon import DaemonServer
+from async_build import run_pipeline
+from block_cache import BlockCache, DEFAULT_MAX_BYTES
+from ast_cache import AstCache
+from highlight import configure_highlight_cache, highlight_cache
+from build_stats import BuildStats, PageStats
+from htmlnode import escape_html
+import instrument
+from instrument import traced, register_traced
+from block_markdown import (
+    markdown_stream_to_html,
+    markdown_buffer_to_html,
+    extract_title,
+    extract_title_from_buffer,
+)
 
+register_traced(globals(), "sync_static", "precompress_outputs")
 
+
+# Sources at least this big are memory-mapped and rendered block by
+# block instead of being read into memory whole
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+# Rendered block HTML shared by every page rendered in this process
+_block_cache = BlockCache()
+
+# Parsed documents on disk, or None to parse every page (see ast_cache)
+_ast_cache = None
+
+# static dir -> paths of its files, see _static_files
+_static_index = {}
+
+
+def configure_block_cache(max_bytes):
+    """
+    Replace this process's block cache with an empty one of a new size.
+    
+    Also used as the process pool initializer, so every worker gets a
+    cache with the same budget.
+    
+    Args:
+        max_bytes: Memory budget in bytes; 0 disables the cache
+    """
+    global _block_cache
+    _block_cache = BlockCache(max_bytes)
+
+
+def configure_ast_cache(cache_dir):
+    """
+    Render pages through an on-disk AST cache in cache_dir (None: don't).
+    
+    Pages whose trees are cached are loaded from disk instead of being
+    parsed at all; the rest still go through the in-memory block cache.
+    """
+    global _ast_cache
+    _ast_cache = AstCache(cache_dir) if cache_dir is not None else None
+
+
+def _configure_worker(block_cache_bytes, ast_cache_dir, highlight_cache_dir):
+    """Process pool initializer: give every worker the parent's caches."""
+    configure_block_cache(block_cache_bytes)
+    configure_ast_cache(ast_cache_dir)
+    configure_highlight_cache(highlight_cache_dir)
+
+
+def block_cache_stats():
+    """Return the hit/miss statistics of this process's block cache."""
+    return _block_cache.stats()
+
+
+def _render_counts():
+    """Snapshot the cache counters that _page_stats turns into per-page numbers."""
+    ast_counts = (0, 0, 0)
+    if _ast_cache is not None:
+        ast_counts = (_ast_cache.hits, _ast_cache.misses, _ast_cache.blocks_rendered)
+    highlights = highlight_cache()
+    return (_block_cache.hits, _block_cache.misses) + ast_counts + (
+        highlights.hits + highlights.disk_hits, highlights.misses,
+    )
+
+
+def _page_stats(start, counts_before, bytes_in, bytes_out):
+    """Build a page's PageStats from the clock and _render_counts() at its start."""
+    hits, misses, ast_hits, ast_misses, ast_blocks, highlight_hits, highlight_misses = (
+        after - before for after, before in zip(_render_counts(), counts_before)
+    )
+    ast_cache_hit = bool(ast_hits) if ast_hits or ast_misses else None
+    return PageStats(
+        time.perf_counter() - start, hits + misses + ast_blocks, hits,
+        bytes_in, bytes_out, ast_cache_hit,
+        highlight_hits + highlight_misses, highlight_hits,
+    )
+
+
+@traced("copy_static_to_public")
 def copy_static_to_public(src_dir, dest_dir):
     """
     Recursively copy all contents from source directory to destination directory.
@@ -67,83 +174,564 @@ def generate_page(from_path, template_path, dest_path, basepath="/"):
         basepath: The base URL path for the site (default: "/")
     """
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    render_page(from_path, template_path, dest_path, basepath)
+    print(f"Page generated successfully at {dest_path}")
+
+
+@traced("page", span_args=lambda from_path, *args, **kwargs: {"path": from_path}, page=True)
+def render_page(from_path, template_path, dest_path, basepath="/", url_resolver=None):
+    """
+    Render a markdown file into an HTML page without printing progress.
+    
+    Args:
+        from_path: Path to the markdown file
+        template_path: Path to the HTML template file
+        dest_path: Path where the generated HTML should be written
+        basepath: The base URL path for the site (default: "/")
+        url_resolver: URLResolver to use instead of one for basepath
+                      (e.g. for relative URLs)
+    
+    Returns:
+        The page's PageStats (time, block count, bytes in and out)
+    """
+    start = time.perf_counter()
+    counts = _render_counts()
+    size = os.path.getsize(from_path)
+    if size >= MMAP_THRESHOLD:
+        written = _render_mapped_page(
+            from_path, template_path, dest_path, basepath, url_resolver
+        )
+        return _page_stats(start, counts, size, written)
     
     # Read the markdown file
-    with open(from_path, 'r') as f:
-        markdown_content = f.read()
+    markdown_content = _read_text(from_path)
+    
+    chunks = render_page_chunks(markdown_content, template_path, basepath, url_resolver)
+    
+    # Stream the generated HTML to the destination
+    written = _write_chunks(dest_path, chunks)
+    return _page_stats(start, counts, size, written)
+
+
+@traced("read", span_args=lambda path: {"path": path})
+def _read_text(path):
+    """Read a whole text file."""
+    with open(path, 'r') as f:
+        return f.read()
+
+
+@traced("write", span_args=lambda path, chunks: {"path": path}, result_counter="bytes_written")
+def _write_chunks(path, chunks):
+    """
+    Write an iterable of string chunks to path, creating parent directories.
     
-    # Read the template file
-    with open(template_path, 'r') as f:
-        template_content = f.read()
+    Returns:
+        The number of bytes written
+    """
+    _make_parent_dirs(path)
+    with open(path, 'w') as f:
+        for chunk in chunks:
+            f.write(chunk)
+        return f.tell()
+
+
+def _render_mapped_page(from_path, template_path, dest_path, basepath="/", url_resolver=None):
+    """
+    Render a huge markdown file through an mmap, one block at a time.
     
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+    Blocks are located as byte spans in the mapped file and decoded only
+    when they are rendered, so neither the source nor the page is ever
+    held in memory whole. The page is written to a temporary file and
+    moved into place once complete, so a failure can't leave half a page.
     
-    # Extract the title
-    title = extract_title(markdown_content)
+    Returns:
+        The number of bytes written
+    """
+    if url_resolver is None:
+        url_resolver = URLResolver(basepath)
+    template = load_template(template_path)
+    tmp_path = dest_path + ".tmp"
+    with open(from_path, 'rb') as f, _map_file(f) as buffer:
+        title = escape_html(extract_title_from_buffer(buffer))
+        content_chunks = _block_cache.iter_render_buffer(buffer, url_resolver)
+        chunks = template.iter_render(
+            {"Title": title, "Content": content_chunks}, url_resolver
+        )
+        try:
+            written = _write_chunks(tmp_path, chunks)
+        except BaseException:
+            # The temp file may not exist yet (e.g. its directory failed)
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, dest_path)
+    return written
+
+
+def _map_file(f):
+    """Memory-map an open (non-empty) file read-only for one forward scan."""
+    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        # Read ahead aggressively and let pages already scanned go first
+        buffer.madvise(mmap.MADV_SEQUENTIAL)
+    return buffer
+
+
+def render_page_chunks(markdown_content, template_path, basepath="/", url_resolver=None):
+    """
+    Parse a markdown page and return an iterator over its final HTML.
     
-    # Replace placeholders in template
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
+    Parsing and title extraction happen up front, so errors are raised
+    here rather than halfway through writing the page.
     
-    # Replace absolute paths with basepath
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
+    Args:
+        markdown_content: The page's markdown
+        template_path: Path to the HTML template file
+        basepath: The base URL path for the site (default: "/")
+        url_resolver: URLResolver to use instead of one for basepath
+        
+    Returns:
+        An iterator of HTML string chunks
+    """
+    if url_resolver is None:
+        url_resolver = URLResolver(basepath)
     
-    # Create destination directory if it doesn't exist
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
+    # Load the compiled template (cached across pages)
+    template = load_template(template_path)
     
-    # Write the generated HTML to the destination
-    with open(dest_path, 'w') as f:
-        f.write(final_html)
+    # Convert markdown to HTML, reusing documents parsed in earlier builds
+    # or blocks already rendered this build. Link and image URLs are
+    # resolved as their nodes are created.
+    if _ast_cache is not None:
+        content_chunks = _ast_cache.render_markdown(
+            markdown_content, url_resolver, _block_cache
+        )
+    else:
+        content_chunks = _block_cache.render_markdown(markdown_content, url_resolver)
     
-    print(f"Page generated successfully at {dest_path}")
+    # Extract the title; it is inserted into the template as HTML
+    title = escape_html(extract_title(markdown_content))
+    
+    return template.iter_render(
+        {"Title": title, "Content": content_chunks}, url_resolver
+    )
+
+
+def _make_parent_dirs(path):
+    """Create the directory containing path if it doesn't exist."""
+    dest_dir = os.path.dirname(path)
+    if dest_dir and not os.path.exists(dest_dir):
+        os.makedirs(dest_dir, exist_ok=True)
+
+
+class PageGenerationError(Exception):
+    """Raised after a build in which one or more pages failed to render."""
 
+    def __init__(self, failures):
+        self.failures = failures
+        paths = ", ".join(src_path for src_path, _ in failures)
+        super().__init__(f"{len(failures)} page(s) failed to generate: {paths}")
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
+
+def discover_pages(dir_path_content, dest_dir_path):
     """
-    Recursively generate HTML pages from all markdown files in a directory.
+    Find every markdown file under a content directory.
+    
+    Destination directories are created along the way, mirroring the
+    content tree.
     
     Args:
         dir_path_content: Path to the content directory containing markdown files
-        template_path: Path to the HTML template file
         dest_dir_path: Path to the destination directory for generated HTML files
-        basepath: The base URL path for the site (default: "/")
+        
+    Returns:
+        A list of (src_path, dest_path) tuples, sorted by source path
     """
-    # List all items in the content directory
-    items = os.listdir(dir_path_content)
-    
-    for item in items:
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
         src_path = os.path.join(dir_path_content, item)
         
         if os.path.isfile(src_path):
-            # It's a file - check if it's a markdown file
+            # Convert .md extension to .html
             if item.endswith('.md'):
-                # Convert .md extension to .html
-                dest_filename = item[:-3] + '.html'
-                dest_path = os.path.join(dest_dir_path, dest_filename)
-                
-                # Generate the HTML page
-                generate_page(src_path, template_path, dest_path, basepath)
+                dest_path = os.path.join(dest_dir_path, item[:-3] + '.html')
+                pages.append((src_path, dest_path))
         else:
-            # It's a directory - create corresponding directory in dest and recurse
+            # Create the corresponding directory in dest and recurse
             new_dest_dir = os.path.join(dest_dir_path, item)
             if not os.path.exists(new_dest_dir):
                 os.makedirs(new_dest_dir)
-            
-            # Recursively process the subdirectory
-            generate_pages_recursive(src_path, template_path, new_dest_dir, basepath)
+            pages.extend(discover_pages(src_path, new_dest_dir))
+    return pages
+
+
+def _render_page_task(task):
+    """
+    Render one page inside a worker.
+    
+    Exceptions are turned into strings here so one broken page never
+    takes down the pool or the results of the other pages.
+    
+    Returns:
+        (error message or None, the URLs the page references or None,
+        PageStats or None), since a worker's copy of the task's
+        URLResolver doesn't make it back to the parent process
+    """
+    src_path, template_path, dest_path, url_resolver = task
+    try:
+        page_stats = render_page(
+            src_path, template_path, dest_path, url_resolver=url_resolver
+        )
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", None, None
+    return None, url_resolver.references, page_stats
+
+
+def _task_errors(tasks, results, page_stats):
+    """Yield the error of each _render_page_task result, keeping its URLs and stats."""
+    for task, (error, references, stats) in zip(tasks, results):
+        if references is not None:
+            task[3].references = references
+        if stats is not None:
+            page_stats[task[0]] = stats
+        yield error
+
+
+def _read_page_source(task):
+    return _read_text(task[0])
+
+
+def _render_page_source(task, markdown_content, page_stats):
+    src_path, template_path, _, url_resolver = task
+    start = time.perf_counter()
+    counts = _render_counts()
+    html = "".join(
+        render_page_chunks(markdown_content, template_path, url_resolver=url_resolver)
+    )
+    page_stats[src_path] = _page_stats(
+        start, counts, len(markdown_content.encode()), 0
+    )
+    return html
+
+
+def _write_page_output(task, html, page_stats):
+    start = time.perf_counter()
+    written = _write_chunks(task[2], (html,))
+    stats = page_stats[task[0]]
+    # Reads overlap other pages' rendering, so only the write is added
+    page_stats[task[0]] = stats._replace(
+        seconds=stats.seconds + time.perf_counter() - start, bytes_out=written
+    )
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/", jobs=1, manifest_path=None, async_io=False, relative_urls=False, link_graph=None, build_stats=None):
+    """
+    Recursively generate HTML pages from all markdown files in a directory.
+    
+    All pages are discovered first, then rendered either serially or on
+    a process pool. Each page uses the nearest template.html in its
+    content directory or above, falling back to template_path. Progress
+    and errors are always reported in source path order, and a failing
+    page does not stop the others.
+    
+    With a manifest_path, the build is incremental: pages whose source,
+    template, basepath and generator code are unchanged are skipped, and
+    outputs of deleted sources are removed.
+    
+    Args:
+        dir_path_content: Path to the content directory containing markdown files
+        template_path: Path to the default HTML template file
+        dest_dir_path: Path to the destination directory for generated HTML files
+        basepath: The base URL path for the site (default: "/")
+        jobs: Number of worker processes; 1 renders in this process,
+              0 uses one worker per CPU
+        manifest_path: Path of the build manifest JSON file, or None to
+                       always rebuild every page
+        async_io: Overlap file reads and writes with rendering on an
+                  asyncio pipeline (see async_build); ignores jobs
+        relative_urls: Write site-absolute URLs relative to each page
+                       instead of prefixing them with basepath
+        link_graph: Optional LinkGraph to add every page and the URLs it
+                    references to, collected while rendering
+        build_stats: Optional BuildStats to add every rendered page's
+                     PageStats and the number of unchanged pages to
+        
+    Raises:
+        PageGenerationError: If any page failed, after all pages were tried
+    """
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    
+    resolver = TemplateResolver(dir_path_content, template_path)
+    
+    manifest = None
+    if manifest_path is not None:
+        url_mode = "relative" if relative_urls else basepath
+        manifest = BuildManifest(manifest_path, generator_version(), url_mode)
+    
+    tasks = []
+    input_hashes = {}
+    page_paths = {}
+    for src_path, dest_path in pages:
+        page_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+        page_paths[src_path] = page_path
+        page_template_path = resolver.resolve(src_path)
+        if manifest is not None:
+            source_hash = manifest.file_hash(src_path)
+            template_hash = manifest.file_hash(page_template_path)
+            references = manifest.previous_references(src_path)
+            if (
+                manifest.is_fresh(src_path, dest_path, source_hash, template_hash)
+                and (link_graph is None or references is not None)
+            ):
+                manifest.record(src_path, dest_path, source_hash, template_hash, references)
+                if link_graph is not None:
+                    link_graph.add_page(page_path, src_path, references)
+                continue
+            input_hashes[src_path] = (source_hash, template_hash)
+        url_resolver = URLResolver(
+            basepath,
+            page_path=page_path,
+            relative=relative_urls,
+            references=[] if link_graph is not None else None,
+        )
+        tasks.append((src_path, page_template_path, dest_path, url_resolver))
+    
+    skipped = len(pages) - len(tasks)
+    if skipped:
+        print(f"Skipping {skipped} unchanged page(s)")
+    
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    
+    page_stats = {}
+    if async_io:
+        errors = run_pipeline(
+            tasks,
+            _read_page_source,
+            partial(_render_page_source, page_stats=page_stats),
+            partial(_write_page_output, page_stats=page_stats),
+        )
+        failures = _report_page_results(tasks, errors)
+    elif jobs == 1 or len(tasks) <= 1:
+        results = map(_render_page_task, tasks)
+        failures = _report_page_results(tasks, _task_errors(tasks, results, page_stats))
+    else:
+        # Several pages per task keeps pickling overhead low for big sites
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_configure_worker,
+            initargs=(
+                _block_cache.max_bytes,
+                _ast_cache.cache_dir if _ast_cache is not None else None,
+                highlight_cache().cache_dir,
+            ),
+        ) as executor:
+            results = executor.map(_render_page_task, tasks, chunksize=chunksize)
+            failures = _report_page_results(tasks, _task_errors(tasks, results, page_stats))
+    
+    failed_paths = {src_path for src_path, _ in failures}
+    if build_stats is not None:
+        build_stats.pages_skipped += skipped
+        for src_path, _, _, _ in tasks:
+            if src_path not in failed_paths:
+                build_stats.add_page(src_path, page_stats[src_path])
+    if link_graph is not None:
+        for src_path, _, _, url_resolver in tasks:
+            # A failed page still exists as a link target, just without links
+            references = () if src_path in failed_paths else url_resolver.references
+            link_graph.add_page(page_paths[src_path], src_path, references)
+    
+    if manifest is not None:
+        for src_path, _, dest_path, url_resolver in tasks:
+            if src_path not in failed_paths:
+                manifest.record(
+                    src_path, dest_path, *input_hashes[src_path], url_resolver.references
+                )
+        for dest_path in manifest.stale_outputs():
+            if os.path.exists(dest_path):
+                print(f"Removing stale page: {dest_path}")
+                os.remove(dest_path)
+        manifest.save()
+    
+    if failures:
+        raise PageGenerationError(failures)
+
+
+def _report_page_results(tasks, errors):
+    """Print one line per page in task order and collect the failures."""
+    failures = []
+    for (src_path, _, dest_path, _), error in zip(tasks, errors):
+        if error is None:
+            print(f"Generated page {dest_path} from {src_path}")
+        else:
+            print(f"Failed to generate page from {src_path}: {error}", file=sys.stderr)
+            failures.append((src_path, error))
+    return failures
+
+
+def md2html(in_file=None, out_file=None):
+    """
+    Convert markdown to HTML as a stream, block by block.
+    
+    Usage: python3 src/main.py md2html [input.md] > output.html
+    
+    A named input file is memory-mapped (see markdown_buffer_to_html);
+    without one, markdown is read from stdin line by line.
+    
+    Args:
+        in_file: Path of a markdown file, or a readable text file of
+                 markdown (default: sys.stdin)
+        out_file: Writable text file for the HTML (default: sys.stdout)
+    """
+    in_file = in_file or sys.stdin
+    out_file = out_file or sys.stdout
+    if isinstance(in_file, str):
+        _md2html_mapped(in_file, out_file)
+    else:
+        markdown_stream_to_html(in_file, out_file)
+    out_file.write("\n")
+
+
+def _md2html_mapped(path, out_file):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap can't map an empty file
+            out_file.write("<div></div>")
+            return
+        with _map_file(f) as buffer:
+            markdown_buffer_to_html(buffer, out_file)
+
+
+def _whole_number(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {value!r}")
+
+
+def _job_count(value):
+    """argparse type for --jobs: a whole number of processes, 0 or more."""
+    jobs = _whole_number(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 (one per CPU) or more, not {jobs}")
+    return jobs
+
+
+def _page_count(value):
+    """argparse type for --stats-top: a whole number of pages, 0 or more."""
+    pages = _whole_number(value)
+    if pages < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {pages}")
+    return pages
 
 
 def main():
     """Main function to generate the static site."""
-    # Get basepath from command line arguments, default to "/"
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    # Stream mode: convert markdown from stdin to HTML on stdout
+    if len(sys.argv) > 1 and sys.argv[1] == "md2html":
+        md2html(sys.argv[2] if len(sys.argv) > 2 else None)
+        return
+    
+    parser = argparse.ArgumentParser(description="Generate the static site.")
+    parser.add_argument(
+        "basepath", nargs="?", default="/",
+        help='base URL path for the site (default: "/")',
+    )
+    parser.add_argument(
+        "--relative-urls", action="store_true",
+        help="write site-absolute links relative to each page instead of using basepath",
+    )
+    parser.add_argument(
+        "--site-url", default="",
+        help="scheme and host of the site (e.g. https://example.com); "
+             "sitemap.xml is only written when it is given",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="ignore the build manifest and regenerate every page",
+    )
+    parser.add_argument(
+        "--clean", action="store_true",
+        help="delete the output directory and rebuild it from scratch",
+    )
+    parser.add_argument(
+        "--checksum", action="store_true",
+        help="compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--link-static", action="store_true",
+        help="hardlink static files into the output directory where possible",
+    )
+    parser.add_argument(
+        "--optimize-images", action="store_true",
+        help="losslessly recompress PNG files from static (cached by content hash)",
+    )
+    parser.add_argument(
+        "--image-cache", metavar="DIR",
+        help="where optimized images are cached (default: .asset_cache/png)",
+    )
+    parser.add_argument(
+        "--gzip", action="store_true",
+        help="write precompressed .gz siblings of compressible output files",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=_job_count, default=1,
+        help="render pages on N worker processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--async-io", action="store_true",
+        help="overlap page reads and writes with rendering (for slow storage)",
+    )
+    parser.add_argument(
+        "--block-cache-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20,
+        help="memory budget of the rendered block cache per process, "
+             "0 disables it (default: %(default)g)",
+    )
+    parser.add_argument(
+        "--ast-cache", metavar="DIR",
+        help="where parsed pages are cached across builds (default: .asset_cache/ast)",
+    )
+    parser.add_argument(
+        "--no-ast-cache", action="store_true",
+        help="parse every rendered page instead of loading cached trees",
+    )
+    parser.add_argument(
+        "--highlight-cache", metavar="DIR",
+        help="where highlighted code snippets are cached across builds "
+             "(default: .asset_cache/highlight)",
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH",
+        help="record span timings and counters to a Chrome trace JSON file",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="print stage timings, throughput, cache hit rates and the slowest pages",
+    )
+    parser.add_argument(
+        "--stats-json", metavar="PATH",
+        help="also write the --stats report to a JSON file (implies --stats)",
+    )
+    parser.add_argument(
+        "--stats-top", type=_page_count, default=10, metavar="N",
+        help="how many of the slowest pages --stats lists (default: 10)",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="serve the site, rebuild on changes and live-reload open pages",
+    )
+    parser.add_argument(
+        "--daemon", metavar="SOCKET",
+        help="after building, stay running and rebuild on requests sent to "
+             "this Unix socket (see build_daemon.py)",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8888,
+        help="port for the --watch dev server (default: 8888)",
+    )
+    args = parser.parse_args()
+    basepath = args.basepath
     
     print(f"Starting static site generation with basepath: {basepath}")
     
@@ -156,14 +744,286 @@ def main():
     docs_dir = os.path.join(root_dir, "docs")
     content_dir = os.path.join(root_dir, "content")
     template_path = os.path.join(root_dir, "template.html")
+    manifest_path = os.path.join(root_dir, ".build_manifest.json")
+    gzip_cache_path = os.path.join(root_dir, ".precompress_cache.json")
+    if args.image_cache is None:
+        args.image_cache = os.path.join(root_dir, ".asset_cache", "png")
+    if args.ast_cache is None:
+        args.ast_cache = os.path.join(root_dir, ".asset_cache", "ast")
+    if args.highlight_cache is None:
+        args.highlight_cache = os.path.join(root_dir, ".asset_cache", "highlight")
+    if (args.force or args.clean) and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    
+    configure_block_cache(int(args.block_cache_mb * 2**20))
+    configure_ast_cache(None if args.no_ast_cache else args.ast_cache)
+    if _ast_cache is not None:
+        _ast_cache.prune()
+    configure_highlight_cache(args.highlight_cache)
+    highlight_cache().prune()
+    
+    if args.trace:
+        if args.jobs != 1:
+            print("Note: pages rendered in worker processes are not traced", file=sys.stderr)
+        instrument.enable()
+    
+    build_stats = BuildStats()
     
     # Copy static files to docs directory
-    copy_static_to_public(static_dir, docs_dir)
+    with build_stats.stage("static"):
+        if args.clean:
+            copy_static_to_public(static_dir, docs_dir)
+            if args.optimize_images:
+                # Swap the plain copies of the images for optimized ones
+                _sync_static_files(static_dir, docs_dir, content_dir, args)
+        else:
+            _sync_static_files(static_dir, docs_dir, content_dir, args)
     
     # Generate all pages recursively
-    generate_pages_recursive(content_dir, template_path, docs_dir, basepath)
+    failed = False
+    link_graph = LinkGraph()
+    try:
+        with build_stats.stage("pages"):
+            generate_pages_recursive(
+                content_dir, template_path, docs_dir, basepath,
+                jobs=args.jobs, manifest_path=manifest_path, async_io=args.async_io,
+                relative_urls=args.relative_urls, link_graph=link_graph,
+                build_stats=build_stats,
+            )
+    except PageGenerationError as e:
+        print(f"\n{e}", file=sys.stderr)
+        failed = True
+    
+    with build_stats.stage("links"):
+        _check_links_and_write_sitemap(link_graph, static_dir, docs_dir, args)
+    
+    if args.jobs == 1 or args.async_io:
+        _print_block_cache_stats()
+    
+    if args.gzip:
+        with build_stats.stage("gzip"):
+            _precompress(docs_dir, gzip_cache_path, build_stats)
+    
+    if args.stats or args.stats_json:
+        print(f"\n{build_stats.format_report(args.stats_top)}")
+        if args.stats_json:
+            build_stats.write_json(args.stats_json, args.stats_top)
+            print(f"Stats written to {args.stats_json}")
+    
+    if args.trace:
+        instrument.export_chrome_trace(args.trace)
+        instrument.disable()
+        print(f"Trace written to {args.trace}")
+    
+    if failed and not (args.watch or args.daemon):
+        sys.exit(1)
     
     print("\nStatic site generation complete!")
+    
+    if args.watch:
+        watch_site(
+            static_dir, content_dir, template_path, docs_dir, manifest_path,
+            gzip_cache_path, args,
+        )
+    elif args.daemon:
+        serve_daemon(
+            args.daemon, static_dir, content_dir, template_path, docs_dir,
+            manifest_path, gzip_cache_path, args,
+        )
+
+
+def _print_block_cache_stats():
+    stats = block_cache_stats()
+    if stats["hits"] or stats["misses"]:
+        print(
+            f"Block cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries, "
+            f"{stats['bytes'] / 2**20:.1f} MB"
+        )
+
+
+def _static_files(static_dir, refresh=False):
+    """
+    Return the paths of the static files, relative to static_dir.
+    
+    The scan is kept in memory until refresh=True, so link checks after
+    a content-only rebuild don't walk the static tree again.
+    """
+    static_files = _static_index.get(static_dir)
+    if static_files is None or refresh:
+        static_files = _static_index[static_dir] = [
+            rel_path.replace(os.sep, "/") for rel_path in scan_files(static_dir)[0]
+        ]
+    return static_files
+
+
+def _check_links_and_write_sitemap(link_graph, static_dir, docs_dir, args):
+    """Report broken links and unused images, then write sitemap.xml (with --site-url)."""
+    static_files = _static_files(static_dir)
+    for src_path, url in link_graph.broken_links(static_files):
+        print(f"Broken link in {src_path}: {url}", file=sys.stderr)
+    for rel_path in link_graph.unreferenced_assets(static_files):
+        print(f"Unreferenced image: {os.path.join(static_dir, rel_path)}")
+    if not args.site_url:
+        print(f"Not writing {SITEMAP_FILENAME}: it needs absolute URLs, pass --site-url")
+        return
+    link_graph.write_sitemap(
+        os.path.join(docs_dir, SITEMAP_FILENAME), args.basepath, args.site_url
+    )
+
+
+def _precompress(docs_dir, cache_path, build_stats=None):
+    """Write .gz siblings for every compressible file in docs."""
+    stats = precompress_outputs(docs_dir, cache_path)
+    if build_stats is not None:
+        lookups = stats["compressed"] + stats["reused"] + stats["skipped"]
+        build_stats.add_cache("gzip", stats["reused"], lookups)
+    print(
+        f"Precompressed {stats['compressed']} file(s), reused {stats['reused']}, "
+        f"skipped {stats['skipped']} that would not shrink"
+    )
+
+
+def _sync_static_files(static_dir, docs_dir, content_dir, args):
+    """Sync static files into docs, keeping the generated pages in place."""
+    pages = discover_pages(content_dir, docs_dir)
+    keep = [dest_path for _, dest_path in pages]
+    if args.site_url:
+        # Without it a sitemap from an earlier build is stale: let it go
+        keep.append(os.path.join(docs_dir, SITEMAP_FILENAME))
+    substitutes = None
+    if args.optimize_images:
+        substitutes = optimize_images(static_dir, args.image_cache)
+    _static_files(static_dir, refresh=True)
+    sync_static(
+        static_dir, docs_dir,
+        keep=keep,
+        checksum=args.checksum, link=args.link_static,
+        keep_suffixes=(GZIP_SUFFIX,) if args.gzip else (),
+        substitutes=substitutes,
+    )
+
+
+def _rebuild(changed, static_dir, content_dir, template_path, docs_dir, manifest_path, gzip_cache_path, args, build_stats=None):
+    """
+    Bring docs up to date after files changed.
+    
+    Static changes only re-sync assets. Content or template changes go
+    through the build manifest, so only pages whose source or resolved
+    template changed are re-rendered, and deleted pages are removed.
+    
+    Args:
+        changed: The changed file paths, or None to check everything
+        build_stats: Optional BuildStats to record the stages and pages in
+        
+    Returns:
+        True if every page was generated
+    """
+    if build_stats is None:
+        build_stats = BuildStats()
+    static_prefix = os.path.join(static_dir, "")
+    ok = True
+    if changed is None or any(path.startswith(static_prefix) for path in changed):
+        with build_stats.stage("static"):
+            _sync_static_files(static_dir, docs_dir, content_dir, args)
+    if changed is None or any(not path.startswith(static_prefix) for path in changed):
+        link_graph = LinkGraph()
+        try:
+            with build_stats.stage("pages"):
+                generate_pages_recursive(
+                    content_dir, template_path, docs_dir, args.basepath,
+                    manifest_path=manifest_path, relative_urls=args.relative_urls,
+                    link_graph=link_graph, build_stats=build_stats,
+                )
+        except PageGenerationError as e:
+            print(e, file=sys.stderr)
+            ok = False
+        with build_stats.stage("links"):
+            _check_links_and_write_sitemap(link_graph, static_dir, docs_dir, args)
+    if args.gzip:
+        with build_stats.stage("gzip"):
+            _precompress(docs_dir, gzip_cache_path, build_stats)
+    return ok
+
+
+def watch_site(static_dir, content_dir, template_path, docs_dir, manifest_path, gzip_cache_path, args):
+    """
+    Serve docs, rebuild whatever changed and live-reload open pages.
+    
+    See _rebuild for what a change to each kind of file rebuilds.
+    """
+    notifier = ReloadNotifier()
+    start_server(docs_dir, args.port, notifier)
+    print(f"Serving {docs_dir} at http://localhost:{args.port}/ (Ctrl+C to stop)")
+    
+    def rebuild(changed):
+        start = time.perf_counter()
+        try:
+            _rebuild(
+                changed, static_dir, content_dir, template_path, docs_dir,
+                manifest_path, gzip_cache_path, args,
+            )
+        except Exception as e:
+            # e.g. a file vanishing mid-save; keep serving and watching
+            print(f"Rebuild failed: {type(e).__name__}: {e}", file=sys.stderr)
+            return
+        notifier.notify()
+        print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    try:
+        watch([static_dir, content_dir, template_path], rebuild)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def serve_daemon(socket_path, static_dir, content_dir, template_path, docs_dir, manifest_path, gzip_cache_path, args):
+    """
+    Keep the generator warm in this process and rebuild on request.
+    
+    Listens on a Unix socket (see build_daemon for the protocol). Between
+    requests the process keeps everything a fresh build would pay for
+    again: imported modules, the block cache of rendered blocks (so an
+    edited page only re-renders the blocks that changed), compiled
+    templates, the generator version and the static file index. Pages
+    are rendered in this process, so the caches stay warm.
+    """
+    started = time.perf_counter()
+    state = {"builds": 0, "last_build": None}
+    
+    def rebuild(paths):
+        changed = [os.path.abspath(path) for path in paths] or None
+        build_stats = BuildStats()
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(output):
+            ok = _rebuild(
+                changed, static_dir, content_dir, template_path, docs_dir,
+                manifest_path, gzip_cache_path, args, build_stats,
+            )
+        state["builds"] += 1
+        state["last_build"] = build_stats.summary(args.stats_top)
+        return {"ok": ok, "output": output.getvalue(), "stats": state["last_build"]}
+    
+    def handle_command(command, command_args):
+        if command == "rebuild":
+            return rebuild(command_args)
+        if command == "stats":
+            return {
+                "ok": True,
+                "uptime_seconds": time.perf_counter() - started,
+                "builds": state["builds"],
+                "last_build": state["last_build"],
+                "block_cache": block_cache_stats(),
+                "highlight_cache": highlight_cache().stats(),
+            }
+        raise ValueError(f"unknown command: {command}")
+    
+    server = DaemonServer(socket_path, handle_command)
+    print(f"Build daemon listening on {socket_path} (Ctrl+C to stop)")
+    try:
+        server.serve_until_stopped()
+    except KeyboardInterrupt:
+        pass
+    print("\nBuild daemon stopped.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,376 @@
+"""
+Lossless PNG optimization in pure Python (struct + zlib).
+
+optimize_png() rewrites a PNG without touching its pixels:
+
+1. Metadata chunks (text, timestamps, EXIF, physical size, ...) are
+   dropped. Ancillary chunks that change what the pixels look like
+   (transparency and colour space) are kept.
+2. The scanlines are decoded and re-filtered, choosing a filter per row
+   with the minimum-sum-of-absolute-differences heuristic libpng uses.
+3. The image data is recompressed into a single IDAT at zlib level 9
+   with a few strategies, keeping whichever stream is smallest.
+
+The result is never larger than the input; if nothing is gained the
+original bytes are returned as-is.
+"""
+import os
+import zlib
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from build_manifest import hash_file
+from static_sync import scan_files
+
+
+# Bump when the optimizer's output changes, so cached results are redone
+OPTIMIZER_VERSION = 1
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Ancillary chunks that affect how pixels are displayed
+KEEP_CHUNKS = frozenset({b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP"})
+
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# (strategy, memLevel) combinations to try; level is always 9
+_ZLIB_SETTINGS = (
+    (zlib.Z_DEFAULT_STRATEGY, 9),
+    (zlib.Z_FILTERED, 9),
+)
+
+# min(b, 256 - b): the magnitude of each byte read as a signed delta
+_ABS_DELTA = bytes(min(i, 256 - i) for i in range(256))
+
+
+def read_chunks(data):
+    """
+    Split PNG data into its chunks.
+
+    Returns:
+        A list of (chunk type, chunk data) tuples, in file order
+
+    Raises:
+        ValueError: If data is not a well-formed PNG
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("invalid PNG: bad signature")
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        if pos + 12 > len(data):
+            raise ValueError("invalid PNG: truncated chunk")
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        crc, = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        if len(body) != length or zlib.crc32(chunk_type + body) != crc:
+            raise ValueError(f"invalid PNG: bad {chunk_type!r} chunk")
+        chunks.append((chunk_type, body))
+        pos += 12 + length
+        if chunk_type == b"IEND":
+            break
+    if not chunks or chunks[0][0] != b"IHDR" or chunks[-1][0] != b"IEND":
+        raise ValueError("invalid PNG: missing IHDR or IEND")
+    return chunks
+
+
+def _chunk(chunk_type, body):
+    return (
+        struct.pack(">I", len(body)) + chunk_type + body
+        + struct.pack(">I", zlib.crc32(chunk_type + body))
+    )
+
+
+def _row_geometry(ihdr):
+    """Return (height, bytes per row, bytes per complete pixel) for an IHDR."""
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", ihdr[:10])
+    bits_per_pixel = bit_depth * _CHANNELS[color_type]
+    return height, (width * bits_per_pixel + 7) // 8, max(1, bits_per_pixel // 8)
+
+
+# Byte-wise arithmetic modulo 256 on whole rows at once, by treating a
+# row as one big integer with 8-bit lanes (SWAR)
+
+def _lane_masks(length):
+    return int.from_bytes(b"\x7f" * length, "big"), int.from_bytes(b"\x80" * length, "big")
+
+
+def _add_rows(a, b, length):
+    low, high = _lane_masks(length)
+    return ((a & low) + (b & low)) ^ ((a ^ b) & high)
+
+
+def _sub_rows(a, b, length):
+    low, high = _lane_masks(length)
+    return ((a | high) - (b & low)) ^ ((a ^ ~b) & high)
+
+
+def _to_int(row):
+    return int.from_bytes(row, "big")
+
+
+def _to_row(value, length):
+    return value.to_bytes(length, "big")
+
+
+def _unfilter_sub(filtered, bpp):
+    # Each byte adds the reconstructed byte bpp to its left: a prefix sum
+    # per lane, computed in log2(row length) whole-row additions
+    length = len(filtered)
+    value = _to_int(filtered)
+    shift = bpp
+    while shift < length:
+        value = _add_rows(value, value >> (8 * shift), length)
+        shift *= 2
+    return _to_row(value, length)
+
+
+def _unfilter_average(filtered, prev, bpp):
+    row = bytearray(filtered)
+    for i in range(len(row)):
+        left = row[i - bpp] if i >= bpp else 0
+        row[i] = (row[i] + ((left + prev[i]) >> 1)) & 0xff
+    return bytes(row)
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa = abs(p - a)
+    pb = abs(p - b)
+    pc = abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    if pb <= pc:
+        return b
+    return c
+
+
+def _unfilter_paeth(filtered, prev, bpp):
+    row = bytearray(filtered)
+    for i in range(len(row)):
+        if i >= bpp:
+            row[i] = (row[i] + _paeth(row[i - bpp], prev[i], prev[i - bpp])) & 0xff
+        else:
+            row[i] = (row[i] + prev[i]) & 0xff
+    return bytes(row)
+
+
+def unfilter_scanlines(raw, height, row_bytes, bpp):
+    """
+    Undo PNG scanline filtering.
+
+    Args:
+        raw: The decompressed image data (a filter byte before each row)
+        height: Number of rows
+        row_bytes: Bytes per row, excluding the filter byte
+        bpp: Bytes per complete pixel (at least 1)
+
+    Returns:
+        A list of the unfiltered rows, as bytes
+
+    Raises:
+        ValueError: On an unknown filter type or a size mismatch
+    """
+    if len(raw) != height * (row_bytes + 1):
+        raise ValueError("invalid PNG: image data has the wrong size")
+    rows = []
+    prev = bytes(row_bytes)
+    for y in range(height):
+        start = y * (row_bytes + 1)
+        filter_type = raw[start]
+        filtered = raw[start + 1:start + 1 + row_bytes]
+        if filter_type == 0:
+            row = filtered
+        elif filter_type == 1:
+            row = _unfilter_sub(filtered, bpp)
+        elif filter_type == 2:
+            row = _to_row(_add_rows(_to_int(filtered), _to_int(prev), row_bytes), row_bytes)
+        elif filter_type == 3:
+            row = _unfilter_average(filtered, prev, bpp)
+        elif filter_type == 4:
+            row = _unfilter_paeth(filtered, prev, bpp)
+        else:
+            raise ValueError(f"invalid PNG: unknown filter type {filter_type}")
+        rows.append(row)
+        prev = row
+    return rows
+
+
+def _filter_average(row, prev, bpp):
+    out = bytearray(len(row))
+    for i in range(len(row)):
+        left = row[i - bpp] if i >= bpp else 0
+        out[i] = (row[i] - ((left + prev[i]) >> 1)) & 0xff
+    return bytes(out)
+
+
+def _filter_paeth(row, prev, bpp):
+    out = bytearray(len(row))
+    for i in range(len(row)):
+        if i >= bpp:
+            out[i] = (row[i] - _paeth(row[i - bpp], prev[i], prev[i - bpp])) & 0xff
+        else:
+            out[i] = (row[i] - prev[i]) & 0xff
+    return bytes(out)
+
+
+def filter_scanlines(rows, bpp):
+    """
+    Filter rows for compression, picking the best filter per row.
+
+    Every filter type is tried and the one whose output has the smallest
+    sum of absolute (signed) byte values wins, which tends to give the
+    deflate stage long runs of small numbers.
+
+    Returns:
+        The filtered image data, ready for zlib
+    """
+    out = []
+    row_bytes = len(rows[0]) if rows else 0
+    prev = bytes(row_bytes)
+    for row in rows:
+        value = _to_int(row)
+        left = _to_int(bytes(bpp) + row[:-bpp]) if row_bytes > bpp else 0
+        candidates = (
+            (0, row),
+            (1, _to_row(_sub_rows(value, left, row_bytes), row_bytes)),
+            (2, _to_row(_sub_rows(value, _to_int(prev), row_bytes), row_bytes)),
+            (3, _filter_average(row, prev, bpp)),
+            (4, _filter_paeth(row, prev, bpp)),
+        )
+        filter_type, filtered = min(
+            candidates, key=lambda candidate: sum(candidate[1].translate(_ABS_DELTA))
+        )
+        out.append(bytes((filter_type,)))
+        out.append(filtered)
+        prev = row
+    return b"".join(out)
+
+
+def _compress(raw):
+    """Return the smallest zlib stream of raw over the settings tried."""
+    best = None
+    for strategy, mem_level in _ZLIB_SETTINGS:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, mem_level, strategy)
+        stream = compressor.compress(raw) + compressor.flush()
+        if best is None or len(stream) < len(best):
+            best = stream
+    return best
+
+
+def optimize_png(data):
+    """
+    Losslessly shrink a PNG.
+
+    Interlaced images and images with chunks this optimizer doesn't
+    understand (unknown critical chunks, animation) keep their original
+    filtering or are returned unchanged.
+
+    Args:
+        data: The PNG file contents
+
+    Returns:
+        The optimized PNG bytes, or data itself if it couldn't be improved
+
+    Raises:
+        ValueError: If data is not a valid PNG
+    """
+    chunks = read_chunks(data)
+    ihdr = chunks[0][1]
+    head = []
+    idat = []
+    for chunk_type, body in chunks[1:-1]:
+        if chunk_type == b"IDAT":
+            idat.append(body)
+        elif chunk_type == b"PLTE" or chunk_type in KEEP_CHUNKS:
+            if not idat:
+                head.append((chunk_type, body))
+        elif chunk_type == b"acTL" or chunk_type[0] & 0x20 == 0:
+            # Animated, or a critical chunk we can't safely rewrite around
+            return data
+    if not idat:
+        raise ValueError("invalid PNG: no image data")
+
+    try:
+        raw = zlib.decompress(b"".join(idat))
+    except zlib.error as e:
+        raise ValueError(f"invalid PNG: {e}")
+    candidates = [raw]
+    interlaced = ihdr[12]
+    if not interlaced:
+        height, row_bytes, bpp = _row_geometry(ihdr)
+        rows = unfilter_scanlines(raw, height, row_bytes, bpp)
+        candidates.append(filter_scanlines(rows, bpp))
+        if ihdr[9] == 3 or ihdr[8] < 8:
+            # Palette and low bit depth images usually do best unfiltered
+            candidates.append(b"".join(b"\x00" + row for row in rows))
+    stream = min((_compress(candidate) for candidate in candidates), key=len)
+
+    parts = [PNG_SIGNATURE, _chunk(b"IHDR", ihdr)]
+    parts.extend(_chunk(chunk_type, body) for chunk_type, body in head)
+    parts.append(_chunk(b"IDAT", stream))
+    parts.append(_chunk(b"IEND", b""))
+    optimized = b"".join(parts)
+    return optimized if len(optimized) < len(data) else data
+
+
+def _optimize_to_cache(job):
+    """Optimize one image into the cache; runs in a worker process."""
+    src_path, cached_path = job
+    with open(src_path, 'rb') as f:
+        data = f.read()
+    try:
+        optimized = optimize_png(data)
+    except ValueError:
+        # Not a PNG we can read: ship it as it is
+        optimized = data
+    tmp_path = cached_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(optimized)
+    os.replace(tmp_path, cached_path)
+    return len(data), len(optimized)
+
+
+def optimize_images(src_dir, cache_dir, jobs=0):
+    """
+    Optimize every .png under src_dir, reusing results from cache_dir.
+
+    Results are stored by the SHA-256 of the input (and the optimizer
+    version), so each distinct image is optimized once no matter how
+    often it is renamed, copied or rebuilt.
+
+    Args:
+        src_dir: Directory to search (e.g., "static")
+        cache_dir: Directory holding the optimized images
+        jobs: Number of worker processes (0 = one per CPU)
+
+    Returns:
+        A dict mapping each image's path relative to src_dir to the
+        path of its optimized version in cache_dir
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    files, _ = scan_files(src_dir)
+    optimized = {}
+    misses = {}
+    for rel_path in sorted(files):
+        if not rel_path.lower().endswith(".png"):
+            continue
+        src_path = os.path.join(src_dir, rel_path)
+        cached_path = os.path.join(
+            cache_dir, f"{hash_file(src_path)}-v{OPTIMIZER_VERSION}.png"
+        )
+        optimized[rel_path] = cached_path
+        if cached_path not in misses and not os.path.exists(cached_path):
+            misses[cached_path] = src_path
+
+    jobs_list = [(src_path, cached_path) for cached_path, src_path in misses.items()]
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 1 or len(jobs_list) <= 1:
+        results = list(map(_optimize_to_cache, jobs_list))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(jobs_list))) as executor:
+            results = list(executor.map(_optimize_to_cache, jobs_list))
+    for (src_path, _), (before, after) in zip(jobs_list, results):
+        print(f"Optimized image: {src_path} ({before} -> {after} bytes)")
+    return optimized
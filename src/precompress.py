@@ -0,0 +1,189 @@
+import os
+import gzip
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from build_manifest import hash_file
+from static_sync import scan_files
+from instrument import traced
+
+
+CACHE_VERSION = 1
+
+GZIP_SUFFIX = ".gz"
+
+# Text formats worth compressing; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    ".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map",
+})
+
+
+def _compress_file(job):
+    """
+    Write path + ".gz" at maximum compression, if that makes it smaller.
+
+    Runs in a worker process. The gzip header's timestamp is zeroed, so
+    the same input always gives byte-identical output.
+
+    Returns:
+        (hex SHA-256 of the source, source size, compressed size or None
+        if not smaller)
+    """
+    path, gz_path = job
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) >= len(data):
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+        return digest, len(data), None
+    tmp_path = gz_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(compressed)
+    os.replace(tmp_path, gz_path)
+    return digest, len(data), len(compressed)
+
+
+class PrecompressCache:
+    """
+    Persistent record of the source each .gz sibling was made from.
+
+    For every compressible file it stores the (size, mtime) signature,
+    the content hash and whether a .gz was written. A file whose
+    signature is unchanged is not even read; one that was rewritten with
+    identical bytes (e.g. an unchanged page rebuilt with --force) is
+    hashed but not recompressed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt cache just means compressing everything again
+            return
+        if data.get("version") == CACHE_VERSION:
+            self.files = data.get("files", {})
+
+    def save(self):
+        """Write the cache to disk (atomically, via a temp file)."""
+        if self.path is None:
+            return
+        data = {"version": CACHE_VERSION, "files": self.files}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def _is_reusable(entry, path, stat, gz_exists):
+    """
+    Check a cache entry against the file, refreshing its signature.
+
+    Returns:
+        True if the existing .gz (or its deliberate absence) still
+        matches the file's contents
+    """
+    if entry is None:
+        return False
+    signature = [stat.st_size, stat.st_mtime_ns]
+    if entry[:2] != signature:
+        digest = hash_file(path)
+        if entry[2] != digest:
+            return False
+        entry[:2] = signature
+    return entry[3] == gz_exists
+
+
+@traced("precompress")
+def precompress_outputs(root, cache_path=None, jobs=0, extensions=COMPRESSIBLE_EXTENSIONS):
+    """
+    Write a gzip-compressed .gz sibling next to every compressible file.
+
+    Web servers that support precompressed files (e.g. nginx's
+    gzip_static) can then send the .gz as-is instead of compressing on
+    every request. Files whose compressed form would not be smaller get
+    no .gz. With a cache_path, files whose contents are unchanged since
+    the last run keep their existing .gz, and .gz files of outputs that
+    no longer exist are removed.
+
+    Args:
+        root: The output directory (e.g., "docs")
+        cache_path: Path of the JSON cache file, or None to compress
+                    every file
+        jobs: Number of worker processes; 1 compresses in this process,
+              0 uses one worker per CPU
+        extensions: File extensions to compress
+
+    Returns:
+        A dict with the number of files "compressed", "reused",
+        "skipped" (not smaller) and "removed", and the total
+        "bytes_in" and "bytes_out" of the files compressed this run
+    """
+    cache = PrecompressCache(cache_path)
+    files, _ = scan_files(root)
+
+    jobs_to_run = []
+    reused = 0
+    current = set()
+    for rel_path in sorted(files):
+        if os.path.splitext(rel_path)[1] not in extensions:
+            continue
+        current.add(rel_path)
+        path = os.path.join(root, rel_path)
+        gz_exists = rel_path + GZIP_SUFFIX in files
+        entry = cache.files.get(rel_path)
+        if _is_reusable(entry, path, files[rel_path], gz_exists):
+            reused += 1
+        else:
+            jobs_to_run.append(rel_path)
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    work = [
+        (os.path.join(root, rel_path), os.path.join(root, rel_path) + GZIP_SUFFIX)
+        for rel_path in jobs_to_run
+    ]
+    if jobs == 1 or len(work) <= 1:
+        results = list(map(_compress_file, work))
+    else:
+        chunksize = max(1, len(work) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_compress_file, work, chunksize=chunksize))
+
+    stats = {"compressed": 0, "reused": reused, "skipped": 0, "removed": 0,
+             "bytes_in": 0, "bytes_out": 0}
+    for rel_path, (path, _), result in zip(jobs_to_run, work, results):
+        digest, size, compressed_size = result
+        stat = files[rel_path]
+        cache.files[rel_path] = [
+            stat.st_size, stat.st_mtime_ns, digest, compressed_size is not None
+        ]
+        if compressed_size is None:
+            stats["skipped"] += 1
+        else:
+            print(f"Compressed {path}: {size} -> {compressed_size} bytes")
+            stats["compressed"] += 1
+            stats["bytes_in"] += size
+            stats["bytes_out"] += compressed_size
+
+    # Outputs that went away take their .gz with them
+    for rel_path in sorted(set(cache.files) - current):
+        gz_path = os.path.join(root, rel_path) + GZIP_SUFFIX
+        if os.path.exists(gz_path):
+            print(f"Removing stale file: {gz_path}")
+            os.remove(gz_path)
+            stats["removed"] += 1
+        del cache.files[rel_path]
+
+    cache.save()
+    return stats
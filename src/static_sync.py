@@ -0,0 +1,181 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from build_manifest import hash_file
+from instrument import traced
+
+
+def scan_files(root):
+    """
+    Recursively list the files under root using os.scandir.
+
+    Returns:
+        A dict mapping each file's path relative to root to its stat
+        result, and a set of relative directory paths
+    """
+    files = {}
+    dirs = set()
+    if not os.path.isdir(root):
+        return files, dirs
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.add(rel_path)
+                    stack.append(rel_path)
+                else:
+                    files[rel_path] = entry.stat()
+    return files, dirs
+
+
+def _is_unchanged(src_path, src_stat, dest_path, dest_stat, checksum):
+    if dest_stat is None or dest_stat.st_size != src_stat.st_size:
+        return False
+    if (src_stat.st_ino, src_stat.st_dev) == (dest_stat.st_ino, dest_stat.st_dev):
+        # Hardlinked to the source
+        return True
+    if checksum:
+        return hash_file(src_path) == hash_file(dest_path)
+    return dest_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+
+def _copy_file_contents(src_path, dest_path):
+    """Copy file data, in-kernel with copy_file_range where supported."""
+    if not hasattr(os, "copy_file_range"):
+        shutil.copyfile(src_path, dest_path)
+        return
+    with open(src_path, 'rb') as fsrc, open(dest_path, 'wb') as fdst:
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                pass
+        except OSError:
+            # Unsupported by this filesystem pair; fall back to a plain copy
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst)
+
+
+def _sync_file(src_path, dest_path, src_stat, link):
+    """
+    Replace dest_path with src_path's contents, atomically.
+
+    With link=True a hardlink is tried first; when the filesystem
+    refuses (e.g. across devices) the file is copied instead. Copies get
+    the source's mtime so the next sync can tell they are unchanged.
+    """
+    tmp_path = dest_path + ".sync-tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    if link:
+        try:
+            os.link(src_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return
+        except OSError:
+            pass
+    _copy_file_contents(src_path, tmp_path)
+    os.utime(tmp_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    os.replace(tmp_path, dest_path)
+
+
+def _is_kept_sibling(rel_path, dest_dir, src_files, keep, keep_suffixes):
+    """Return True if rel_path is derived from a source or kept file."""
+    for suffix in keep_suffixes:
+        if rel_path.endswith(suffix):
+            base = rel_path[:-len(suffix)]
+            if base in src_files:
+                return True
+            if os.path.normpath(os.path.abspath(os.path.join(dest_dir, base))) in keep:
+                return True
+    return False
+
+
+@traced("sync_static")
+def sync_static(src_dir, dest_dir, keep=(), checksum=False, link=False, jobs=8, keep_suffixes=(), substitutes=None):
+    """
+    Incrementally mirror a static directory into the destination directory.
+
+    Unlike copy_static_to_public, nothing is deleted up front: files are
+    copied only when their size or mtime (or, with checksum, contents)
+    differ, and files in dest_dir without a source in src_dir are
+    removed unless they are listed in keep (e.g. generated pages).
+    Changed files are copied on a thread pool.
+
+    Args:
+        src_dir: Path to the source directory (e.g., "static")
+        dest_dir: Path to the destination directory (e.g., "docs")
+        keep: Paths inside dest_dir that must never be removed
+        checksum: Compare file hashes instead of trusting mtimes
+        link: Hardlink files instead of copying where the filesystem allows
+        jobs: Number of copy threads
+        keep_suffixes: Suffixes of derived files to keep next to a kept
+                       or source file, e.g. (".gz",) keeps "index.css.gz"
+                       while "index.css" exists in src_dir
+        substitutes: Optional dict mapping a path relative to src_dir to
+                     a file to copy in its place (e.g. an optimized image)
+
+    Returns:
+        A dict with the number of files "copied", "unchanged" and "removed"
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    src_files, src_dirs = scan_files(src_dir)
+    dest_files, dest_dirs = scan_files(dest_dir)
+    keep = {os.path.normpath(os.path.abspath(path)) for path in keep}
+    keep_dirs = set()
+    for path in keep:
+        parent = os.path.dirname(path)
+        while parent not in keep_dirs and parent != os.path.dirname(parent):
+            keep_dirs.add(parent)
+            parent = os.path.dirname(parent)
+
+    for rel_dir in sorted(src_dirs - dest_dirs):
+        os.makedirs(os.path.join(dest_dir, rel_dir), exist_ok=True)
+
+    copies = []
+    unchanged = 0
+    for rel_path in sorted(src_files):
+        dest_path = os.path.join(dest_dir, rel_path)
+        if substitutes and rel_path in substitutes:
+            src_path = substitutes[rel_path]
+            src_stat = os.stat(src_path)
+        else:
+            src_path = os.path.join(src_dir, rel_path)
+            src_stat = src_files[rel_path]
+        dest_stat = dest_files.get(rel_path)
+        if _is_unchanged(src_path, src_stat, dest_path, dest_stat, checksum):
+            unchanged += 1
+        else:
+            copies.append((src_path, dest_path, src_stat))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = executor.map(
+            lambda copy: _sync_file(*copy, link), copies
+        )
+        for (src_path, dest_path, _), _ in zip(copies, results):
+            print(f"Copying file: {src_path} -> {dest_path}")
+
+    removed = 0
+    for rel_path in sorted(set(dest_files) - set(src_files)):
+        dest_path = os.path.join(dest_dir, rel_path)
+        if os.path.normpath(os.path.abspath(dest_path)) in keep:
+            continue
+        if _is_kept_sibling(rel_path, dest_dir, src_files, keep, keep_suffixes):
+            continue
+        print(f"Removing stale file: {dest_path}")
+        os.remove(dest_path)
+        removed += 1
+
+    # Deepest first, so emptied parents can go too
+    for rel_dir in sorted(dest_dirs - src_dirs, key=len, reverse=True):
+        dir_path = os.path.join(dest_dir, rel_dir)
+        if os.path.normpath(os.path.abspath(dir_path)) in keep_dirs:
+            continue
+        if not os.listdir(dir_path):
+            os.rmdir(dir_path)
+
+    return {"copied": len(copies), "unchanged": unchanged, "removed": removed}
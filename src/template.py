@@ -0,0 +1,180 @@
+import os
+import re
+
+
+TEMPLATE_FILENAME = "template.html"
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Site-absolute URLs in href/src attributes, resolved per page. Values
+# may contain placeholders (src="/images/{{ Name }}.png") or start with
+# one (href="{{ Url }}"); those are resolved after substitution.
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(?:href|src)="((?:/(?!/)|\{\{)[^"]*)"')
+
+_TOKEN_PATTERN = re.compile(
+    PLACEHOLDER_PATTERN.pattern + "|" + URL_ATTRIBUTE_PATTERN.pattern
+)
+
+# path -> (size, mtime_ns, Template)
+_TEMPLATE_CACHE = {}
+
+
+class TemplateURL:
+    """
+    A site-absolute URL in a template attribute, e.g. href="/index.css".
+
+    A URL with placeholders keeps them in parts: literal strings at even
+    indices, (name, raw text) pairs at odd ones. Otherwise parts is None.
+    """
+
+    __slots__ = ("url", "parts")
+
+    def __init__(self, url):
+        self.url = url
+        self.parts = None
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(url):
+            if self.parts is None:
+                self.parts = []
+            self.parts.append(url[pos:match.start()])
+            self.parts.append((match.group(1), match.group(0)))
+            pos = match.end()
+        if self.parts is not None:
+            self.parts.append(url[pos:])
+
+    def fill(self, values):
+        """Return the URL with its placeholders replaced from values."""
+        if self.parts is None:
+            return self.url
+        url = []
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                url.append(part)
+                continue
+            name, raw = part
+            value = values.get(name)
+            if value is None:
+                url.append(raw)
+            elif isinstance(value, str):
+                url.append(value)
+            else:
+                url.extend(value)
+        return "".join(url)
+
+
+class Template:
+    """
+    A template compiled into a list of segments.
+
+    Literal text alternates with dynamic parts in self.segments: even
+    indices are literal strings, odd indices are placeholder names or
+    TemplateURLs for site-absolute href/src values, which are resolved
+    after their own placeholders are filled in. Rendering joins the
+    segments, so the page is built once instead of being copied by a
+    str.replace per placeholder.
+    """
+
+    def __init__(self, text):
+        self.segments = []
+        self._raw = {}
+        pos = 0
+        for match in _TOKEN_PATTERN.finditer(text):
+            name, url = match.groups()
+            if name is not None:
+                self.segments.append(text[pos:match.start()])
+                self.segments.append(name)
+                self._raw[name] = match.group(0)
+                pos = match.end()
+            else:
+                # The quotes stay in the literal text around the URL
+                self.segments.append(text[pos:match.start(2)])
+                self.segments.append(TemplateURL(url))
+                pos = match.end(2)
+        self.segments.append(text[pos:])
+
+    def iter_render(self, values, url_resolver=None):
+        """
+        Yield the rendered template in chunks.
+
+        Args:
+            values: A dict mapping placeholder names to either a string or
+                    an iterable of string chunks (e.g. HTMLNode.iter_html()),
+                    which is streamed in place. Unknown placeholders are
+                    left as they are.
+            url_resolver: Optional URLResolver for the template's own
+                          href/src URLs
+        """
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                if segment:
+                    yield segment
+                continue
+            if isinstance(segment, TemplateURL):
+                url = segment.fill(values)
+                if url_resolver is None:
+                    yield url
+                else:
+                    yield url_resolver.resolve(url)
+                continue
+            value = values.get(segment)
+            if value is None:
+                yield self._raw[segment]
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def render(self, values, url_resolver=None):
+        """Render the template to a single string."""
+        return "".join(self.iter_render(values, url_resolver))
+
+
+def load_template(path):
+    """
+    Return the compiled Template for a file, compiling it at most once.
+
+    Compiled templates are cached by path and revalidated by size and
+    mtime, so an edited template is picked up on the next call.
+    """
+    stat = os.stat(path)
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    with open(path, 'r') as f:
+        template = Template(f.read())
+    _TEMPLATE_CACHE[path] = (stat.st_size, stat.st_mtime_ns, template)
+    return template
+
+
+class TemplateResolver:
+    """
+    Pick the template for each page based on where its source lives.
+
+    A template.html inside the content tree applies to pages in that
+    directory and below, e.g. content/blog/template.html gives every blog
+    post its own layout. Pages with no such file use the default
+    template. Lookups are cached per directory.
+    """
+
+    def __init__(self, content_root, default_path):
+        self.content_root = os.path.abspath(content_root)
+        self.default_path = default_path
+        self._dir_cache = {}
+
+    def resolve(self, src_path):
+        """Return the template path for the markdown file at src_path."""
+        return self._resolve_dir(os.path.dirname(os.path.abspath(src_path)))
+
+    def _resolve_dir(self, dir_path):
+        cached = self._dir_cache.get(dir_path)
+        if cached is not None:
+            return cached
+        candidate = os.path.join(dir_path, TEMPLATE_FILENAME)
+        if os.path.isfile(candidate):
+            resolved = candidate
+        elif not dir_path.startswith(self.content_root + os.sep):
+            resolved = self.default_path
+        else:
+            resolved = self._resolve_dir(os.path.dirname(dir_path))
+        self._dir_cache[dir_path] = resolved
+        return resolved
@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+import unittest
+import time
+from contextlib import redirect_stderr
+from io import StringIO
+from unittest import mock
+import ast_cache
+from ast_cache import AstCache, encode_node, decode_node, parser_version
+from block_cache import BlockCache
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from url_resolver import URLResolver
+
+
+MARKDOWN = """# Title
+
+Some **bold** and [a *link*](/blog/tom) with ![img](/images/t.png "x")
+
+- one
+- [two](/two?a=1&b=2)
+
+```
+a < b
+```"""
+
+
+class TestEncoding(unittest.TestCase):
+    def test_round_trip(self):
+        node = markdown_to_html_node(MARKDOWN)
+        expected = node.to_html()
+        encoded = encode_node(markdown_to_html_node(MARKDOWN))
+        self.assertEqual(decode_node(encoded).to_html(), expected)
+
+    def test_compact_leaves(self):
+        encoded = encode_node(markdown_to_html_node("Plain *it* [l](/u)"))
+        self.assertEqual(
+            encoded,
+            ["div", [["p", ["Plain ", ("i", "it"), " ", ("a", "l", {"href": "/u"})]]]],
+        )
+
+    def test_urls_resolved_on_decode(self):
+        encoded = encode_node(markdown_to_html_node(MARKDOWN))
+        references = []
+        resolver = URLResolver("/docs/", references=references)
+        html = decode_node(encoded, resolver).to_html()
+        self.assertEqual(html, markdown_to_html_node(MARKDOWN, URLResolver("/docs/")).to_html())
+        self.assertEqual(references, ["/blog/tom", '/images/t.png "x"', "/two?a=1&b=2"])
+
+    def test_nested_urls_resolved_in_encoding_order(self):
+        def tree():
+            image = LeafNode("img", "", {"src": "/i.png", "alt": "i"})
+            return ParentNode("a", [LeafNode("b", "bold"), image], {"href": "/t"})
+
+        encoded_refs = []
+        encoded = encode_node(tree(), URLResolver("/docs/", references=encoded_refs))
+        decoded_refs = []
+        decode_node(encoded, URLResolver("/docs/", references=decoded_refs))
+        self.assertEqual(encoded_refs, ["/t", "/i.png"])
+        self.assertEqual(decoded_refs, encoded_refs)
+
+    def test_encode_resolving_keeps_urls_as_written(self):
+        node = markdown_to_html_node(MARKDOWN)
+        encoded = encode_node(node, URLResolver("/docs/"))
+        self.assertIn('href="/docs/blog/tom"', node.to_html())
+        self.assertEqual(decode_node(encoded).to_html(), markdown_to_html_node(MARKDOWN).to_html())
+
+
+class TestAstCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.root, "ast")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def render(self, cache, resolver=None):
+        return "".join(cache.render_markdown(MARKDOWN, resolver))
+
+    def test_hit_matches_parse(self):
+        cache = AstCache(self.cache_dir)
+        expected = markdown_to_html_node(MARKDOWN, URLResolver("/a/")).to_html()
+        self.assertEqual(self.render(cache, URLResolver("/a/")), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        # A new process (or build) loads the trees instead of parsing
+        cache = AstCache(self.cache_dir)
+        self.assertEqual(self.render(cache, URLResolver("/a/")), expected)
+        self.assertEqual((cache.hits, cache.misses, cache.blocks_rendered), (1, 0, 4))
+
+    def test_entry_shared_across_resolvers(self):
+        cache = AstCache(self.cache_dir)
+        self.render(cache, URLResolver("/a/"))
+        html = self.render(cache, URLResolver(page_path="blog/x/index.html", relative=True))
+        self.assertIn('href="../tom"', html)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertIn(parser_version(), os.listdir(self.cache_dir)[0])
+
+    def test_corrupt_entry_parsed_again(self):
+        cache = AstCache(self.cache_dir)
+        expected = self.render(cache)
+        (name,) = os.listdir(self.cache_dir)
+        with open(os.path.join(self.cache_dir, name), "wb") as f:
+            f.write(b"\x00garbage")
+        self.assertEqual(self.render(cache), expected)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(self.render(cache), expected)
+        self.assertEqual(cache.hits, 1)
+
+    def test_miss_renders_through_block_cache(self):
+        cache = AstCache(self.cache_dir)
+        blocks = BlockCache()
+        cache.render_markdown(MARKDOWN, URLResolver("/a/"), blocks)
+        self.assertEqual((blocks.hits, blocks.misses), (0, 4))
+        edited = MARKDOWN + "\n\nNew paragraph"
+        with mock.patch.object(
+            ast_cache, "block_to_html_node", wraps=ast_cache.block_to_html_node
+        ) as parse:
+            html = "".join(cache.render_markdown(edited, URLResolver("/a/"), blocks))
+        # Only the new block is parsed; the rest come from the block cache
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual((blocks.hits, blocks.misses), (4, 5))
+        self.assertEqual(html, markdown_to_html_node(edited, URLResolver("/a/")).to_html())
+        self.assertEqual((cache.hits, cache.misses, cache.blocks_rendered), (0, 2, 0))
+
+    def test_miss_replays_references(self):
+        cache = AstCache(self.cache_dir)
+        blocks = BlockCache()
+        cache.render_markdown(MARKDOWN, URLResolver("/a/"), blocks)
+        references = []
+        cache.render_markdown(
+            MARKDOWN + "\n\nx", URLResolver("/a/", references=references), blocks
+        )
+        self.assertEqual(references, ["/blog/tom", '/images/t.png "x"', "/two?a=1&b=2"])
+
+    def test_unwritable_cache_dir_only_warns(self):
+        with open(self.cache_dir, "w") as f:
+            f.write("not a directory")
+        cache = AstCache(self.cache_dir)
+        stderr = StringIO()
+        with redirect_stderr(stderr):
+            html = self.render(cache)
+        self.assertEqual(html, markdown_to_html_node(MARKDOWN).to_html())
+        self.assertIn("could not write AST cache entry", stderr.getvalue())
+
+    def test_prune_removes_other_versions(self):
+        cache = AstCache(self.cache_dir)
+        self.render(cache)
+        (current,) = os.listdir(self.cache_dir)
+        for name in ("abc-0123456789abcdef.ast", "abc.ast.1.tmp", "fresh.ast.2.tmp"):
+            with open(os.path.join(self.cache_dir, name), "w") as f:
+                f.write("x")
+        old = time.time() - 2 * 3600
+        os.utime(os.path.join(self.cache_dir, "abc.ast.1.tmp"), (old, old))
+        self.assertEqual(cache.prune(), 2)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted([current, "fresh.ast.2.tmp"]))
+        self.assertEqual(AstCache(os.path.join(self.root, "missing")).prune(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
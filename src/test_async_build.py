@@ -0,0 +1,50 @@
+import threading
+import unittest
+from async_build import run_pipeline
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_all_items_processed(self):
+        written = {}
+        lock = threading.Lock()
+
+        def write(item, output):
+            with lock:
+                written[item] = output
+
+        errors = run_pipeline(
+            list(range(50)),
+            read=lambda item: item * 2,
+            render=lambda item, data: f"page {data}",
+            write=write,
+            io_workers=4,
+            queue_size=2,
+        )
+        self.assertEqual(errors, [None] * 50)
+        self.assertEqual(written, {i: f"page {i * 2}" for i in range(50)})
+
+    def test_errors_reported_per_item(self):
+        def read(item):
+            if item == "missing":
+                raise FileNotFoundError("no such file")
+            return item
+
+        def render(item, data):
+            if item == "broken":
+                raise ValueError("bad markdown")
+            return data
+
+        errors = run_pipeline(
+            ["ok", "missing", "broken", "also ok"], read, render, lambda item, output: None
+        )
+        self.assertEqual(
+            errors,
+            [None, "FileNotFoundError: no such file", "ValueError: bad markdown", None],
+        )
+
+    def test_empty(self):
+        self.assertEqual(run_pipeline([], None, None, None), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
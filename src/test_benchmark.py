@@ -0,0 +1,55 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from bench_corpus import generate_corpus, generate_page_markdown
+from benchmark import _best_time, compare_to_baseline
+from block_markdown import markdown_to_html_node
+
+
+class TestBenchCorpus(unittest.TestCase):
+    def test_same_seed_same_page(self):
+        first = generate_page_markdown(random.Random(7), blocks=20)
+        second = generate_page_markdown(random.Random(7), blocks=20)
+        self.assertEqual(first, second)
+
+    def test_generated_pages_parse(self):
+        for seed in range(5):
+            markdown = generate_page_markdown(
+                random.Random(seed), blocks=30, inline_density=0.8
+            )
+            html = markdown_to_html_node(markdown).to_html()
+            self.assertTrue(html.startswith("<div><h1>"))
+
+    def test_generate_corpus_layout(self):
+        root = tempfile.mkdtemp()
+        try:
+            paths = generate_corpus(root, pages=3, blocks=5, seed=1)
+            self.assertEqual(
+                [os.path.relpath(path, root) for path in paths],
+                ["index.md", "blog/post-1/index.md", "blog/post-2/index.md"],
+            )
+        finally:
+            shutil.rmtree(root)
+
+
+class TestCompareToBaseline(unittest.TestCase):
+    def test_regression_detected(self):
+        baseline = {"stages": {"to_html": 1.0, "read": 1.0}}
+        results = {"stages": {"to_html": 1.2, "read": 1.05}}
+        self.assertEqual(
+            compare_to_baseline(results, baseline, 0.1), [("to_html", 1.0, 1.2)]
+        )
+
+
+class TestBestTime(unittest.TestCase):
+    def test_setup_runs_before_every_repeat(self):
+        trees = iter(range(3))
+        seen = []
+        _best_time(seen.append, 3, setup=lambda: next(trees))
+        self.assertEqual(seen, [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from block_cache import BlockCache, block_key
+from block_markdown import block_to_html_node, markdown_to_html_node
+from url_resolver import URLResolver
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_render_matches_block_to_html_node(self):
+        cache = BlockCache()
+        for block in ("# Title", "- one\n- **two**", "```\ncode\n```", "Some _text_"):
+            self.assertEqual(cache.render(block), block_to_html_node(block).to_html())
+
+    def test_render_markdown_matches_markdown_to_html_node(self):
+        markdown = "# Title\n\n> quote\n\nPara [link](/a)\n\n> quote\n\n1. one\n2. two"
+        cache = BlockCache()
+        self.assertEqual(
+            "".join(cache.render_markdown(markdown)),
+            markdown_to_html_node(markdown).to_html(),
+        )
+
+    def test_hits_and_misses(self):
+        cache = BlockCache()
+        cache.render_markdown("Disclaimer\n\nPage one")
+        cache.render_markdown("Disclaimer\n\nPage two")
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["entries"], 3)
+        self.assertEqual(stats["hit_rate"], 0.25)
+
+    def test_lru_eviction_respects_budget(self):
+        cache = BlockCache(max_bytes=1000)
+        blocks = [f"Paragraph number {i}" for i in range(20)]
+        for block in blocks:
+            cache.render(block)
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 1000)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertEqual(stats["entries"], 20 - stats["evictions"])
+        # The most recent block survived, the oldest did not
+        cache.render(blocks[-1])
+        self.assertEqual(cache.hits, 1)
+        cache.render(blocks[0])
+        self.assertEqual(cache.hits, 1)
+
+    def test_recently_used_entries_are_kept(self):
+        cache = BlockCache(max_bytes=1000)
+        cache.render("keep me")
+        for i in range(20):
+            cache.render("keep me")
+            cache.render(f"Paragraph number {i}")
+        self.assertEqual(cache.hits, 20)
+
+    def test_hits_replay_references(self):
+        cache = BlockCache()
+        block = "[Tom](/blog/tom) and ![img](/tom.png)"
+        # Cached by a resolver that isn't recording
+        cache.render(block, URLResolver("/site/"))
+        recording = URLResolver("/site/", references=[])
+        html = cache.render(block, recording)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(recording.references, ["/blog/tom", "/tom.png"])
+        self.assertIn('href="/site/blog/tom"', html)
+
+    def test_resolver_is_part_of_key(self):
+        cache = BlockCache()
+        block = "[Tom](/blog/tom)"
+        self.assertIn('"/a/blog/tom"', cache.render(block, URLResolver("/a/")))
+        self.assertIn('"/b/blog/tom"', cache.render(block, URLResolver("/b/")))
+        # Blocks without links are shared between resolvers
+        cache.render("plain", URLResolver("/a/"))
+        cache.render("plain", URLResolver("/b/"))
+        self.assertEqual(cache.hits, 1)
+
+    def test_disabled(self):
+        cache = BlockCache(max_bytes=0)
+        self.assertEqual(cache.render("**bold**"), "<p><b>bold</b></p>")
+        self.assertEqual(cache.render("**bold**"), "<p><b>bold</b></p>")
+        self.assertEqual(cache.stats()["hits"], 0)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_clear(self):
+        cache = BlockCache()
+        cache.render("text")
+        cache.render("text")
+        cache.clear()
+        self.assertEqual(cache.stats()["hits"], 0)
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+    def test_block_key(self):
+        self.assertEqual(block_key("same"), block_key("same"))
+        self.assertNotEqual(block_key("same"), block_key("other"))
+        self.assertEqual(len(block_key("same")), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,17 @@
 import unittest
-from block_markdown import markdown_to_blocks, block_to_block_type, BlockType, extract_title
+import io
+from block_markdown import (
+    markdown_to_blocks,
+    iter_blocks,
+    iter_block_spans,
+    iter_buffer_blocks,
+    block_to_block_type,
+    classify_block,
+    ClassifiedBlock,
+    BlockType,
+    extract_title,
+    extract_title_from_buffer,
+)
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -97,6 +109,45 @@ And more text"""
         blocks = markdown_to_blocks(md)
         self.assertEqual(blocks, [])
 
+    def test_markdown_to_blocks_code_block_with_blank_lines(self):
+        md = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(
+            blocks, ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro"]
+        )
+
+    def test_iter_blocks_from_file(self):
+        md = io.StringIO("# Heading\n\nParagraph\ntext\n\n\n- item\n")
+        blocks = iter_blocks(md)
+        self.assertEqual(next(blocks), "# Heading")
+        self.assertEqual(list(blocks), ["Paragraph\ntext", "- item"])
+
+    def test_iter_block_spans(self):
+        buffer = b"  # Heading \n\nPara\ntext\n \n\n- item"
+        self.assertEqual(
+            [buffer[start:end] for start, end in iter_block_spans(buffer)],
+            [b"# Heading", b"Para\ntext", b"- item"],
+        )
+
+    def test_buffer_blocks_match_iter_blocks(self):
+        for md in [
+            "",
+            "\n\n",
+            "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro",
+            "```py\ncode\n\n```\nafter\n\n```\nunclosed\n\nstill",
+            "caf\u00e9 \u2014 na\u00efve\n\u00a0\n\u00a0\u2003next\n\n\x1c\n\nend",
+            "> quote\n> more\n\n1. one\n2. two\n",
+        ]:
+            self.assertEqual(
+                list(iter_buffer_blocks(md.encode())), list(iter_blocks(md.split("\n")))
+            )
+
+    def test_buffer_blocks_normalize_crlf(self):
+        self.assertEqual(
+            list(iter_buffer_blocks(b"# Title\r\n\r\nline one\r\nline two\r\n")),
+            ["# Title", "line one\nline two"],
+        )
+
 
 class TestBlockToBlockType(unittest.TestCase):
     def test_paragraph(self):
@@ -204,7 +255,55 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
 
+class TestClassifyBlock(unittest.TestCase):
+    def test_heading(self):
+        self.assertEqual(
+            classify_block("### Third level"),
+            ClassifiedBlock(BlockType.HEADING, ["Third level"], 3),
+        )
+
+    def test_code_with_language(self):
+        self.assertEqual(
+            classify_block("```python\nprint('hi')\n```"),
+            ClassifiedBlock(BlockType.CODE, ["print('hi')\n"], "python"),
+        )
+
+    def test_quote(self):
+        self.assertEqual(
+            classify_block("> first\n>\n> second"),
+            ClassifiedBlock(BlockType.QUOTE, ["first", "", "second"]),
+        )
+
+    def test_unordered_list(self):
+        self.assertEqual(
+            classify_block("- one\n- two"),
+            ClassifiedBlock(BlockType.UNORDERED_LIST, ["one", "two"]),
+        )
+
+    def test_ordered_list_past_nine(self):
+        block = "\n".join(f"{i}. item {i}" for i in range(1, 12))
+        classified = classify_block(block)
+        self.assertEqual(classified.block_type, BlockType.ORDERED_LIST)
+        self.assertEqual(classified.lines[10], "item 11")
+
+    def test_ordered_list_leading_zero(self):
+        self.assertEqual(block_to_block_type("01. Item"), BlockType.PARAGRAPH)
+
+    def test_paragraph(self):
+        self.assertEqual(
+            classify_block("- one\ntwo"),
+            ClassifiedBlock(BlockType.PARAGRAPH, ["- one", "two"]),
+        )
+
+
 class TestExtractTitle(unittest.TestCase):
+    def test_extract_title_from_buffer(self):
+        markdown = "Intro\n\n  #  Caf\u00e9 Title \r\n\n## Sub"
+        self.assertEqual(extract_title_from_buffer(markdown.encode()), "Caf\u00e9 Title")
+        self.assertEqual(extract_title(markdown), "Caf\u00e9 Title")
+        with self.assertRaises(Exception):
+            extract_title_from_buffer(b"## Only h2")
+
     def test_extract_title_simple(self):
         markdown = "# Hello"
         title = extract_title(markdown)
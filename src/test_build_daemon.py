@@ -0,0 +1,140 @@
+import io
+import os
+import sys
+import json
+import socket
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from contextlib import redirect_stderr
+import build_daemon
+from build_daemon import DaemonRequestHandler, DaemonServer, send_command
+
+
+class TestDaemonServer(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.root, "daemon.sock")
+        self.requests = []
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def handle_command(self, command, args):
+        self.requests.append((command, args))
+        if command == "fail":
+            raise RuntimeError("build broke")
+        return {"ok": True, "command": command, "args": args}
+
+    def start(self):
+        server = DaemonServer(self.socket_path, self.handle_command)
+        thread = threading.Thread(target=server.serve_until_stopped)
+        thread.start()
+        return thread
+
+    def test_commands(self):
+        thread = self.start()
+        try:
+            self.assertEqual(
+                send_command(self.socket_path, "rebuild", "content/a b.md", timeout=5),
+                {"ok": True, "command": "rebuild", "args": ["content/a b.md"]},
+            )
+            self.assertEqual(
+                send_command(self.socket_path, "fail", timeout=5),
+                {"ok": False, "error": "RuntimeError: build broke"},
+            )
+        finally:
+            self.assertEqual(send_command(self.socket_path, "stop", timeout=5), {"ok": True})
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertEqual(self.requests, [("rebuild", ["content/a b.md"]), ("fail", [])])
+
+    def send_raw(self, data):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(self.socket_path)
+            sock.sendall(data)
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('rb') as f:
+                return f.read()
+
+    def test_unbalanced_quote_gets_an_error_reply(self):
+        thread = self.start()
+        try:
+            reply = json.loads(self.send_raw(b'rebuild "x\n'))
+            self.assertFalse(reply["ok"])
+            self.assertIn("ValueError", reply["error"])
+            self.assertEqual(send_command(self.socket_path, "ping", timeout=5)["command"], "ping")
+        finally:
+            send_command(self.socket_path, "stop", timeout=5)
+            thread.join(5)
+        self.assertEqual(self.requests, [("ping", [])])
+
+    def test_silent_client_times_out(self):
+        thread = self.start()
+        try:
+            with mock.patch.object(DaemonRequestHandler, "timeout", 0.2):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+                    silent.connect(self.socket_path)
+                    self.assertEqual(
+                        send_command(self.socket_path, "ping", timeout=5)["command"], "ping"
+                    )
+        finally:
+            send_command(self.socket_path, "stop", timeout=5)
+            thread.join(5)
+
+    def test_client_sends_absolute_paths(self):
+        argv = ["build_daemon.py", self.socket_path, "rebuild", "content/a.md"]
+        with mock.patch.object(sys, "argv", argv), \
+                mock.patch("build_daemon.send_command", return_value={"ok": True}) as send:
+            with self.assertRaises(SystemExit) as exit_:
+                build_daemon.main()
+        self.assertEqual(exit_.exception.code, 0)
+        send.assert_called_once_with(
+            self.socket_path, "rebuild", os.path.abspath("content/a.md")
+        )
+
+    def test_stale_socket_replaced(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+        thread = self.start()
+        send_command(self.socket_path, "stop", timeout=5)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_live_socket_not_replaced(self):
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            thread = self.start()
+            try:
+                with self.assertRaises(OSError):
+                    DaemonServer(self.socket_path, self.handle_command)
+            finally:
+                send_command(self.socket_path, "stop", timeout=5)
+                thread.join(5)
+        # The liveness check sends nothing and gets no reply or traceback
+        self.assertEqual(stderr.getvalue(), "")
+        self.assertEqual(self.requests, [])
+
+    def test_client_that_hangs_up_is_ignored(self):
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            thread = self.start()
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.socket_path)
+                    sock.sendall(b"ping\n")
+                self.assertEqual(send_command(self.socket_path, "ping", timeout=5)["ok"], True)
+            finally:
+                send_command(self.socket_path, "stop", timeout=5)
+                thread.join(5)
+        self.assertNotIn("Traceback", stderr.getvalue())
+        self.assertEqual(self.requests, [("ping", []), ("ping", [])])
+
+
+if __name__ == "__main__":
+    unittest.main()
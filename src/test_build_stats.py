@@ -0,0 +1,70 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from build_stats import BuildStats, PageStats
+
+
+class TestBuildStats(unittest.TestCase):
+    def make_stats(self):
+        stats = BuildStats()
+        stats.stages["pages"] = 0.5
+        stats.add_page("a.md", PageStats(0.1, 10, 2, 1000, 3000))
+        stats.add_page("b.md", PageStats(0.3, 40, 0, 5000, 9000))
+        stats.add_page("c.md", PageStats(0.1, 5, 5, 100, 400, None, 3, 2))
+        stats.pages_skipped = 4
+        return stats
+
+    def test_stage_accumulates(self):
+        stats = BuildStats()
+        with stats.stage("pages"):
+            pass
+        first = stats.stages["pages"]
+        with stats.stage("pages"):
+            pass
+        self.assertGreaterEqual(stats.stages["pages"], first)
+        self.assertEqual(list(stats.stages), ["pages"])
+
+    def test_summary(self):
+        summary = self.make_stats().summary(top=2)
+        self.assertEqual(summary["pages"]["rendered"], 3)
+        self.assertEqual(summary["pages"]["skipped"], 4)
+        self.assertAlmostEqual(summary["pages"]["per_second"], 6.0)
+        self.assertEqual(summary["pages"]["bytes_in"], 6100)
+        self.assertEqual(summary["pages"]["bytes_out"], 12400)
+        self.assertEqual(
+            summary["caches"]["block_cache"], {"hits": 7, "lookups": 55, "hit_rate": 7 / 55}
+        )
+        self.assertEqual(summary["caches"]["manifest"]["hit_rate"], 4 / 7)
+        self.assertEqual(summary["caches"]["highlight"]["lookups"], 3)
+        self.assertEqual(
+            [page["path"] for page in summary["slowest_pages"]], ["b.md", "a.md"]
+        )
+        self.assertEqual(summary["slowest_pages"][0]["blocks"], 40)
+
+    def test_add_cache(self):
+        stats = BuildStats()
+        stats.add_cache("gzip", 1, 4)
+        stats.add_cache("gzip", 3, 4)
+        self.assertEqual(stats.summary()["caches"]["gzip"]["hit_rate"], 0.5)
+
+    def test_report_and_json(self):
+        stats = self.make_stats()
+        report = stats.format_report(top=1)
+        self.assertIn("3 page(s) rendered (6.0 pages/s), 4 unchanged", report)
+        self.assertIn("Slowest 1 page(s):", report)
+        self.assertIn("40 blocks  b.md", report)
+        root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(root, "stats.json")
+            stats.write_json(path)
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(len(data["slowest_pages"]), 3)
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.request
+from dev_server import (
+    LIVE_RELOAD_SCRIPT,
+    ReloadNotifier,
+    changed_files,
+    snapshot_files,
+    start_server,
+)
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_changed_files(self):
+        page = self.write("content/index.md", "# Home")
+        before = snapshot_files([self.root])
+        self.assertEqual(changed_files(before, snapshot_files([self.root])), [])
+
+        self.write("content/index.md", "# Home page")
+        added = self.write("content/blog/tom/index.md", "# Tom")
+        self.assertEqual(
+            changed_files(before, snapshot_files([self.root])), sorted([page, added])
+        )
+
+    def test_reload_notifier(self):
+        notifier = ReloadNotifier()
+        timer = threading.Timer(0.01, notifier.notify)
+        timer.start()
+        self.assertEqual(notifier.wait(0, timeout=5), 1)
+        self.assertEqual(notifier.wait(1, timeout=0.01), 1)
+
+    def test_server_injects_reload_script(self):
+        self.write("docs/index.html", "<html><body><p>hi</p></body></html>")
+        self.write("docs/index.css", "body {}")
+        server = start_server(os.path.join(self.root, "docs"), 0, ReloadNotifier())
+        try:
+            base = f"http://localhost:{server.server_address[1]}"
+            with urllib.request.urlopen(base + "/") as response:
+                html = response.read().decode()
+            self.assertEqual(
+                html, f"<html><body><p>hi</p>{LIVE_RELOAD_SCRIPT}</body></html>"
+            )
+            with urllib.request.urlopen(base + "/index.css") as response:
+                self.assertEqual(response.read(), b"body {}")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
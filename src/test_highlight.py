@@ -0,0 +1,183 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+import highlight
+from highlight import (
+    HighlightCache,
+    configure_highlight_cache,
+    find_language,
+    highlight_cache,
+    highlight_to_html_node,
+    tokenize_html,
+    tokenize_json,
+    tokenize_python,
+    tokenize_shell,
+)
+
+
+def classified(tokens):
+    return [(kind, text) for kind, text in tokens if kind is not None]
+
+
+class TestTokenizers(unittest.TestCase):
+    def test_tokens_cover_the_code(self):
+        code = 'def f(x):\n    return "a#b"  # c\n'
+        self.assertEqual("".join(text for _, text in tokenize_python(code)), code)
+
+    def test_python(self):
+        code = '@cache\nclass A:\n    """doc"""\n    x = 0x1F if rb"s" else None  # note\n'
+        self.assertEqual(
+            classified(tokenize_python(code)),
+            [
+                ("decorator", "@cache"), ("keyword", "class"), ("function", "A"),
+                ("string", '"""doc"""'), ("number", "0x1F"), ("keyword", "if"),
+                ("string", 'rb"s"'), ("keyword", "else"), ("keyword", "None"),
+                ("comment", "# note"),
+            ],
+        )
+
+    def test_python_keyword_inside_name_is_plain(self):
+        self.assertEqual(classified(tokenize_python("iffy = format")), [])
+
+    def test_shell(self):
+        code = 'ls -la "$HOME" | grep --color=auto x  # list\nexport A=${B}'
+        self.assertEqual(
+            classified(tokenize_shell(code)),
+            [
+                ("option", "-la"), ("string", '"$HOME"'), ("option", "--color"),
+                ("comment", "# list"), ("keyword", "export"), ("variable", "${B}"),
+            ],
+        )
+
+    def test_shell_hash_inside_word_is_not_a_comment(self):
+        self.assertEqual(classified(tokenize_shell("echo a#b")), [])
+
+    def test_json(self):
+        self.assertEqual(
+            classified(tokenize_json('{"a": [1.5, -2e3, true, null, "s"]}')),
+            [
+                ("attr", '"a"'), ("number", "1.5"), ("number", "-2e3"),
+                ("literal", "true"), ("literal", "null"), ("string", '"s"'),
+            ],
+        )
+
+    def test_html(self):
+        self.assertEqual(
+            classified(tokenize_html('<!DOCTYPE html><p class=x>a &amp; b</p><!-- c -->')),
+            [
+                ("tag", "<!DOCTYPE html>"), ("tag", "<p"), ("attr", "class"),
+                ("string", "x"), ("tag", ">"), ("entity", "&amp;"), ("tag", "</p"),
+                ("tag", ">"), ("comment", "<!-- c -->"),
+            ],
+        )
+
+    def test_html_stray_angle_bracket_is_text(self):
+        self.assertEqual(tokenize_html("a <3 b"), [(None, "a <3 b")])
+
+    def test_find_language(self):
+        self.assertEqual(find_language("py"), "python")
+        self.assertEqual(find_language("Bash"), "shell")
+        self.assertEqual(find_language("json title=x"), "json")
+        self.assertIsNone(find_language("rust"))
+        self.assertIsNone(find_language(""))
+        self.assertIsNone(find_language(None))
+
+
+class TestHighlightCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_memory_hit(self):
+        cache = HighlightCache()
+        first = cache.tokens("x = 1", "python")
+        self.assertIs(cache.tokens("x = 1", "python"), first)
+        self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (1, 0, 1))
+
+    def test_keyed_by_language(self):
+        cache = HighlightCache()
+        cache.tokens("true", "python")
+        self.assertEqual(cache.tokens("true", "json"), [("literal", "true")])
+        self.assertEqual(cache.misses, 2)
+
+    def test_disk_hit_in_a_new_cache(self):
+        HighlightCache(self.cache_dir).tokens("x = 1", "python")
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        cache = HighlightCache(self.cache_dir)
+        self.assertEqual(cache.tokens("x = 1", "python"), tokenize_python("x = 1"))
+        self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (0, 1, 0))
+
+    def test_corrupt_entry_is_retokenized(self):
+        HighlightCache(self.cache_dir).tokens("x = 1", "python")
+        name, = os.listdir(self.cache_dir)
+        with open(os.path.join(self.cache_dir, name), 'wb') as f:
+            f.write(b"\x00garbage")
+        cache = HighlightCache(self.cache_dir)
+        self.assertEqual(cache.tokens("x = 1", "python"), tokenize_python("x = 1"))
+        self.assertEqual(cache.misses, 1)
+
+    def test_unwritable_cache_dir_only_warns(self):
+        cache_dir = os.path.join(self.cache_dir, "file")
+        with open(cache_dir, "w") as f:
+            f.write("not a directory")
+        stderr = StringIO()
+        with redirect_stderr(stderr):
+            tokens = HighlightCache(cache_dir).tokens("x = 1", "python")
+        self.assertEqual(tokens, tokenize_python("x = 1"))
+        self.assertIn("could not write highlight cache entry", stderr.getvalue())
+
+    def test_prune_removes_other_versions(self):
+        cache = HighlightCache(self.cache_dir)
+        cache.tokens("x = 1", "python")
+        (current,) = os.listdir(self.cache_dir)
+        with open(os.path.join(self.cache_dir, "abc-python-0123456789abcdef.hl"), "w") as f:
+            f.write("x")
+        self.assertEqual(cache.prune(), 1)
+        self.assertEqual(os.listdir(self.cache_dir), [current])
+        self.assertEqual(HighlightCache().prune(), 0)
+
+    def test_eviction(self):
+        cache = HighlightCache(max_entries=2)
+        for code in ("a", "b", "c"):
+            cache.tokens(code, "python")
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.tokens("a", "python")
+        self.assertEqual(cache.misses, 4)
+
+
+class TestHighlightNode(unittest.TestCase):
+    def tearDown(self):
+        configure_highlight_cache()
+
+    def test_node(self):
+        node = highlight_to_html_node("return x", "python")
+        self.assertEqual(
+            node.to_html(),
+            '<code class="language-python"><span class="hl-keyword">return</span> x</code>',
+        )
+
+    def test_unsupported_or_empty(self):
+        self.assertIsNone(highlight_to_html_node("fn main() {}", "rust"))
+        self.assertIsNone(highlight_to_html_node("", "python"))
+
+    def test_repeated_snippet_tokenized_once(self):
+        configure_highlight_cache()
+        for _ in range(3):
+            highlight_to_html_node("x = [1, 2]", "py")
+        self.assertEqual(highlight_cache().misses, 1)
+        self.assertEqual(highlight_cache().hits, 2)
+
+    def test_module_cache_is_replaced(self):
+        before = highlight.highlight_cache()
+        configure_highlight_cache(max_entries=1)
+        self.assertIsNot(highlight.highlight_cache(), before)
+        self.assertEqual(highlight.highlight_cache().max_entries, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
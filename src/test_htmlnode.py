@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import LeafNode, ParentNode, HTMLNode
+from htmlnode import LeafNode, ParentNode, HTMLNode, escape_html, escape_attribute
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -108,6 +109,81 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "https://boot.dev"}),
+                ParentNode("ul", [ParentNode("li", [LeafNode(None, "item")])]),
+            ],
+            {"class": "content"},
+        )
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+        self.assertEqual(
+            node.to_html(),
+            '<div class="content"><p><b>Bold</b> text</p><a href="https://boot.dev">link</a><ul><li>item</li></ul></div>',
+        )
+
+    def test_write_to(self):
+        node = ParentNode("p", [LeafNode("i", "italic"), LeafNode(None, "!")])
+        out = io.StringIO()
+        node.write_to(out)
+        self.assertEqual(out.getvalue(), "<p><i>italic</i>!</p>")
+
+    def test_to_html_deep_tree(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), len("deep") + 5000 * len("<span></span>"))
+
+    def test_to_html_no_children(self):
+        node = ParentNode("div", None)
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_nodes_have_no_dict(self):
+        self.assertFalse(hasattr(LeafNode("b", "bold"), "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", []), "__dict__"))
+
+    def test_start_tag_cached(self):
+        node = LeafNode("a", "link", {"href": "https://boot.dev"})
+        self.assertEqual(node.start_tag(), '<a href="https://boot.dev">')
+        self.assertIs(node.start_tag(), node.start_tag())
+        self.assertEqual(node.end_tag(), "</a>")
+
+
+class TestEscaping(unittest.TestCase):
+    def test_escape_html(self):
+        self.assertEqual(escape_html('a < b && c > "d"'), 'a &lt; b &amp;&amp; c &gt; "d"')
+
+    def test_escape_html_unchanged_text_not_copied(self):
+        text = "".join(["plain ", "text"])
+        self.assertIs(escape_html(text), text)
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute('/q?a=1&b="2"'), "/q?a=1&amp;b=&quot;2&quot;")
+
+    def test_leaf_value_escaped(self):
+        self.assertEqual(LeafNode("code", "x < y & z").to_html(), "<code>x &lt; y &amp; z</code>")
+        self.assertEqual(LeafNode(None, "<script>").to_html(), "&lt;script&gt;")
+
+    def test_props_escaped(self):
+        node = LeafNode("img", "", {"src": "/a.png?x=1&y=2", "alt": 'say "hi"'})
+        self.assertEqual(
+            node.to_html(), '<img src="/a.png?x=1&amp;y=2" alt="say &quot;hi&quot;">'
+        )
+
+    def test_escaped_once(self):
+        node = ParentNode("p", [LeafNode("b", "&amp;")])
+        self.assertEqual(node.to_html(), "<p><b>&amp;amp;</b></p>")
+        self.assertEqual(node.to_html(), "<p><b>&amp;amp;</b></p>")
+        out = io.StringIO()
+        node.write_to(out)
+        self.assertEqual(out.getvalue(), "<p><b>&amp;amp;</b></p>")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 from inline_markdown import (
     split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
 )
 
 from textnode import TextNode, TextType
@@ -87,6 +90,106 @@ class TestInlineMarkdown(unittest.TestCase):
         )
 
 
+def chained_split(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_text_to_textnodes(self):
+        text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        self.assertListEqual(
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+            ],
+            text_to_textnodes(text),
+        )
+
+    def test_matches_chained_split(self):
+        texts = [
+            "Plain text with no markdown at all",
+            "Here's the deal, **I like Tolkien**.",
+            "Disney _didn't ruin it_ (okay, but Amazon might have)",
+            "*one* and **two** and _three_ and `four`",
+            "Here's what `elflang` looks like (the perfect coding language):",
+            "[< Back Home](/) and ![Tom Bombadil image](/images/tom.png)",
+            "Wow! An exclamation, [brackets] and (parens) stay literal",
+            "**An Unnecessary Interlude**: The encounter with Tom",
+            "a****b",
+            "",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertListEqual(chained_split(text), text_to_textnodes(text))
+
+    def test_code_is_verbatim(self):
+        self.assertListEqual(
+            [
+                TextNode("Use ", TextType.TEXT),
+                TextNode("a*b_c", TextType.CODE),
+            ],
+            text_to_textnodes("Use `a*b_c`"),
+        )
+
+    def test_bold_inside_link(self):
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode(
+                    "**the** docs",
+                    TextType.LINK,
+                    "https://boot.dev",
+                    children=[
+                        TextNode("the", TextType.BOLD),
+                        TextNode(" docs", TextType.TEXT),
+                    ],
+                ),
+            ],
+            text_to_textnodes("See [**the** docs](https://boot.dev)"),
+        )
+
+    def test_underscores_in_link_url(self):
+        self.assertListEqual(
+            [TextNode("link", TextType.LINK, "https://example.com/a_b_c")],
+            text_to_textnodes("[link](https://example.com/a_b_c)"),
+        )
+
+    def test_italic_inside_bold(self):
+        self.assertListEqual(
+            [
+                TextNode(
+                    "very _very_ bold",
+                    TextType.BOLD,
+                    children=[
+                        TextNode("very ", TextType.TEXT),
+                        TextNode("very", TextType.ITALIC),
+                        TextNode(" bold", TextType.TEXT),
+                    ],
+                ),
+            ],
+            text_to_textnodes("**very _very_ bold**"),
+        )
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import block_cache
+import block_markdown
+import instrument
+from htmlnode import ParentNode
+
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_disabled_runs_the_original_functions(self):
+        original = block_markdown.text_to_children
+        to_html = ParentNode.to_html
+        instrument.enable()
+        self.assertIsNot(block_markdown.text_to_children, original)
+        self.assertIsNot(ParentNode.to_html, to_html)
+        instrument.disable()
+        self.assertIs(block_markdown.text_to_children, original)
+        self.assertIs(ParentNode.to_html, to_html)
+        self.assertIs(block_cache.block_to_html_node, block_markdown.block_to_html_node)
+
+    def test_registered_imports_are_traced(self):
+        instrument.enable()
+        block_cache.BlockCache().render_markdown("# Title\n\nSome text")
+        names = [event["name"] for event in instrument.events()]
+        self.assertIn("render_markdown", names)
+        self.assertEqual(names.count("block_to_html_node"), 2)
+
+    def test_counters_are_thread_safe(self):
+        instrument.enable()
+
+        def add():
+            for _ in range(10000):
+                instrument.count("writes")
+
+        threads = [threading.Thread(target=add) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(instrument.counters()["writes"], 40000)
+
+    def test_disabled_records_nothing(self):
+        block_markdown.markdown_to_html_node("# Title\n\nSome **bold** text").to_html()
+        self.assertEqual(instrument.events(), [])
+        self.assertEqual(instrument.counters(), {})
+
+    def test_spans_and_counters(self):
+        instrument.enable()
+        block_markdown.markdown_to_html_node(
+            "# Title\n\n- [link](/a) and **bold**\n- two"
+        ).to_html()
+        names = [event["name"] for event in instrument.events()]
+        self.assertIn("markdown_to_html_node", names)
+        self.assertIn("block_to_html_node", names)
+        self.assertIn("text_to_children", names)
+        self.assertIn("ParentNode.to_html", names)
+        counters = instrument.counters()
+        # h1 + text, ul + 2 li + 4 inline nodes
+        self.assertEqual(counters["html_nodes"], 9)
+        self.assertEqual(counters["text_nodes"], 5)
+        self.assertGreater(counters["regex_calls"], 0)
+
+    def test_export_chrome_trace(self):
+        instrument.enable()
+        with instrument.span("custom", path="index.md"):
+            instrument.count("widgets", 3)
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            instrument.export_chrome_trace(path)
+            with open(path) as f:
+                data = json.load(f)
+        finally:
+            os.remove(path)
+        span = data["traceEvents"][0]
+        self.assertEqual(span["name"], "custom")
+        self.assertEqual(span["ph"], "X")
+        self.assertEqual(span["args"], {"path": "index.md"})
+        self.assertEqual(data["otherData"]["counters"], {"widgets": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
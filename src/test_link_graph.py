@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from link_graph import LinkGraph, page_url
+
+
+class TestLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = LinkGraph()
+        self.graph.add_page("index.html", "content/index.md", [
+            "/index.css", "/blog/tom", "/images/tolkien.png", "https://www.boot.dev",
+        ])
+        self.graph.add_page("blog/tom/index.html", "content/blog/tom/index.md", [
+            "/", "/blog/nope", "../majesty/#top", "/contact?x=1", "mailto:tom@example.com",
+        ])
+        self.graph.add_page("blog/majesty/index.html", "content/blog/majesty/index.md", [
+            "tom.png", "/about",
+        ])
+        self.graph.add_page("about.html", "content/about.md", [])
+        self.static_files = ["index.css", "images/tolkien.png", "images/unused.png"]
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url("blog/tom/index.html"), "/blog/tom/")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+    def test_broken_links(self):
+        self.assertEqual(
+            self.graph.broken_links(self.static_files),
+            [
+                ("content/blog/majesty/index.md", "tom.png"),
+                ("content/blog/tom/index.md", "/blog/nope"),
+                ("content/blog/tom/index.md", "/contact?x=1"),
+            ],
+        )
+
+    def test_unreferenced_assets(self):
+        self.assertEqual(
+            self.graph.unreferenced_assets(self.static_files), ["images/unused.png"]
+        )
+
+    def test_write_sitemap(self):
+        root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(root, "sitemap.xml")
+            self.graph.write_sitemap(path, "/site/", "https://example.com/")
+            with open(path) as f:
+                sitemap = f.read()
+        finally:
+            shutil.rmtree(root)
+        self.assertIn('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">', sitemap)
+        locs = [line.strip() for line in sitemap.splitlines() if "<loc>" in line]
+        self.assertEqual(locs, [
+            "<url><loc>https://example.com/site/</loc></url>",
+            "<url><loc>https://example.com/site/about.html</loc></url>",
+            "<url><loc>https://example.com/site/blog/majesty/</loc></url>",
+            "<url><loc>https://example.com/site/blog/tom/</loc></url>",
+        ])
+
+    def test_sitemap_needs_site_url(self):
+        root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(root, "sitemap.xml")
+            with self.assertRaises(ValueError):
+                self.graph.write_sitemap(path, "/site/")
+            self.assertFalse(os.path.exists(path))
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,465 @@
+import io
+import os
+import time
+import argparse
+import threading
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from contextlib import redirect_stderr, redirect_stdout
+from block_cache import DEFAULT_MAX_BYTES
+from link_graph import LinkGraph
+from build_stats import BuildStats
+from build_daemon import send_command
+from main import (
+    generate_pages_recursive,
+    discover_pages,
+    PageGenerationError,
+    configure_block_cache,
+    block_cache_stats,
+    md2html,
+    serve_daemon,
+    watch_site,
+    main,
+    _render_mapped_page,
+    configure_ast_cache,
+)
+
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestGeneratePagesRecursive(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        self.write_content("index.md", "# Home\n\n[Tom](/blog/tom)")
+        self.write_content("blog/tom/index.md", "# Tom\n\nOld Tom **Bombadil**")
+        self.write_content("blog/majesty/index.md", "# Majesty\n\n- one\n- two")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write_content(self, rel_path, markdown):
+        path = os.path.join(self.content, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(markdown)
+
+    def build(self, dest, basepath="/", jobs=1, manifest_path=None, async_io=False, relative_urls=False, link_graph=None, build_stats=None):
+        with redirect_stdout(io.StringIO()) as out, redirect_stderr(out):
+            generate_pages_recursive(
+                self.content, self.template, dest, basepath,
+                jobs=jobs, manifest_path=manifest_path, async_io=async_io,
+                relative_urls=relative_urls, link_graph=link_graph,
+                build_stats=build_stats,
+            )
+        return out.getvalue()
+
+    def read_output(self, dest, rel_path):
+        with open(os.path.join(dest, rel_path)) as f:
+            return f.read()
+
+    def test_discover_pages_sorted(self):
+        dest = os.path.join(self.root, "docs")
+        pages = discover_pages(self.content, dest)
+        self.assertEqual(
+            [os.path.relpath(src, self.content) for src, _ in pages],
+            ["blog/majesty/index.md", "blog/tom/index.md", "index.md"],
+        )
+        self.assertTrue(os.path.isdir(os.path.join(dest, "blog", "tom")))
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        serial_log = self.build(serial, "/site/")
+        parallel_log = self.build(parallel, "/site/", jobs=2)
+        self.assertEqual(
+            serial_log.replace(serial, ""), parallel_log.replace(parallel, "")
+        )
+        for rel_path in ["index.html", "blog/tom/index.html", "blog/majesty/index.html"]:
+            self.assertEqual(
+                self.read_output(serial, rel_path),
+                self.read_output(parallel, rel_path),
+            )
+        self.assertEqual(
+            self.read_output(parallel, "index.html"),
+            '<title>Home</title><body><div><h1>Home</h1><p><a href="/site/blog/tom">Tom</a></p></div></body>',
+        )
+
+    def test_async_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        pipelined = os.path.join(self.root, "async")
+        self.build(serial, "/site/")
+        self.build(pipelined, "/site/", async_io=True)
+        for rel_path in ["index.html", "blog/tom/index.html", "blog/majesty/index.html"]:
+            self.assertEqual(
+                self.read_output(serial, rel_path),
+                self.read_output(pipelined, rel_path),
+            )
+
+    def test_block_cache_reuses_shared_blocks(self):
+        footer = "> Shared footer with a [link](/about)"
+        self.write_content("index.md", "# Home\n\n" + footer)
+        self.write_content("blog/tom/index.md", "# Tom\n\n" + footer)
+        configure_block_cache(1024 * 1024)
+        self.addCleanup(configure_block_cache, DEFAULT_MAX_BYTES)
+        dest = os.path.join(self.root, "docs")
+        self.build(dest, "/site/")
+        self.assertEqual(block_cache_stats()["hits"], 1)
+        self.assertIn(
+            '<blockquote>Shared footer with a <a href="/site/about">link</a></blockquote>',
+            self.read_output(dest, "blog/tom/index.html"),
+        )
+        configure_block_cache(0)
+        uncached = os.path.join(self.root, "uncached")
+        self.build(uncached, "/site/")
+        self.assertEqual(block_cache_stats()["hits"], 0)
+        for rel_path in ["index.html", "blog/tom/index.html", "blog/majesty/index.html"]:
+            self.assertEqual(
+                self.read_output(dest, rel_path), self.read_output(uncached, rel_path)
+            )
+
+    def test_basepath_only_rewrites_urls(self):
+        self.write_content(
+            "index.md",
+            '# Home\n\n```\n<a href="/x">\n```\n\n[Tom](/blog/tom) ![t](/t.png)',
+        )
+        dest = os.path.join(self.root, "docs")
+        self.build(dest, "/site/")
+        html = self.read_output(dest, "index.html")
+        self.assertIn('<code>&lt;a href="/x"&gt;\n</code>', html)
+        self.assertIn('<a href="/site/blog/tom">Tom</a>', html)
+        self.assertIn('<img src="/site/t.png" alt="t">', html)
+
+    def test_relative_urls(self):
+        with open(self.template, "w") as f:
+            f.write('<link href="/index.css">{{ Content }}')
+        self.write_content("blog/tom/index.md", "# Tom\n\n[Home](/) [Majesty](/blog/majesty)")
+        dest = os.path.join(self.root, "docs")
+        self.build(dest, "/site/", relative_urls=True)
+        self.assertEqual(
+            self.read_output(dest, "blog/tom/index.html"),
+            '<link href="../../index.css"><div><h1>Tom</h1>'
+            '<p><a href="../../">Home</a> <a href="../majesty">Majesty</a></p></div>',
+        )
+        self.assertIn(
+            '<link href="index.css"><div><h1>Home</h1><p><a href="blog/tom">Tom</a></p>',
+            self.read_output(dest, "index.html"),
+        )
+
+    def test_link_graph(self):
+        self.write_content("blog/tom/index.md", "# Tom\n\n[Home](/) [Gone](/blog/gone)")
+        expected = {
+            "index.html": ["/blog/tom"],
+            "blog/tom/index.html": ["/", "/blog/gone"],
+            "blog/majesty/index.html": [],
+        }
+        for options in ({}, {"jobs": 2}, {"async_io": True}):
+            graph = LinkGraph()
+            dest = os.path.join(self.root, "docs")
+            self.build(dest, "/site/", link_graph=graph, **options)
+            self.assertEqual(
+                {page: refs for page, (_, refs) in graph.pages.items()}, expected
+            )
+            self.assertEqual(
+                graph.broken_links(),
+                [(os.path.join(self.content, "blog/tom/index.md"), "/blog/gone")],
+            )
+
+    def test_link_graph_incremental(self):
+        dest = os.path.join(self.root, "docs")
+        manifest = os.path.join(self.root, "manifest.json")
+        # Built without a graph, so no links are stored yet
+        self.build(dest, manifest_path=manifest)
+        graph = LinkGraph()
+        self.build(dest, manifest_path=manifest, link_graph=graph)
+        self.assertEqual(graph.pages["index.html"][1], ["/blog/tom"])
+        # Skipped pages contribute the links stored in the manifest
+        graph = LinkGraph()
+        log = self.build(dest, manifest_path=manifest, link_graph=graph)
+        self.assertIn("Skipping 3 unchanged page(s)", log)
+        self.assertEqual(graph.pages["index.html"][1], ["/blog/tom"])
+        self.assertEqual(len(graph.pages), 3)
+
+    def test_build_stats(self):
+        dest = os.path.join(self.root, "docs")
+        for options in ({}, {"async_io": True}, {"jobs": 2}):
+            stats = BuildStats()
+            self.build(dest, build_stats=stats, **options)
+            page = stats.pages[os.path.join(self.content, "blog", "majesty", "index.md")]
+            self.assertEqual(page.blocks, 2)
+            self.assertEqual(page.bytes_in, len("# Majesty\n\n- one\n- two"))
+            self.assertEqual(
+                page.bytes_out,
+                os.path.getsize(os.path.join(dest, "blog", "majesty", "index.html")),
+            )
+            self.assertEqual(len(stats.pages), 3)
+
+    def test_build_stats_incremental(self):
+        dest = os.path.join(self.root, "docs")
+        manifest_path = os.path.join(self.root, "manifest.json")
+        self.build(dest, manifest_path=manifest_path)
+        self.write_content("index.md", "# Home\n\nChanged")
+        stats = BuildStats()
+        self.build(dest, manifest_path=manifest_path, build_stats=stats)
+        self.assertEqual(list(stats.pages), [os.path.join(self.content, "index.md")])
+        self.assertEqual(stats.pages_skipped, 2)
+
+    def test_ast_cache_template_change(self):
+        dest = os.path.join(self.root, "docs")
+        plain = os.path.join(self.root, "plain")
+        manifest_path = os.path.join(self.root, "manifest.json")
+        configure_ast_cache(os.path.join(self.root, "ast"))
+        try:
+            self.build(dest, "/site/", manifest_path=manifest_path)
+            with open(self.template, "w") as f:
+                f.write("<main>{{ Content }}</main>")
+            for options in ({}, {"jobs": 2}, {"async_io": True}):
+                stats = BuildStats()
+                self.build(dest, "/site/", manifest_path=manifest_path, build_stats=stats, **options)
+                summary = stats.summary()
+                self.assertEqual(summary["caches"]["ast_cache"]["hits"], 3)
+                self.assertEqual(summary["caches"]["ast_cache"]["lookups"], 3)
+                os.remove(manifest_path)
+        finally:
+            configure_ast_cache(None)
+        self.build(plain, "/site/")
+        for rel_path in ["index.html", "blog/tom/index.html", "blog/majesty/index.html"]:
+            self.assertEqual(self.read_output(dest, rel_path), self.read_output(plain, rel_path))
+
+    def test_mapped_page_matches_read_page(self):
+        self.write_content(
+            "blog/tom/index.md",
+            "Intro\r\n\r\n# Tom\r\n\r\n```\r\ncode\r\n\r\n```\r\n\r\n[Home](/)\r\n",
+        )
+        read = os.path.join(self.root, "read")
+        mapped = os.path.join(self.root, "mapped")
+        self.build(read, "/site/")
+        with mock.patch("main.MMAP_THRESHOLD", 0):
+            self.build(mapped, "/site/")
+        for rel_path in ["index.html", "blog/tom/index.html", "blog/majesty/index.html"]:
+            self.assertEqual(
+                self.read_output(read, rel_path), self.read_output(mapped, rel_path)
+            )
+        self.assertFalse(os.path.exists(os.path.join(mapped, "index.html.tmp")))
+
+    def test_title_escaped(self):
+        self.write_content("index.md", "# Fish & Chips\n\nSalt < vinegar")
+        read = os.path.join(self.root, "read")
+        mapped = os.path.join(self.root, "mapped")
+        self.build(read)
+        with mock.patch("main.MMAP_THRESHOLD", 0):
+            self.build(mapped)
+        html = self.read_output(read, "index.html")
+        self.assertIn("<title>Fish &amp; Chips</title>", html)
+        self.assertIn("<p>Salt &lt; vinegar</p>", html)
+        self.assertEqual(html, self.read_output(mapped, "index.html"))
+
+    def test_mapped_page_failure_leaves_no_output(self):
+        self.write_content("index.md", "no title here")
+        dest = os.path.join(self.root, "docs")
+        with mock.patch("main.MMAP_THRESHOLD", 0), self.assertRaises(PageGenerationError):
+            self.build(dest)
+        self.assertEqual(os.listdir(dest), ["blog"])
+
+    def test_mapped_page_reports_the_real_error(self):
+        self.write_content("index.md", "# Home")
+        with mock.patch("main._make_parent_dirs", side_effect=PermissionError("read-only")):
+            with self.assertRaises(PermissionError):
+                _render_mapped_page(
+                    os.path.join(self.content, "index.md"), self.template,
+                    os.path.join(self.root, "docs", "index.html"),
+                )
+
+    def test_md2html_mapped_file(self):
+        path = os.path.join(self.root, "doc.md")
+        with open(path, "w") as f:
+            f.write("# Doc\n\nSome *text*\n")
+        out = io.StringIO()
+        md2html(path, out)
+        self.assertEqual(out.getvalue(), "<div><h1>Doc</h1><p>Some <i>text</i></p></div>\n")
+        open(path, "w").close()
+        out = io.StringIO()
+        md2html(path, out)
+        self.assertEqual(out.getvalue(), "<div></div>\n")
+
+    def test_failed_page_keeps_others(self):
+        self.write_content("blog/broken/index.md", "No title here")
+        dest = os.path.join(self.root, "docs")
+        with self.assertRaises(PageGenerationError) as context:
+            self.build(dest, jobs=2)
+        failures = context.exception.failures
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0][0].endswith(os.path.join("broken", "index.md")))
+        self.assertIn("No h1 header found", failures[0][1])
+        self.assertTrue(os.path.exists(os.path.join(dest, "blog", "tom", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(dest, "index.html")))
+
+    def test_directory_template(self):
+        self.write_content("blog/template.html", "<article>{{ Content }}</article>")
+        dest = os.path.join(self.root, "docs")
+        self.build(dest)
+        self.assertTrue(
+            self.read_output(dest, "blog/tom/index.html").startswith("<article>")
+        )
+        self.assertTrue(self.read_output(dest, "index.html").startswith("<title>"))
+
+    def test_incremental_build(self):
+        dest = os.path.join(self.root, "docs")
+        manifest_path = os.path.join(self.root, "manifest.json")
+        self.build(dest, manifest_path=manifest_path)
+
+        log = self.build(dest, manifest_path=manifest_path)
+        self.assertIn("Skipping 3 unchanged page(s)", log)
+        self.assertNotIn("Generated page", log)
+
+        self.write_content("blog/tom/index.md", "# Tom\n\nRewritten")
+        log = self.build(dest, manifest_path=manifest_path)
+        self.assertIn("Skipping 2 unchanged page(s)", log)
+        self.assertIn(os.path.join("tom", "index.html"), log)
+        self.assertIn("Rewritten", self.read_output(dest, "blog/tom/index.html"))
+
+    def test_incremental_build_basepath_change(self):
+        dest = os.path.join(self.root, "docs")
+        manifest_path = os.path.join(self.root, "manifest.json")
+        self.build(dest, manifest_path=manifest_path)
+        log = self.build(dest, "/site/", manifest_path=manifest_path)
+        self.assertNotIn("Skipping", log)
+        self.assertIn('href="/site/blog/tom"', self.read_output(dest, "index.html"))
+
+    def test_incremental_build_removes_deleted_pages(self):
+        dest = os.path.join(self.root, "docs")
+        manifest_path = os.path.join(self.root, "manifest.json")
+        self.build(dest, manifest_path=manifest_path)
+        os.remove(os.path.join(self.content, "blog", "majesty", "index.md"))
+        log = self.build(dest, manifest_path=manifest_path)
+        self.assertIn("Removing stale page", log)
+        self.assertFalse(
+            os.path.exists(os.path.join(dest, "blog", "majesty", "index.html"))
+        )
+
+
+class TestMain(unittest.TestCase):
+    def test_negative_jobs_rejected(self):
+        stderr = io.StringIO()
+        with mock.patch("sys.argv", ["main.py", "--jobs", "-1"]), \
+                redirect_stderr(stderr), self.assertRaises(SystemExit) as exit_:
+            main()
+        self.assertEqual(exit_.exception.code, 2)
+        self.assertIn("--jobs: must be 0 (one per CPU) or more, not -1", stderr.getvalue())
+
+    def test_negative_stats_top_rejected(self):
+        stderr = io.StringIO()
+        with mock.patch("sys.argv", ["main.py", "--stats-top", "-3"]), \
+                redirect_stderr(stderr), self.assertRaises(SystemExit) as exit_:
+            main()
+        self.assertEqual(exit_.exception.code, 2)
+        self.assertIn("--stats-top: must be 0 or more, not -3", stderr.getvalue())
+
+
+class TestWatchSite(unittest.TestCase):
+    def test_failed_rebuild_keeps_watching(self):
+        callbacks = []
+        with mock.patch("main.start_server"), \
+                mock.patch("main.watch", side_effect=lambda paths, rebuild: callbacks.append(rebuild)), \
+                mock.patch("main.ReloadNotifier") as notifier, \
+                redirect_stdout(io.StringIO()):
+            watch_site("static", "content", "template.html", "docs", None, None,
+                       argparse.Namespace(port=0))
+        (rebuild,) = callbacks
+        stderr = io.StringIO()
+        with mock.patch("main._rebuild", side_effect=OSError("gone mid-save")), \
+                redirect_stderr(stderr):
+            rebuild(["content/index.md"])
+        self.assertIn("Rebuild failed: OSError: gone mid-save", stderr.getvalue())
+        notifier.return_value.notify.assert_not_called()
+
+
+class TestBuildDaemon(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static = os.path.join(self.root, "static")
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.socket_path = os.path.join(self.root, "daemon.sock")
+        os.makedirs(self.static)
+        os.makedirs(self.content)
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        with open(os.path.join(self.static, "index.css"), "w") as f:
+            f.write("body {}")
+        self.write_page("# Home\n\n[Tom](/tom.html)")
+        with open(os.path.join(self.content, "tom.md"), "w") as f:
+            f.write("# Tom\n\nOld Tom")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write_page(self, markdown):
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write(markdown)
+
+    def test_rebuild_and_stats(self):
+        self.check_rebuild_and_stats()
+
+    def test_rebuild_with_ast_cache(self):
+        # An edited page misses the AST cache but only re-renders the
+        # blocks that changed
+        configure_ast_cache(os.path.join(self.root, "ast"))
+        try:
+            self.check_rebuild_and_stats()
+        finally:
+            configure_ast_cache(None)
+
+    def check_rebuild_and_stats(self):
+        configure_block_cache(DEFAULT_MAX_BYTES)
+        args = argparse.Namespace(
+            basepath="/", relative_urls=False, site_url="", gzip=False,
+            optimize_images=False, checksum=False, link_static=False, stats_top=5,
+        )
+        thread = threading.Thread(target=serve_daemon, args=(
+            self.socket_path, self.static, self.content, self.template, self.docs,
+            os.path.join(self.root, "manifest.json"), None, args,
+        ))
+        with redirect_stdout(io.StringIO()):
+            thread.start()
+            try:
+                for _ in range(500):
+                    if os.path.exists(self.socket_path):
+                        break
+                    time.sleep(0.01)
+                response = send_command(self.socket_path, "rebuild", timeout=10)
+                self.assertTrue(response["ok"])
+                self.assertEqual(response["stats"]["pages"]["rendered"], 2)
+                self.assertTrue(os.path.exists(os.path.join(self.docs, "index.css")))
+                # No --site-url: a sitemap couldn't have absolute URLs
+                self.assertIn("Not writing sitemap.xml", response["output"])
+                self.assertFalse(os.path.exists(os.path.join(self.docs, "sitemap.xml")))
+
+                self.write_page("# Home\n\n[Tom](/tom.html)\n\nNew paragraph")
+                response = send_command(
+                    self.socket_path, "rebuild", os.path.join(self.content, "index.md"),
+                    timeout=10,
+                )
+                self.assertIn("Skipping 1 unchanged page(s)", response["output"])
+                self.assertEqual(response["stats"]["caches"]["block_cache"]["hits"], 2)
+                with open(os.path.join(self.docs, "index.html")) as f:
+                    self.assertIn("<p>New paragraph</p>", f.read())
+
+                stats = send_command(self.socket_path, "stats", timeout=10)
+                self.assertEqual(stats["builds"], 2)
+                self.assertEqual(stats["last_build"], response["stats"])
+            finally:
+                send_command(self.socket_path, "stop", timeout=10)
+                thread.join(10)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
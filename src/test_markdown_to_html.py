@@ -1,5 +1,10 @@
+import io
 import unittest
-from block_markdown import markdown_to_html_node
+from block_markdown import (
+    markdown_to_html_node,
+    markdown_stream_to_html,
+    markdown_buffer_to_html,
+)
 
 
 class TestMarkdownToHTML(unittest.TestCase):
@@ -194,9 +199,65 @@ def hello():
         html = node.to_html()
         self.assertEqual(
             html,
-            '<div><pre><code>def hello():\n    print("world")\n</code></pre></div>',
+            '<div><pre><code class="language-python">'
+            '<span class="hl-keyword">def</span> <span class="hl-function">hello</span>():\n'
+            '    <span class="hl-builtin">print</span>(<span class="hl-string">"world"</span>)\n'
+            '</code></pre></div>',
         )
 
+    def test_code_block_unknown_language_is_plain(self):
+        md = "```rust\nfn main() {}\n```"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>fn main() {}\n</code></pre></div>",
+        )
+
+    def test_highlighted_code_is_escaped(self):
+        md = '```html\n<a href="/x">&amp; <</a>\n```'
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '<div><pre><code class="language-html">'
+            '<span class="hl-tag">&lt;a</span> <span class="hl-attr">href</span>='
+            '<span class="hl-string">"/x"</span><span class="hl-tag">&gt;</span>'
+            '<span class="hl-entity">&amp;amp;</span> &lt;<span class="hl-tag">&lt;/a</span>'
+            '<span class="hl-tag">&gt;</span>\n</code></pre></div>',
+        )
+
+    def test_codeblock_with_blank_lines(self):
+        md = "```\nline one\n\nline two\n```"
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            node.to_html(),
+            "<div><pre><code>line one\n\nline two\n</code></pre></div>",
+        )
+
+    def test_special_characters_escaped(self):
+        md = "# Fish & Chips\n\n[< Back](/) with **a<b** and `&lt;`\n\n```\nif a < b && c:\n```\n"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><h1>Fish &amp; Chips</h1>"
+            '<p><a href="/">&lt; Back</a> with <b>a&lt;b</b> and <code>&amp;lt;</code></p>'
+            "<pre><code>if a &lt; b &amp;&amp; c:\n</code></pre></div>",
+        )
+
+    def test_markdown_from_file_object(self):
+        md = "# Title\n\nSome **bold** text\n"
+        node = markdown_to_html_node(io.StringIO(md))
+        self.assertEqual(node.to_html(), markdown_to_html_node(md).to_html())
+
+    def test_markdown_stream_to_html(self):
+        md = "# Title\n\n- one\n- two\n\n```\ncode\n\nmore\n```\n"
+        out = io.StringIO()
+        markdown_stream_to_html(io.StringIO(md), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(md).to_html())
+
+    def test_markdown_buffer_to_html(self):
+        md = "# Title\n\n- one\n- [two](/two)\n\n```\ncode\n\nmore\n```\n"
+        out = io.StringIO()
+        markdown_buffer_to_html(md.encode(), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(md).to_html())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,174 @@
+import io
+import os
+import zlib
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from png_optimize import (
+    PNG_SIGNATURE,
+    read_chunks,
+    optimize_png,
+    filter_scanlines,
+    unfilter_scanlines,
+    optimize_images,
+    _add_rows,
+    _sub_rows,
+)
+
+
+def chunk(chunk_type, body):
+    return (
+        struct.pack(">I", len(body)) + chunk_type + body
+        + struct.pack(">I", zlib.crc32(chunk_type + body))
+    )
+
+
+def make_png(width, height, rows, color_type=6, bit_depth=8, extra=(), level=1):
+    """Build a PNG with unfiltered rows, weak compression and extra chunks."""
+    ihdr = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
+    raw = b"".join(b"\x00" + row for row in rows)
+    return (
+        PNG_SIGNATURE + chunk(b"IHDR", ihdr)
+        + b"".join(chunk(chunk_type, body) for chunk_type, body in extra)
+        + chunk(b"IDAT", zlib.compress(raw, level)) + chunk(b"IEND", b"")
+    )
+
+
+def gradient_rows(width, height, channels=4):
+    return [
+        bytes((x * 3 + y * 5 + c * 40) & 0xff for x in range(width) for c in range(channels))
+        for y in range(height)
+    ]
+
+
+def decode_pixels(data):
+    chunks = read_chunks(data)
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", chunks[0][1][:10])
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color_type]
+    row_bytes = (width * bit_depth * channels + 7) // 8
+    raw = zlib.decompress(b"".join(body for chunk_type, body in chunks if chunk_type == b"IDAT"))
+    return unfilter_scanlines(raw, height, row_bytes, max(1, bit_depth * channels // 8))
+
+
+class TestSwarArithmetic(unittest.TestCase):
+    def test_add_and_sub_match_bytewise(self):
+        rng = random.Random(0)
+        a = bytes(rng.randrange(256) for _ in range(64))
+        b = bytes(rng.randrange(256) for _ in range(64))
+        ai, bi = int.from_bytes(a, "big"), int.from_bytes(b, "big")
+        self.assertEqual(
+            _add_rows(ai, bi, 64).to_bytes(64, "big"),
+            bytes((x + y) & 0xff for x, y in zip(a, b)),
+        )
+        self.assertEqual(
+            _sub_rows(ai, bi, 64).to_bytes(64, "big"),
+            bytes((x - y) & 0xff for x, y in zip(a, b)),
+        )
+
+
+class TestScanlineFilters(unittest.TestCase):
+    def test_filter_roundtrip(self):
+        rng = random.Random(1)
+        for bpp in (1, 3, 4):
+            rows = gradient_rows(16, 8, bpp) + [
+                bytes(rng.randrange(256) for _ in range(16 * bpp)) for _ in range(8)
+            ]
+            filtered = filter_scanlines(rows, bpp)
+            self.assertEqual(unfilter_scanlines(filtered, len(rows), 16 * bpp, bpp), rows)
+
+    def test_smooth_rows_get_filtered(self):
+        rows = gradient_rows(8, 5, 3)
+        filtered = filter_scanlines(rows, 3)
+        # A smooth gradient should not stay unfiltered
+        self.assertNotEqual({filtered[y * 25] for y in range(5)}, {0})
+
+    def test_unknown_filter(self):
+        with self.assertRaises(ValueError):
+            unfilter_scanlines(b"\x07\x00", 1, 1, 1)
+
+
+class TestOptimizePng(unittest.TestCase):
+    def test_pixels_unchanged_and_smaller(self):
+        rows = gradient_rows(40, 30)
+        data = make_png(40, 30, rows, extra=[(b"tEXt", b"Comment\x00" + b"x" * 200)])
+        optimized = optimize_png(data)
+        self.assertLess(len(optimized), len(data))
+        self.assertEqual(decode_pixels(optimized), rows)
+
+    def test_strips_metadata_keeps_colour_chunks(self):
+        rows = gradient_rows(10, 10)
+        data = make_png(10, 10, rows, extra=[
+            (b"sRGB", b"\x00"),
+            (b"pHYs", struct.pack(">IIB", 2835, 2835, 1)),
+            (b"tEXt", b"Author\x00someone"),
+        ])
+        chunk_types = [chunk_type for chunk_type, _ in read_chunks(optimize_png(data))]
+        self.assertEqual(chunk_types, [b"IHDR", b"sRGB", b"IDAT", b"IEND"])
+
+    def test_palette_with_transparency(self):
+        palette = bytes(range(12))
+        rows = [bytes((x + y) % 4 for x in range(32)) for y in range(16)]
+        data = make_png(32, 16, rows, color_type=3, extra=[
+            (b"PLTE", palette), (b"tRNS", b"\x00\xff"), (b"tIME", bytes(7)),
+        ])
+        optimized = optimize_png(data)
+        chunk_types = [chunk_type for chunk_type, _ in read_chunks(optimized)]
+        self.assertEqual(chunk_types, [b"IHDR", b"PLTE", b"tRNS", b"IDAT", b"IEND"])
+        self.assertEqual(decode_pixels(optimized), rows)
+
+    def test_never_larger(self):
+        rows = [bytes([0, 0, 0, 0])]
+        data = make_png(1, 1, rows, level=9)
+        self.assertLessEqual(len(optimize_png(data)), len(data))
+
+    def test_animated_png_unchanged(self):
+        data = make_png(4, 4, gradient_rows(4, 4), extra=[(b"acTL", bytes(8))])
+        self.assertIs(optimize_png(data), data)
+
+    def test_invalid_png(self):
+        with self.assertRaises(ValueError):
+            optimize_png(b"not a png")
+        data = bytearray(make_png(4, 4, gradient_rows(4, 4)))
+        data[20] ^= 0xff
+        with self.assertRaises(ValueError):
+            optimize_png(bytes(data))
+
+
+class TestOptimizeImages(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static = os.path.join(self.root, "static")
+        self.cache = os.path.join(self.root, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.png = make_png(40, 30, gradient_rows(40, 30))
+        for name in ("a.png", "copy.png"):
+            with open(os.path.join(self.static, "images", name), "wb") as f:
+                f.write(self.png)
+        with open(os.path.join(self.static, "index.css"), "w") as f:
+            f.write("body {}")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def optimize(self):
+        with redirect_stdout(io.StringIO()) as out:
+            result = optimize_images(self.static, self.cache, jobs=1)
+        return result, out.getvalue()
+
+    def test_optimizes_once_per_content(self):
+        result, log = self.optimize()
+        self.assertEqual(sorted(result), ["images/a.png", "images/copy.png"])
+        # Identical images share one cache entry
+        self.assertEqual(result["images/a.png"], result["images/copy.png"])
+        self.assertEqual(log.count("Optimized image"), 1)
+        with open(result["images/a.png"], "rb") as f:
+            self.assertEqual(f.read(), optimize_png(self.png))
+        _, log = self.optimize()
+        self.assertEqual(log, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import io
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from precompress import precompress_outputs
+
+
+class TestPrecompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.docs = os.path.join(self.root, "docs")
+        self.cache = os.path.join(self.root, "cache.json")
+        self.page = self.write("blog/tom/index.html", "<p>Old Tom Bombadil</p>" * 50)
+        self.css = self.write("index.css", "body { color: red; }\n" * 50)
+        self.tiny = self.write("tiny.txt", "a")
+        self.write("images/tom.png", "not compressible by extension" * 50)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, rel_path, data):
+        path = os.path.join(self.docs, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def precompress(self, **kwargs):
+        kwargs.setdefault("cache_path", self.cache)
+        kwargs.setdefault("jobs", 1)
+        with redirect_stdout(io.StringIO()):
+            return precompress_outputs(self.docs, **kwargs)
+
+    def test_writes_gz_siblings(self):
+        stats = self.precompress()
+        self.assertEqual(stats["compressed"], 2)
+        self.assertEqual(stats["skipped"], 1)
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>Old Tom Bombadil</p>" * 50)
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+        # Not smaller, so no .gz; images are left alone
+        self.assertFalse(os.path.exists(self.tiny + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "tom.png.gz")))
+
+    def test_output_is_deterministic(self):
+        self.precompress(cache_path=None)
+        with open(self.page + ".gz", "rb") as f:
+            first = f.read()
+        self.precompress(cache_path=None)
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_reuses_unchanged_files(self):
+        self.precompress()
+        stats = self.precompress()
+        self.assertEqual(stats["compressed"], 0)
+        self.assertEqual(stats["reused"], 3)
+
+    def test_rewritten_with_same_bytes_is_reused(self):
+        self.precompress()
+        self.write("index.css", "body { color: red; }\n" * 50)
+        os.utime(self.css, ns=(0, 0))
+        stats = self.precompress()
+        self.assertEqual(stats["compressed"], 0)
+        self.assertEqual(stats["reused"], 3)
+
+    def test_recompresses_changed_file(self):
+        self.precompress()
+        self.write("index.css", "body { color: blue; }\n" * 50)
+        os.utime(self.css, ns=(0, 0))
+        stats = self.precompress()
+        self.assertEqual(stats["compressed"], 1)
+        with gzip.open(self.css + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "body { color: blue; }\n" * 50)
+
+    def test_missing_gz_is_rewritten(self):
+        self.precompress()
+        os.remove(self.page + ".gz")
+        stats = self.precompress()
+        self.assertEqual(stats["compressed"], 1)
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+
+    def test_removes_gz_of_deleted_output(self):
+        self.precompress()
+        os.remove(self.page)
+        stats = self.precompress()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_process_pool(self):
+        stats = self.precompress(jobs=2)
+        self.assertEqual(stats["compressed"], 2)
+        with gzip.open(self.css + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "body { color: red; }\n" * 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -197,6 +197,14 @@ class TestSplitNodesLink(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_links_dense(self):
+        text = ", ".join(f"[p{i}](/p/{i})" for i in range(2000))
+        new_nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(new_nodes), 3999)
+        self.assertEqual(new_nodes[0], TextNode("p0", TextType.LINK, "/p/0"))
+        self.assertEqual(new_nodes[1], TextNode(", ", TextType.TEXT))
+        self.assertEqual(new_nodes[-1], TextNode("p1999", TextType.LINK, "/p/1999"))
+
 
 if __name__ == "__main__":
     unittest.main()
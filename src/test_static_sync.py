@@ -0,0 +1,94 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from static_sync import sync_static
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.write(self.static, "index.css", "body {}")
+        self.write(self.static, "images/tom.png", "not really a png")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, base, rel_path, data):
+        path = os.path.join(base, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def sync(self, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return sync_static(self.static, self.docs, **kwargs)
+
+    def test_copies_then_skips_unchanged(self):
+        self.assertEqual(self.sync(), {"copied": 2, "unchanged": 0, "removed": 0})
+        with open(os.path.join(self.docs, "images", "tom.png")) as f:
+            self.assertEqual(f.read(), "not really a png")
+        self.assertEqual(self.sync(), {"copied": 0, "unchanged": 2, "removed": 0})
+
+    def test_copies_changed_file(self):
+        self.sync()
+        self.write(self.static, "index.css", "body { color: red; }")
+        self.assertEqual(self.sync(), {"copied": 1, "unchanged": 1, "removed": 0})
+        with open(os.path.join(self.docs, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red; }")
+
+    def test_checksum_detects_same_size_edit(self):
+        self.sync()
+        dest = os.path.join(self.docs, "index.css")
+        stat = os.stat(dest)
+        with open(dest, "w") as f:
+            f.write("body{!}")
+        os.utime(dest, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.sync()["copied"], 0)
+        self.assertEqual(self.sync(checksum=True)["copied"], 1)
+
+    def test_removes_stale_but_keeps_pages(self):
+        self.sync()
+        page = self.write(self.docs, "blog/tom/index.html", "<html></html>")
+        self.write(self.docs, "images/old.png", "stale")
+        result = self.sync(keep=[page])
+        self.assertEqual(result["removed"], 1)
+        self.assertTrue(os.path.exists(page))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "old.png")))
+
+    def test_keep_suffixes(self):
+        self.sync()
+        page = self.write(self.docs, "blog/tom/index.html", "<html></html>")
+        page_gz = self.write(self.docs, "blog/tom/index.html.gz", "gz")
+        css_gz = self.write(self.docs, "index.css.gz", "gz")
+        stale_gz = self.write(self.docs, "old.css.gz", "gz")
+        result = self.sync(keep=[page], keep_suffixes=(".gz",))
+        self.assertEqual(result["removed"], 1)
+        self.assertTrue(os.path.exists(page_gz))
+        self.assertTrue(os.path.exists(css_gz))
+        self.assertFalse(os.path.exists(stale_gz))
+
+    def test_substitutes(self):
+        optimized = self.write(self.root, "cache/tom.png", "smaller png")
+        self.sync(substitutes={os.path.join("images", "tom.png"): optimized})
+        with open(os.path.join(self.docs, "images", "tom.png")) as f:
+            self.assertEqual(f.read(), "smaller png")
+        result = self.sync(substitutes={os.path.join("images", "tom.png"): optimized})
+        self.assertEqual(result["copied"], 0)
+        # Without the substitute the original comes back
+        self.assertEqual(self.sync()["copied"], 1)
+
+    def test_link(self):
+        self.sync(link=True)
+        src = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.docs, "index.css"))
+        self.assertEqual(src.st_ino, dest.st_ino)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+from template import Template, TemplateResolver, load_template
+from url_resolver import URLResolver
+
+
+class TestTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.segments,
+            ["<title>", "Title", "</title><body>", "Content", "</body>"],
+        )
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "Tom", "Content": iter(["<p>", "hi", "</p>"])}),
+            "<h1>Tom</h1><p>hi</p>",
+        )
+
+    def test_render_unknown_placeholder(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render({"Title": "Tom"}), "Tom {{ Author }}")
+
+    def test_url_attributes(self):
+        template = Template(
+            '<link href="/index.css"><a href="https://boot.dev">x</a>'
+            '<img src="/images/{{ Name }}.png">{{ Content }}'
+        )
+        values = {"Name": "tom", "Content": 'href="/literal"'}
+        self.assertEqual(
+            template.render(values),
+            '<link href="/index.css"><a href="https://boot.dev">x</a>'
+            '<img src="/images/tom.png">href="/literal"',
+        )
+        self.assertEqual(
+            template.render(values, URLResolver("/site/")),
+            '<link href="/site/index.css"><a href="https://boot.dev">x</a>'
+            '<img src="/site/images/tom.png">href="/literal"',
+        )
+        relative = URLResolver(page_path="blog/tom/index.html", relative=True)
+        self.assertEqual(
+            Template('<link href="/index.css">').render({}, relative),
+            '<link href="../../index.css">',
+        )
+        self.assertEqual(
+            template.render(values, relative),
+            '<link href="../../index.css"><a href="https://boot.dev">x</a>'
+            '<img src="../../images/tom.png">href="/literal"',
+        )
+
+    def test_url_attribute_from_placeholder(self):
+        template = Template('<a href="{{ Url }}">x</a><a href="{{ Other }}">y</a>')
+        self.assertEqual(
+            template.render({"Url": "/blog/"}, URLResolver("/site/")),
+            '<a href="/site/blog/">x</a><a href="{{ Other }}">y</a>',
+        )
+        self.assertEqual(
+            template.render({"Url": "https://boot.dev"}, URLResolver("/site/")),
+            '<a href="https://boot.dev">x</a><a href="{{ Other }}">y</a>',
+        )
+
+    def test_values_are_not_rescanned(self):
+        template = Template("{{ Title }}|{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "{{ Content }}", "Content": "body"}),
+            "{{ Content }}|body",
+        )
+
+
+class TestTemplateFiles(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        os.makedirs(os.path.join(self.content, "blog", "tom"))
+        self.default = self.write("template.html", "root {{ Content }}")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_load_template_cached(self):
+        self.assertIs(load_template(self.default), load_template(self.default))
+
+    def test_load_template_reloads_on_change(self):
+        first = load_template(self.default)
+        self.write("template.html", "changed template {{ Content }}")
+        second = load_template(self.default)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render({"Content": "x"}), "changed template x")
+
+    def test_resolver_per_directory(self):
+        blog_template = self.write("content/blog/template.html", "blog {{ Content }}")
+        resolver = TemplateResolver(self.content, self.default)
+        self.assertEqual(
+            resolver.resolve(os.path.join(self.content, "blog", "tom", "index.md")),
+            blog_template,
+        )
+        self.assertEqual(
+            resolver.resolve(os.path.join(self.content, "index.md")),
+            self.default,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
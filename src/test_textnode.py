@@ -1,6 +1,7 @@
 import unittest
 
 from textnode import TextNode, TextType, text_node_to_html_node
+from url_resolver import URLResolver
 
 
 class TestTextNode(unittest.TestCase):
@@ -54,6 +55,41 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.tag, "b")
         self.assertEqual(html_node.value, "This is bold")
 
+    def test_link_with_children(self):
+        node = TextNode(
+            "**boot** dev",
+            TextType.LINK,
+            "https://www.boot.dev",
+            children=[
+                TextNode("boot", TextType.BOLD),
+                TextNode(" dev", TextType.TEXT),
+            ],
+        )
+        html_node = text_node_to_html_node(node)
+        self.assertEqual(
+            html_node.to_html(),
+            '<a href="https://www.boot.dev"><b>boot</b> dev</a>',
+        )
+
+    def test_url_resolver(self):
+        resolver = URLResolver("/site/")
+        link = TextNode("tom", TextType.LINK, "/blog/tom")
+        self.assertEqual(
+            text_node_to_html_node(link, resolver).props, {"href": "/site/blog/tom"}
+        )
+        image = TextNode("tom", TextType.IMAGE, "/images/tom.png")
+        self.assertEqual(
+            text_node_to_html_node(image, resolver).props["src"], "/site/images/tom.png"
+        )
+        nested = TextNode(
+            "**tom**", TextType.LINK, "/blog/tom",
+            children=[TextNode("tom", TextType.BOLD)],
+        )
+        self.assertEqual(
+            text_node_to_html_node(nested, resolver).to_html(),
+            '<a href="/site/blog/tom"><b>tom</b></a>',
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from url_resolver import URLResolver
+
+
+class TestURLResolver(unittest.TestCase):
+    def test_basepath(self):
+        resolver = URLResolver("/boot_static/")
+        self.assertEqual(resolver.resolve("/"), "/boot_static/")
+        self.assertEqual(resolver.resolve("/blog/tom"), "/boot_static/blog/tom")
+        self.assertEqual(resolver.resolve("/index.css"), "/boot_static/index.css")
+
+    def test_default_basepath_is_identity(self):
+        resolver = URLResolver()
+        self.assertEqual(resolver.resolve("/blog/tom"), "/blog/tom")
+
+    def test_other_urls_unchanged(self):
+        resolver = URLResolver("/site/")
+        for url in (
+            "https://www.boot.dev", "//cdn.example.com/x.js", "#top",
+            "mailto:tom@example.com", "images/tom.png", "", None,
+        ):
+            self.assertEqual(resolver.resolve(url), url)
+
+    def test_relative(self):
+        resolver = URLResolver(page_path="blog/tom/index.html", relative=True)
+        self.assertEqual(resolver.resolve("/"), "../../")
+        self.assertEqual(resolver.resolve("/index.css"), "../../index.css")
+        self.assertEqual(resolver.resolve("/blog/majesty"), "../majesty")
+        self.assertEqual(resolver.resolve("/blog/tom/"), "./")
+        self.assertEqual(resolver.resolve("/contact?x=1#form"), "../../contact?x=1#form")
+
+    def test_relative_from_root_page(self):
+        resolver = URLResolver(page_path="index.html", relative=True)
+        self.assertEqual(resolver.resolve("/"), "./")
+        self.assertEqual(resolver.resolve("/images/tom.png"), "images/tom.png")
+
+    def test_cache_key(self):
+        self.assertEqual(URLResolver("/a/").cache_key, URLResolver("/a/").cache_key)
+        self.assertNotEqual(URLResolver("/a/").cache_key, URLResolver("/b/").cache_key)
+        self.assertNotEqual(
+            URLResolver(page_path="a/index.html", relative=True).cache_key,
+            URLResolver(page_path="b/index.html", relative=True).cache_key,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
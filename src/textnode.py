@@ -1,4 +1,4 @@
-from htmlnode import LeafNode
+from htmlnode import LeafNode, ParentNode
 from enum import Enum
 
 
@@ -12,23 +12,40 @@ class TextType(Enum):
 
 
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        # Nested inline nodes, e.g. bold text inside a link. None for the
+        # usual flat case, where `text` holds the whole content.
+        self.children = children
 
     def __eq__(self, other):
         return (
             self.text_type == other.text_type
             and self.text == other.text
             and self.url == other.url
+            and self.children == other.children
         )
 
     def __repr__(self):
+        if self.children is not None:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, children: {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node):
+def text_node_to_html_node(text_node, url_resolver=None):
+    """
+    Convert a TextNode to an HTMLNode.
+
+    Args:
+        text_node: The TextNode to convert
+        url_resolver: Optional URLResolver applied to link and image URLs
+    """
+    if text_node.children is not None:
+        return _nested_text_node_to_html_node(text_node, url_resolver)
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
     if text_node.text_type == TextType.BOLD:
@@ -38,8 +55,28 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == TextType.CODE:
         return LeafNode("code", text_node.text)
     if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode("a", text_node.text, {"href": _url(text_node, url_resolver)})
     if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        return LeafNode(
+            "img", "", {"src": _url(text_node, url_resolver), "alt": text_node.text}
+        )
     raise ValueError(f"invalid text type: {text_node.text_type}")
 
+
+def _url(text_node, url_resolver):
+    if url_resolver is None:
+        return text_node.url
+    return url_resolver.resolve(text_node.url)
+
+
+def _nested_text_node_to_html_node(text_node, url_resolver):
+    children = [
+        text_node_to_html_node(child, url_resolver) for child in text_node.children
+    ]
+    if text_node.text_type == TextType.BOLD:
+        return ParentNode("b", children)
+    if text_node.text_type == TextType.ITALIC:
+        return ParentNode("i", children)
+    if text_node.text_type == TextType.LINK:
+        return ParentNode("a", children, {"href": _url(text_node, url_resolver)})
+    raise ValueError(f"invalid nested text type: {text_node.text_type}")
@@ -0,0 +1,66 @@
+import posixpath
+
+
+class URLResolver:
+    """
+    Rewrites site-absolute URLs ("/blog/tom") for where the site is served.
+
+    URLs are resolved once, as link and image nodes and template
+    attributes are rendered, so only real URLs are touched: text that
+    merely looks like href="/..." (e.g. inside a code block) is left
+    alone. External, protocol-relative ("//host/..."), fragment-only and
+    already relative URLs are returned unchanged.
+
+    Args:
+        basepath: The base URL path of the site (e.g. "/boot_static/"),
+                  which replaces the leading "/"
+        page_path: With relative=True, the page's output path relative to
+                   the site root (e.g. "blog/tom/index.html")
+        relative: Produce URLs relative to the page instead, so the site
+                  works from any directory (or file://)
+        references: Optional list that every URL passed to resolve() is
+                    appended to, as written in the source (see LinkGraph)
+
+    Example:
+        URLResolver("/docs/").resolve("/blog/tom") returns "/docs/blog/tom"
+        URLResolver(page_path="blog/tom/index.html", relative=True)
+            .resolve("/index.css") returns "../../index.css"
+    """
+
+    __slots__ = ("basepath", "page_dir", "relative", "references")
+
+    def __init__(self, basepath="/", page_path=None, relative=False, references=None):
+        self.basepath = basepath
+        self.relative = relative
+        self.page_dir = posixpath.dirname(page_path or "")
+        self.references = references
+
+    @property
+    def cache_key(self):
+        """A string that is equal for resolvers that resolve URLs equally."""
+        if self.relative:
+            return "relative:" + self.page_dir
+        return "base:" + self.basepath
+
+    def resolve(self, url):
+        """Return url as it should appear in the rendered page."""
+        if self.references is not None:
+            self.references.append(url)
+        if not url or url[0] != "/" or url.startswith("//"):
+            return url
+        if not self.relative:
+            return self.basepath + url[1:]
+        path, suffix = split_url_suffix(url)
+        target = path.lstrip("/")
+        relative = posixpath.relpath(target or ".", self.page_dir or ".")
+        if path.endswith("/") and not relative.endswith("/"):
+            relative += "/"
+        return relative + suffix
+
+
+def split_url_suffix(url):
+    """Split a URL into its path and its "?query" / "#fragment" suffix."""
+    for i, char in enumerate(url):
+        if char == "?" or char == "#":
+            return url[:i], url[i:]
+    return url, ""